@@ -10,51 +10,212 @@ bl_info = {
 import bpy
 from bpy.app.handlers import persistent
 
-from bpy.types import Panel, Operator, PropertyGroup
+from bpy.types import Panel, Operator, PropertyGroup, AddonPreferences, UIList
 from bpy.props import StringProperty, CollectionProperty, BoolProperty, IntProperty, EnumProperty
 import os
-import json
+import time
+import atexit
+
+from .storage import (
+    QUICKSPAWN_CATEGORYLIST, QUICKSPAWN_CHARACTERLIST, make_store, catalog_fingerprint, copy_config, JsonStore,
+    ConfigLock, ConfigLockTimeout, read_version, write_version, version_filepath, file_stamp, merge_configs,
+    layer_configs, strip_layer, new_id, legacy_id
+)
+from .catalog_index import CatalogIndex
+from .search import SearchIndex
+from .scanner import LibraryScanner
+from .previews import ThumbnailCache
+from .health import LibraryHealth, LIBRARY_MISSING, LIBRARY_CHANGED
+from .prefetch import LibraryPrefetcher, PrefetchStats, DEFAULT_PREFETCH_BUDGET_MB
+from .utils import tag_redraw_view3d
+from .spawning import (
+    CharacterSpawnMixin, SpawnJob, SpawnQueue, split_patterns, record_spawn, DEFAULT_EXTRA_OVERRIDES, DEFAULT_RIG_PATTERN,
+    DEFAULT_EXCLUDE_PATTERNS
+)
+from .instrumentation import SpawnTimer, SpawnStats, entry_key, PHASE_LOAD, PHASE_OVERRIDE, PHASE_LABELS
+from .logs import logger, set_log_level, DEFAULT_LOG_LEVEL
+from .templates import TemplatePool, WARM_TEMPLATE_LIMIT
+from .rigui import RigScriptCache
+from .engine import (
+    LibraryRegistry, LoadedTexts, library_filepath, load_collection, load_collections, get_linked_collection, get_linked_collections,
+    deselect_all, add_collection_to_scene,
+    instance_collection, override_instances, layer_collection_index
+)
 
 # Thanks to mken for helping me with persisting data across sessions
 BLENDER_ADDON_CONFIG_FILENAME = f'quickspawn.json'
 BLENDER_ADDON_CONFIG_FILEPATH = os.path.join(bpy.utils.user_resource('CONFIG'), BLENDER_ADDON_CONFIG_FILENAME)
+# what's inside every .blend a watch folder scan has seen, keyed by (path, size, mtime)
+LIBRARY_INDEX_FILEPATH = os.path.join(bpy.utils.user_resource('CONFIG'), 'quickspawn_library_index.json')
+# thumbnails pulled out of the libraries, keyed by path + size + mtime
+THUMBNAIL_CACHE_DIRPATH = os.path.join(bpy.utils.user_resource('CONFIG'), 'quickspawn_thumbnails')
+
 
-QUICKSPAWN_CATEGORYLIST = "quickspawn_categorylist"
-QUICKSPAWN_CHARACTERLIST = "quickspawn_characterlist"
+# how long the config has to sit untouched before the write-behind timer flushes it
+CACHE_FLUSH_DELAY = 1.0
+# how often other blender instances' writes (and the shared catalog) are checked for
+CONFIG_WATCH_INTERVAL = 2.0
 
 class CacheService:
+    # every CacheService() shares one in-memory copy of the config; the disk is only touched on load and flush
+    # (and when another blender instance changed it)
+    _config = None
+    _dirty = False
+    _last_change = 0.0
+    _store = None
+    _fingerprint = None
+    # the personal config as it was on disk when we last read or wrote it, and the version stamp it had
+    _base = {}
+    _version = 0
+    _version_stamp = None
+    # the shared catalog layered under the personal one, and the (path, file stamp) it was read at
+    _shared = {}
+    _shared_stamp = None
+    # set when a flush had to merge in someone else's changes, so the watcher brings the scene up to date
+    _merged = False
+
+    # the on-disk format, picked from the addon preferences (plain json or snapshot + journal)
+    def get_store(self):
+        if CacheService._store is None:
+            preferences = get_preferences()
+            mode = preferences.storage_mode if preferences else 'JSON'
+            CacheService._store = make_store(mode, BLENDER_ADDON_CONFIG_FILEPATH)
+        return CacheService._store
+    # switching formats writes a fresh snapshot first, so nothing is left behind in the old journal (or database)
+    def set_storage_mode(self, mode):
+        store = self.get_store()
+        if store.mode == mode:
+            return
+        self.flush()
+        with ConfigLock(BLENDER_ADDON_CONFIG_FILEPATH):
+            config = store.load()
+            store.compact(config)
+            store.close()
+            CacheService._store = make_store(mode, BLENDER_ADDON_CONFIG_FILEPATH)
+            CacheService._store.compact(config)
+            self.bump_version()
     # read from cache
     def read_from_blender_cache(self):
+        self.refresh_shared()
         try:
-            with open(BLENDER_ADDON_CONFIG_FILEPATH, 'r') as file:
-                print(f"Reading from {BLENDER_ADDON_CONFIG_FILEPATH}")
-                config = json.load(file)
-                print(f"Config: {config}")
-                return config
+            logger.debug("Reading from %s", BLENDER_ADDON_CONFIG_FILEPATH)
+            with ConfigLock(BLENDER_ADDON_CONFIG_FILEPATH):
+                CacheService._version = read_version(BLENDER_ADDON_CONFIG_FILEPATH)
+                CacheService._version_stamp = file_stamp(version_filepath(BLENDER_ADDON_CONFIG_FILEPATH))
+                config = self.get_store().load()
+            CacheService._base = copy_config(config)
+            logger.debug(
+                "Read %d categories and %d entries",
+                len(config.get(QUICKSPAWN_CATEGORYLIST, [])), len(config.get(QUICKSPAWN_CHARACTERLIST, []))
+            )
+        except FileNotFoundError:
+            # first run, register() writes an empty one
+            logger.debug("No config at %s yet", BLENDER_ADDON_CONFIG_FILEPATH)
+            config = {}
         except Exception as e:
-            print(f"Error reading from {BLENDER_ADDON_CONFIG_FILEPATH}: {e}")
-            return {}
-    # attempt to find out if cachce exists
+            logger.error("Error reading from %s: %s", BLENDER_ADDON_CONFIG_FILEPATH, e)
+            config = {}
+        return layer_configs(CacheService._shared, config)
+    # the shared catalog path from the preferences, reread whenever the path or the file changes. returns True if it did
+    def refresh_shared(self):
+        preferences = get_preferences()
+        path = bpy.path.abspath(preferences.shared_catalog_path) if preferences and preferences.shared_catalog_path else ""
+        stamp = (path, file_stamp(path) if path else None)
+        if stamp == CacheService._shared_stamp:
+            return False
+        CacheService._shared_stamp = stamp
+        shared = {}
+        if stamp[1] is not None:
+            try:
+                # read only; it's written atomically by whoever maintains it, so no lock needed
+                shared = JsonStore(path).load()
+            except Exception as e:
+                logger.error("Error reading shared catalog %s: %s", path, e)
+        changed = shared != CacheService._shared
+        CacheService._shared = shared
+        return changed
+    # the current version is ours now: bump the stamp on disk. call with the config lock held
+    def bump_version(self):
+        CacheService._version = read_version(BLENDER_ADDON_CONFIG_FILEPATH) + 1
+        write_version(BLENDER_ADDON_CONFIG_FILEPATH, CacheService._version)
+        CacheService._version_stamp = file_stamp(version_filepath(BLENDER_ADDON_CONFIG_FILEPATH))
+    # attempt to find out if cachce exists; only the first call hits the disk
     def get_cache(self, cache_enabled=True):
         if not cache_enabled:
             return {}
-        return self.read_from_blender_cache()
-    # if it doesnt lets make it
+        if CacheService._config is None:
+            CacheService._config = self.read_from_blender_cache()
+        return CacheService._config
+    # if it doesnt lets make it. this only swaps the in-memory copy, the timer writes it out later
     def write_to_blender_cache(self, config):
-        with open(BLENDER_ADDON_CONFIG_FILEPATH, 'w') as file:
-            print(f"Writing to {BLENDER_ADDON_CONFIG_FILEPATH}")
-            json_str = json.dumps(config, indent=4)
-            file.write(json_str)
-            print(f"Wrote to {BLENDER_ADDON_CONFIG_FILEPATH}")
+        CacheService._config = config
+        CacheService._fingerprint = None
+        self.mark_dirty()
+    # note the change and (re)arm the debounced writer
+    def mark_dirty(self):
+        CacheService._dirty = True
+        CacheService._last_change = time.monotonic()
+        if not bpy.app.timers.is_registered(flush_cache_timer):
+            bpy.app.timers.register(flush_cache_timer, first_interval=CACHE_FLUSH_DELAY, persistent=True)
+    # write the in-memory config to disk now if there's anything pending. only the personal part is written, and if another
+    # instance wrote since our last read, our changes are replayed on top of theirs instead of overwriting them
+    def flush(self):
+        if not CacheService._dirty or CacheService._config is None:
+            return False
+        logger.debug("Writing to %s", BLENDER_ADDON_CONFIG_FILEPATH)
+        personal = strip_layer(CacheService._shared, CacheService._config)
+        with ConfigLock(BLENDER_ADDON_CONFIG_FILEPATH):
+            store = self.get_store()
+            merged = read_version(BLENDER_ADDON_CONFIG_FILEPATH) != CacheService._version
+            if merged:
+                personal = merge_configs(CacheService._base, personal, store.load())
+            store.save(personal)
+            self.bump_version()
+        CacheService._base = copy_config(personal)
+        CacheService._dirty = False
+        if merged:
+            logger.info("Merged changes from another Blender instance")
+            CacheService._config = layer_configs(CacheService._shared, personal)
+            CacheService._fingerprint = None
+            CacheService._merged = True
+        logger.debug("Wrote to %s", BLENDER_ADDON_CONFIG_FILEPATH)
+        return True
+    # pick up what other instances wrote (or a changed shared catalog) without reloading the file. pending changes of ours are
+    # kept on top. returns True if the config changed
+    def pull_external_changes(self):
+        changed = CacheService._merged
+        CacheService._merged = False
+        if CacheService._config is None:
+            return changed
+        old_shared = CacheService._shared
+        shared_changed = self.refresh_shared()
+        stamp = file_stamp(version_filepath(BLENDER_ADDON_CONFIG_FILEPATH))
+        if stamp == CacheService._version_stamp and not shared_changed:
+            return changed
+        personal = strip_layer(old_shared, CacheService._config)
+        with ConfigLock(BLENDER_ADDON_CONFIG_FILEPATH):
+            version = read_version(BLENDER_ADDON_CONFIG_FILEPATH)
+            CacheService._version_stamp = file_stamp(version_filepath(BLENDER_ADDON_CONFIG_FILEPATH))
+            if version != CacheService._version:
+                theirs = self.get_store().load()
+                personal = merge_configs(CacheService._base, personal, theirs) if CacheService._dirty else theirs
+                CacheService._base = copy_config(theirs)
+                CacheService._version = version
+            elif not shared_changed:
+                return changed
+        CacheService._config = layer_configs(CacheService._shared, personal)
+        CacheService._fingerprint = None
+        return True
+    # let go of the store (the sqlite one holds a connection open); the next get_store makes a new one
+    def close_store(self):
+        if CacheService._store is not None:
+            CacheService._store.close()
+            CacheService._store = None
     # fired whenever category list is updated - added, removed, etc
     def cache_category_list(self, category_list):
         cache = self.get_cache()
         cache[QUICKSPAWN_CATEGORYLIST] = [
-            {
-                "name": category.name,
-                "is_expanded": category.is_expanded,
-                "generate_override": category.generate_override
-            }
+            {"id": category.id, "name": category.name, **{field: getattr(category, field) for field in CATEGORY_FIELDS}}
             for category in category_list
         ]
         self.write_to_blender_cache(cache)
@@ -63,6 +224,7 @@ class CacheService:
         cache = self.get_cache()
         cache[QUICKSPAWN_CHARACTERLIST] = [
             {
+                "id": character.id,
                 "name": character.name,
                 "filepath": character.filepath,
                 "collection": character.collection,
@@ -71,6 +233,11 @@ class CacheService:
             for character in character_list
         ]
         self.write_to_blender_cache(cache)
+    # fingerprint of the cached catalog, worked out again only after it changes
+    def catalog_fingerprint(self):
+        if CacheService._fingerprint is None:
+            CacheService._fingerprint = catalog_fingerprint(self.get_cache())
+        return CacheService._fingerprint
     # get the cached category list
     def get_cached_category_list(self):
         cache = self.get_cache()
@@ -91,12 +258,107 @@ class CacheService:
         cache = self.get_cache()
         return cache.get('quickspawn_import_mode', 'APPEND')  # append default
 
+# cached category setting -> default for configs written before the setting existed
+CATEGORY_FIELDS = {
+    "is_expanded": True,
+    "generate_override": True,
+    "watch_folder": "",
+    "keep_warm": False,
+    "extra_overrides": DEFAULT_EXTRA_OVERRIDES,
+    "rig_pattern": DEFAULT_RIG_PATTERN,
+    "exclude_patterns": DEFAULT_EXCLUDE_PATTERNS,
+}
+CATEGORY_KEY = ("id",)
+CHARACTER_FIELDS = {"name": "", "filepath": "", "collection": "", "category": ""}
+CHARACTER_KEY = ("id",)
+# every property an item has, cached or not, for copying one item over another when a list is compacted
+CATEGORY_PROPERTIES = ("id", "name", *CATEGORY_FIELDS, "active_index")
+CHARACTER_PROPERTIES = ("id", *CHARACTER_FIELDS, "selected")
+
+# true while load_quickspawn_data writes into the scene lists, so the settings' update callbacks don't cache half a list
+hydrating_catalog = False
+
+# debounced write-behind: keeps pushing itself back until the config has been quiet for CACHE_FLUSH_DELAY
+def flush_cache_timer():
+    remaining = CacheService._last_change + CACHE_FLUSH_DELAY - time.monotonic()
+    if remaining > 0:
+        return remaining
+    try:
+        CacheService().flush()
+    except ConfigLockTimeout as e:
+        # another instance is busy with it, try again in a bit
+        logger.info("%s, retrying", e)
+        return CACHE_FLUSH_DELAY
+    except Exception as e:
+        logger.error("Error writing to %s: %s", BLENDER_ADDON_CONFIG_FILEPATH, e)
+    return None
+
+# polls the version stamp (one stat) and the shared catalog, and brings the scene's lists up to date when either changed
+def watch_config_timer():
+    try:
+        if CacheService().pull_external_changes() and bpy.context.scene is not None:
+            if hydrate_scene(bpy.context.scene):
+                tag_redraw_view3d()
+    except ConfigLockTimeout:
+        pass
+    except Exception as e:
+        logger.error("Error checking %s for changes: %s", BLENDER_ADDON_CONFIG_FILEPATH, e)
+    return CONFIG_WATCH_INTERVAL
+
+# undo/redo swap character_list and bpy.data out from under the operators, so drop the panel index and the library registry,
+# and stop spawns that are halfway. the search index is kept and gone over again in the background, only what the undo
+# changed gets reindexed
+@persistent
+def invalidate_cached_indexes(dummy=None):
+    SpawnQueue().abort_started()
+    CatalogIndex().invalidate()
+    SearchIndex().mark_stale()
+    schedule_search_index()
+    LibraryRegistry().invalidate()
+
+# stamp the config's fingerprint on the scene when its lists hold exactly the cached catalog, so the next open of this file
+# can skip hydrating them. a scene that never got hydrated (addon enabled mid session) is left alone, and one that doesn't
+# match (an undo, an edit that didn't reach the cache) loses its stamp so it's hydrated again
+@persistent
+def stamp_catalog_fingerprint(dummy=None):
+    scene = bpy.context.scene
+    if scene is None or not scene.quickspawn_catalog_fingerprint:
+        return
+    cache_service = CacheService()
+    if (property_list_matches(
+                scene.category_list, cache_service.get_cached_category_list(), CATEGORY_KEY, {"name": "", **CATEGORY_FIELDS})
+            and property_list_matches(
+                scene.character_list, cache_service.get_cached_character_list(), CHARACTER_KEY, CHARACTER_FIELDS)):
+        scene.quickspawn_catalog_fingerprint = cache_service.catalog_fingerprint()
+    else:
+        scene.quickspawn_catalog_fingerprint = ""
+
+# make sure nothing pending is lost when the .blend is saved or blender quits
+@persistent
+def flush_quickspawn_cache(dummy=None):
+    try:
+        CacheService().flush()
+    except Exception as e:
+        logger.error("Error writing to %s: %s", BLENDER_ADDON_CONFIG_FILEPATH, e)
+
 # class containing relevant details for storing the category
 def update_generate_override(self, context):
+    if hydrating_catalog:
+        return
     CacheService().cache_category_list(context.scene.category_list)
     context.area.tag_redraw()
 
+# any other category setting: just cache it
+def update_category_settings(self, context):
+    if hydrating_catalog:
+        return
+    CacheService().cache_category_list(context.scene.category_list)
+    if context.area:
+        context.area.tag_redraw()
+
 class CATEGORY_PG_category(PropertyGroup):
+    # stays the same for as long as the category exists; what the operators and the config address it by
+    id: StringProperty(name="ID")
     name: StringProperty(name="Category Name")
     is_expanded: BoolProperty(default=True)
     generate_override: BoolProperty(
@@ -105,13 +367,84 @@ class CATEGORY_PG_category(PropertyGroup):
         default=True,
         update=update_generate_override
     )
+    extra_overrides: StringProperty(
+        name="Editable Overrides",
+        description="Comma separated object name patterns to make editable after overriding (e.g. light direction controls). * and ? work as wildcards",
+        default=DEFAULT_EXTRA_OVERRIDES,
+        update=update_category_settings
+    )
+    rig_pattern: StringProperty(
+        name="Rig Name",
+        description="Name pattern of the object to select and make active after overriding. Leave empty to keep the selection",
+        default=DEFAULT_RIG_PATTERN,
+        update=update_category_settings
+    )
+    exclude_patterns: StringProperty(
+        name="Exclude on Spawn",
+        description="Comma separated name patterns of the character's child collections to exclude from the view layer after spawning (e.g. widget collections). * and ? work as wildcards",
+        default=DEFAULT_EXCLUDE_PATTERNS,
+        update=update_category_settings
+    )
+    keep_warm: BoolProperty(
+        name="Keep Warm",
+        description="Keep the first append of each collection as a hidden template and copy it for later appends instead of reading the library again",
+        default=False,
+        update=update_category_settings
+    )
+    watch_folder: StringProperty(
+        name="Watch Folder",
+        description="Folder of .blend files to scan for collections to add to this category",
+        subtype='DIR_PATH',
+        update=update_category_settings
+    )
+    # highlighted row in this category's list; only there because template_list needs one
+    active_index: IntProperty()
 
 # class containing relevant details for the character
 class CHARACTER_PG_character(PropertyGroup):
+    # same as the category's id; two entries can share everything else, e.g. collections of .blend files with the same name
+    id: StringProperty(name="ID")
     name: StringProperty(name="Name")
     filepath: StringProperty(name="File Path", subtype='FILE_PATH')
     collection: StringProperty(name="Collection Name")
     category: StringProperty(name="Category")
+    # ticked in the panel for batch spawning; not cached
+    selected: BoolProperty(name="Select", description="Include in Spawn Selected")
+
+# where the category / entry with this id is in the scene's list, or None once it's gone (removed, undone, another instance
+# dropped it) since the button pointing at it was drawn
+def category_position(scene, category_id):
+    return CatalogIndex().find(scene.as_pointer(), QUICKSPAWN_CATEGORYLIST, scene.category_list, category_id)
+
+def entry_position(scene, entry_id):
+    return CatalogIndex().find(scene.as_pointer(), QUICKSPAWN_CHARACTERLIST, scene.character_list, entry_id)
+
+def find_category(scene, category_id):
+    index = category_position(scene, category_id)
+    return scene.category_list[index] if index is not None else None
+
+def find_entry(scene, entry_id):
+    index = entry_position(scene, entry_id)
+    return scene.character_list[index] if index is not None else None
+
+# drop the items at the positions in dropped in one pass: every survivor behind the first gap is copied forward over the
+# gaps, then the tail left over is cut off from the back, where removing doesn't shift anything. removing them one at a
+# time shifts everything behind each one. properties has to name every property of an item so nothing is lost in the copy
+def compact_property_list(items, dropped, properties):
+    if not dropped:
+        return 0
+    write = min(dropped)
+    for read in range(write, len(items)):
+        if read in dropped:
+            continue
+        source = items[read]
+        target = items[write]
+        for name in properties:
+            setattr(target, name, getattr(source, name))
+        write += 1
+    for index in range(len(items) - 1, write - 1, -1):
+        items.remove(index)
+    return len(dropped)
 
 # add category - characters go into these
 class CATEGORY_OT_add_category(Operator):
@@ -142,6 +475,7 @@ class CATEGORY_OT_add_category(Operator):
             return {'CANCELLED'}
         
         category = context.scene.category_list.add()
+        category.id = new_id()
         category.name = self.name
         context.area.tag_redraw()
         
@@ -156,19 +490,28 @@ class CATEGORY_OT_remove_category(Operator):
     bl_idname = "category.remove_category"
     bl_label = "Remove Category"
     bl_description = "Remove a category and all its collections"
-    index: IntProperty()
+    category_id: StringProperty()
 
     # only called when user confirms; blender logic handles this. (based on invoke's return value)
     def execute(self, context):
-        category_name = context.scene.category_list[self.index].name
+        scene = context.scene
+        index = category_position(scene, self.category_id)
+        if index is None:
+            self.report({'ERROR'}, "This category isn't in the catalog anymore.")
+            return {'CANCELLED'}
+        category_name = scene.category_list[index].name
 
         # Remove the category
-        context.scene.category_list.remove(self.index)
+        scene.category_list.remove(index)
         
-        # Remove characters in this category
-        characters_to_remove = [char for char in context.scene.character_list if char.category == category_name]
-        for char in characters_to_remove:
-            context.scene.character_list.remove(context.scene.character_list.find(char.name))
+        # Remove characters in this category, all in one pass over the list
+        dropped = set()
+        for position, char in enumerate(scene.character_list):
+            if char.category == category_name:
+                dropped.add(position)
+        SearchIndex().remove_many([scene.character_list[position] for position in dropped])
+        compact_property_list(scene.character_list, dropped, CHARACTER_PROPERTIES)
+        CatalogIndex().invalidate()
         
         # Update the cache
         cache_service = CacheService()
@@ -213,16 +556,20 @@ class CHARACTER_OT_add_character(Operator):
             self.report({'ERROR'}, "Blender Limitation: Cannot add the current file as a library. It has to be done outside of the file.") # this appears to be a blender limitation
             return {'CANCELLED'}
 
-        if any(char.collection.lower() == self.filename.lower() and char.category == self.category 
-               for char in context.scene.character_list):
+        scene = context.scene
+        if CatalogIndex().has_collection(scene.as_pointer(), scene.character_list, self.category, self.filename):
             self.report({'ERROR'}, f"Collection '{self.filename}' already exists in category '{self.category}'.")
             return {'CANCELLED'}
 
         character = context.scene.character_list.add()
+        character.id = new_id()
         character.name = os.path.basename(self.filepath)
         character.filepath = self.directory
         character.collection = self.filename
         character.category = self.category
+        CatalogIndex().invalidate()
+        SearchIndex().add(character)
+        check_library_health([character.filepath])
         # forces ui update: WITHOUT THIS, UI DOESNT UPDATE UNTIL YOU MOVE YOUR MOUSE
         context.area.tag_redraw()
         
@@ -248,10 +595,16 @@ class CHARACTER_OT_remove_character(Operator):
     bl_idname = "character.remove_character"
     bl_label = "Remove Collection"
     bl_description = "Remove a collection from this category"
-    index: IntProperty()
+    entry_id: StringProperty()
 
     def execute(self, context):
-        context.scene.character_list.remove(self.index)
+        index = entry_position(context.scene, self.entry_id)
+        if index is None:
+            self.report({'ERROR'}, "This collection isn't in the catalog anymore.")
+            return {'CANCELLED'}
+        SearchIndex().remove(context.scene.character_list[index])
+        context.scene.character_list.remove(index)
+        CatalogIndex().invalidate()
         context.area.tag_redraw()
         
         # Cache updated character list with deleted character
@@ -263,37 +616,71 @@ class CHARACTER_OT_remove_character(Operator):
         return context.window_manager.invoke_confirm(self, event)
 
 # handles importing; one press importing
-class CHARACTER_OT_import_character(Operator):
+class CHARACTER_OT_import_character(CharacterSpawnMixin, Operator):
     bl_idname = "character.import_character"
     bl_label = "Import Character"
     bl_options = {'INTERNAL'}
     bl_description = "Import this collection"
 
-    index: bpy.props.IntProperty()
+    entry_id: StringProperty()
  
     
     def execute(self, context):
-        character = context.scene.character_list[self.index]
+        character = find_entry(context.scene, self.entry_id)
+        if character is None:
+            self.report({'ERROR'}, "This collection isn't in the catalog anymore.")
+            return {'CANCELLED'}
         category = next((cat for cat in context.scene.category_list if cat.name == character.category), None)
+
+        problem = library_problem(character.filepath)
+        if problem:
+            self.report({'ERROR'}, problem)
+            return {'CANCELLED'}
         
-        initial_colls = set(bpy.data.collections)
-        initial_texts = set(bpy.data.texts)
-        initial_armatures = set(bpy.data.armatures)
-        
-        
-        if context.scene.quickspawn_import_mode == 'APPEND':
+        link = context.scene.quickspawn_import_mode != 'APPEND'
+
+        # instances share one linked copy of the collection; cheap enough to skip the queue
+        if context.scene.quickspawn_import_mode == 'INSTANCE':
+            self.spawn_timer = SpawnTimer(entry_key(character), character.collection, "Instanced")
+            try:
+                with self.phase(PHASE_LOAD):
+                    collection = get_linked_collection(character.filepath, character.collection)
+                    instance_collection(context, collection)
+            except Exception as e:
+                self.report({'ERROR'}, f"Could not instance collection: {str(e)}")
+                return {'CANCELLED'}
+            record_spawn(self.spawn_timer)
+            self.report({'INFO'}, f"Instanced collection: {character.name}")
+            return {'FINISHED'}
+
+        # hand it to the spawn queue so the ui keeps going between the load, override and setup steps
+        preferences = get_preferences()
+        keep_warm = category is not None and category.keep_warm
+        if preferences and preferences.use_spawn_queue:
+            SpawnQueue().enqueue(SpawnJob(character, category, link, template_limit=warm_template_limit()))
+            self.report({'INFO'}, f"Queued {character.collection}")
+            return {'FINISHED'}
+
+        self.spawn_timer = SpawnTimer(entry_key(character), character.collection)
+        if not link:
             # User is appending given collection
             try:
-                bpy.ops.wm.append(filename=character.collection, directory=character.filepath)   
+                with self.phase(PHASE_LOAD):
+                    if keep_warm:
+                        spawned = TemplatePool().append(character.filepath, [character.collection], warm_template_limit())[character.collection]
+                    else:
+                        spawned = load_collection(character.filepath, character.collection, link=False)
+                    add_collection_to_scene(context, spawned)
                 action = "Appended"
             except Exception as e:
                 self.report({'ERROR'}, f"Could not append collection: {str(e)}")
                 return {'CANCELLED'}
         else:
             # User is linking given collection. Additionally, it's made a library override.
-            initial_objs = set(bpy.data.objects)
             try:
-                bpy.ops.wm.link(filename=character.collection, directory=character.filepath)
+                with self.phase(PHASE_LOAD):
+                    spawned = get_linked_collection(character.filepath, character.collection)
+                    instance = instance_collection(context, spawned)
             except Exception as e:
                 self.report({'ERROR'}, f"Error linking collection. It may contain datablocks that are not overridable and thus duplicate. Output: {str(e)}")
                 return {'CANCELLED'}
@@ -301,25 +688,9 @@ class CHARACTER_OT_import_character(Operator):
             try:
                 if category and category.generate_override:
                     # LIB OVERRIDE on what's been LINKED.
-                    bpy.ops.object.make_override_library()
-
-                    # LIB OVERRIDE: LIGHT DIRECTION
-                    for obj in bpy.context.view_layer.objects:
-                        if "Light Direction" in obj.name and obj not in initial_objs:
-                            for o in bpy.context.selected_objects:
-                                o.select_set(False) 
-                            obj.select_set(True)
-                            bpy.context.view_layer.objects.active = obj
-                            bpy.ops.object.make_override_library()
-                            obj.select_set(False)
-                            break
-
-                    # Reselect char rig for convenience.
-                    for obj in bpy.context.view_layer.objects:
-                        if "Rig" in obj.name and obj not in initial_objs:
-                            obj.select_set(True)
-                            bpy.context.view_layer.objects.active = obj
-                            break
+                    with self.phase(PHASE_OVERRIDE):
+                        spawned = override_instances(context, [instance])[0]
+                        self.override_extras(context, spawned, split_patterns(category.extra_overrides), category.rig_pattern)
                     
             except Exception as e:
                 self.report({'ERROR'}, f"Error making override: {str(e)}")
@@ -328,133 +699,106 @@ class CHARACTER_OT_import_character(Operator):
             action = "Linked"
             if category and category.generate_override:
                 action += " and overridden"
-        
-        new_colls = set(bpy.data.collections) - initial_colls
-        new_texts = set(bpy.data.texts) - initial_texts
-        new_armatures = set(bpy.data.armatures) - initial_armatures
-           
-        
-        is_character = False
-        rig_object = None
-        
-        # identify if the collection we just added is a character
-        for new_collection in new_colls:
-            for obj in new_collection.objects:
-                if obj.type == 'ARMATURE' and "metarig" not in obj.name.lower():
-                    is_character = True
-                    # we only care about armatures that are not named metarig
-                    print(f"Found rig object: {obj.name}. Is Character.")
-                    rig_object = obj
-                    
-                    break
-            if is_character:
-                break
 
+        exclude_patterns = split_patterns(category.exclude_patterns if category else DEFAULT_EXCLUDE_PATTERNS)
+        is_character = self.setup_spawned(spawned, action, exclude_patterns)
+        self.spawn_timer.action = action
+        record_spawn(self.spawn_timer)
         if is_character:
             self.report({'INFO'}, f"{action} character: {character.name}.")
-            # Perform character-specific operations here
-            self.process_character(rig_object, new_collection, new_texts, new_armatures, action, initial_texts)
         else:
             self.report({'INFO'}, f"{action} collection: {character.name}")
         
         return {'FINISHED'}
-    
-    # lel same code from setup addon
-    def searchForLayerCollection(self, layerColl, coll_name):
-        found = None
-        if (layerColl.name == coll_name):
-            return layerColl
-        for layer in layerColl.children:
-            found = self.searchForLayerCollection(layer, coll_name)
-            if found:
-                return found
-
-    def disable_collection(self, collection_name):
-        view_layer_collection = bpy.context.view_layer.layer_collection
-
-        layer_collection_to_disable = self.searchForLayerCollection(view_layer_collection, collection_name)
-        if layer_collection_to_disable:
-            layer_collection_to_disable.exclude = True
-            return True
-        return False
-
-    # after we identify the character, we can do some processing
-    def process_character(self, rig_object, collection, texts, armatures, action_name, initial_texts):
-        # if existing, close the wgt collection
-        # within the collection, there is a COLLECTION possibly named wgt or wgts we need to disable it
-        for obj in collection.children:
-            if "wgt" in obj.name.lower() or "wgts" in obj.name.lower():
-                print(f"Disabling collection: {obj.name}")
-                self.disable_collection(obj.name)
-
-        # identify the armature
-        char_armature = None
-        for armature in armatures:
-            # if armature name doesn't have metarig in it, we can assume it's the character
-            if "metarig" not in armature.name.lower():
-                char_armature = armature
-                break
-
-        script_file = None
-        # if we have an armature, we can identify the rig script.
-        if char_armature:
-            for text in texts:
-                if "_ui.py" in text.name:
-                    if action_name == "Appended":
-                        script_file = text
-                    elif "overridden" in action_name:
-                        new_text = bpy.data.texts.new(char_armature.name+"_ui.py")
-                        new_text.write(text.as_string())
-                        script_file = new_text
-                        script_file.use_module = True
-
-                    break
-
-        # If linking duplicate characters, this is the case below. 
-        if len(texts) == 0 and "overridden" in action_name and char_armature:
-            try:
-                original_file = bpy.data.texts.get(char_armature.name.split(".")[0]+"_ui.py")
-                original_text = original_file.as_string()
-                
-                new_text = bpy.data.texts.new(char_armature.name+"_ui.py") 
-                new_text.write(original_text)
-                script_file = new_text
-                script_file.use_module = True # enables the text to be treated as a script - to be ran at .blend startup
-            except:
-                pass # if we get here, it's likely a rig with no corresponding rig script, in which case, just ignore.
-        
-        if script_file:
-            try:
-                # this allows us to handle duplicate armature names, that way, the rig layers can be present for duplicated characters
-                # every char should just have a unique id; this needs to especially be true for duplicate characters.
-                random_id = str(hash(char_armature.name.lower().replace(" ", ""))).replace("-", "")
-                
-                bpy.data.armatures[char_armature.name]["rig_id"] = random_id
-                
-                print(f"Generated new rig_id: {bpy.data.armatures[char_armature.name]['rig_id']}")
-
-                script_text = script_file.as_string()
-                script_text = script_text.replace(char_armature.name.split(".")[0], char_armature.name)
-
-                rig_char_id = script_text.split("rig_id = \"")[1].split("\"")[0]
-                script_text = script_text.replace(rig_char_id, random_id)
 
+# spawns many entries at once: the selected ones of a category, or the whole category.
+# entries are grouped by .blend so each library is read once, then overridden and set up in one pass
+class CHARACTER_OT_batch_import(CharacterSpawnMixin, Operator):
+    bl_idname = "character.batch_import"
+    bl_label = "Spawn Collections"
+    bl_options = {'INTERNAL'}
+    bl_description = "Import several collections of this category at once"
 
-                script_file.clear()
-                script_file.write(script_text)
-
-                ctx = bpy.context.copy()
-                ctx['edit_text'] = script_file
-                with bpy.context.temp_override(**ctx):
-                    bpy.ops.text.run_script()
-
-            except:
-                pass
+    category: StringProperty(name="Category")
+    selected_only: BoolProperty(name="Selected Only", default=True)
 
-        
-        self.report({'INFO'}, "Setup successful")
+    def execute(self, context):
+        scene = context.scene
+        category = next((cat for cat in scene.category_list if cat.name == self.category), None)
+        rows = CatalogIndex().get_category(scene.as_pointer(), scene.character_list, self.category)
+        characters = [scene.character_list[index] for index, collection in rows]
+        if self.selected_only:
+            characters = [character for character in characters if character.selected]
+        if not characters:
+            self.report({'WARNING'}, f"Nothing to spawn in '{self.category}'.")
+            return {'CANCELLED'}
 
+        link = scene.quickspawn_import_mode != 'APPEND'
+        instance_mode = scene.quickspawn_import_mode == 'INSTANCE'
+        override = link and not instance_mode and category is not None and category.generate_override
+
+        # one library read per .blend for all of its collections
+        by_library = {}
+        for character in characters:
+            by_library.setdefault(library_filepath(character.filepath), []).append(character)
+
+        deselect_all(context)
+        spawned = []
+        failed = []
+        for library_characters in by_library.values():
+            names = list(dict.fromkeys(character.collection for character in library_characters))
+            problem = library_problem(library_characters[0].filepath)
+            if problem:
+                logger.warning(problem)
+                failed.extend(library_characters)
+                continue
+            try:
+                if link:
+                    loaded = get_linked_collections(library_characters[0].filepath, names)
+                elif not link and category is not None and category.keep_warm:
+                    loaded = TemplatePool().append(library_characters[0].filepath, names, warm_template_limit())
+                else:
+                    loaded = load_collections(library_characters[0].filepath, names, link)
+            except Exception as e:
+                logger.warning("Could not load from %s: %s", library_characters[0].filepath, e)
+                failed.extend(library_characters)
+                continue
+            for collection in loaded.values():
+                if link:
+                    spawned.append(instance_collection(context, collection, deselect=False))
+                else:
+                    add_collection_to_scene(context, collection, deselect=False)
+                    spawned.append(collection)
+
+        # single override pass over everything that got linked
+        if override and spawned:
+            try:
+                spawned = override_instances(context, spawned)
+                extra_patterns = split_patterns(category.extra_overrides)
+                for collection in spawned:
+                    self.override_extras(context, collection, extra_patterns, category.rig_pattern)
+            except Exception as e:
+                self.report({'ERROR'}, f"Error making override: {str(e)}")
+                return {'CANCELLED'}
+        elif link and not instance_mode:
+            spawned = [instance.instance_collection for instance in spawned]
 
+        if instance_mode:
+            # instances can't be posed or edited, so there's nothing to set up
+            summary = f"Instanced {len(spawned)} collections from {len(by_library)} libraries"
+        else:
+            action = "Appended" if not link else "Linked and overridden" if override else "Linked"
+            exclude_patterns = split_patterns(category.exclude_patterns if category else DEFAULT_EXCLUDE_PATTERNS)
+            layer_index = layer_collection_index(context.view_layer)
+            characters_spawned = sum(
+                1 for collection in spawned if self.setup_spawned(collection, action, exclude_patterns, layer_index)
+            )
+            summary = f"{action} {len(spawned)} collections ({characters_spawned} characters) from {len(by_library)} libraries"
+        if failed:
+            self.report({'WARNING'}, f"{summary}. Failed: {', '.join(character.collection for character in failed)}")
+        else:
+            self.report({'INFO'}, summary)
+        return {'FINISHED'} if spawned else {'CANCELLED'}
 
 
 # drop down control thx cgpt
@@ -462,16 +806,278 @@ class CATEGORY_OT_toggle_expand(Operator):
     bl_idname = "category.toggle_expand"
     bl_label = "Toggle Category Expand"
     
-    index: IntProperty()
+    category_id: StringProperty()
 
     def execute(self, context):
-        category = context.scene.category_list[self.index]
+        category = find_category(context.scene, self.category_id)
+        if category is None:
+            return {'CANCELLED'}
         category.is_expanded = not category.is_expanded
+        if category.is_expanded:
+            prefetch_category(context.scene, category.name)
 
         # Update the cache
         CacheService().cache_category_list(context.scene.category_list)
         return {'FINISHED'}
 
+# watch folders: background scans in flight and what they found that isn't in the catalog yet, per category name
+library_scanner = None
+thumbnail_cache = None
+library_health = None
+library_prefetcher = None
+pending_scans = {}
+discovered_entries = {}
+SCAN_POLL_INTERVAL = 0.5
+
+# how often every library in the catalog gets stat'ed, and how often finished stats are picked up
+LIBRARY_HEALTH_INTERVAL = 30.0
+LIBRARY_HEALTH_POLL_INTERVAL = 0.5
+
+# stat the given library directories (or every one in the catalog) in the background. paths are resolved here since
+# relative ones depend on the open file; nothing here waits on the disk
+def check_library_health(directories=None):
+    if library_health is None or bpy.context.scene is None:
+        return
+    if directories is None:
+        scene = bpy.context.scene
+        directories = CatalogIndex().get_libraries(scene.as_pointer(), scene.character_list)
+    libraries = {library_filepath(directory) for directory in directories}
+    library_health.check([(library, bpy.path.abspath(library)) for library in libraries])
+    if not bpy.app.timers.is_registered(poll_library_health):
+        bpy.app.timers.register(poll_library_health, first_interval=LIBRARY_HEALTH_POLL_INTERVAL)
+
+def library_health_timer():
+    check_library_health()
+    return LIBRARY_HEALTH_INTERVAL
+
+def poll_library_health():
+    if library_health is None:
+        return None
+    if library_health.collect():
+        tag_redraw_view3d()
+    return LIBRARY_HEALTH_POLL_INTERVAL if library_health.pending() else None
+
+# why a spawn from this library directory would fail, going by the last check, or None. a library found missing gets checked
+# again right away, so trying again once it's back works without waiting for the schedule
+def library_problem(directory):
+    if library_health is None:
+        return None
+    library = library_filepath(directory)
+    status = library_health.status(library)
+    if status is None or status.state != LIBRARY_MISSING:
+        return None
+    check_library_health([directory])
+    return f"Library not found: {library} (checked {int(time.time() - status.checked)}s ago)"
+
+# categories whose libraries were already handed to the prefetcher since the file was opened
+prefetched_categories = set()
+
+# read a category's distinct library files into the os cache in the background, ahead of its first spawn. libraries the
+# health check found missing are left out
+def prefetch_category(scene, category_name):
+    prefetched_categories.add(category_name)
+    budget_mb = prefetch_budget_mb()
+    if library_prefetcher is None or budget_mb <= 0:
+        return
+    rows = CatalogIndex().get_category(scene.as_pointer(), scene.character_list, category_name)
+    libraries = {library_filepath(scene.character_list[index].filepath) for index, collection in rows}
+    library_prefetcher.prefetch(
+        [bpy.path.abspath(library) for library in libraries if not (library_health and library_health.state(library) == LIBRARY_MISSING)],
+        budget_mb * 1024 * 1024
+    )
+
+# icon flagging a row whose library is missing or changed on disk, or None
+def library_state_icon(library):
+    state = library_health.state(library) if library_health else None
+    if state == LIBRARY_MISSING:
+        return 'ERROR'
+    if state == LIBRARY_CHANGED:
+        return 'FILE_REFRESH'
+    return None
+
+# catalog entry fields for a collection found in a .blend, in the same shape the file browser gives add_character
+def discovered_entry(blend_path, collection):
+    return {
+        "name": os.path.basename(blend_path),
+        "filepath": os.path.join(blend_path, "Collection", ""),
+        "collection": collection,
+    }
+
+def start_watch_folder_scan(category):
+    if library_scanner is None or not category.watch_folder or category.name in pending_scans:
+        return
+    pending_scans[category.name] = library_scanner.scan(bpy.path.abspath(category.watch_folder))
+    if not bpy.app.timers.is_registered(poll_library_scans):
+        bpy.app.timers.register(poll_library_scans, first_interval=SCAN_POLL_INTERVAL)
+
+# picks up finished scans on the main thread and keeps only the collections the category doesn't have yet
+def poll_library_scans():
+    scene = bpy.context.scene
+    for category_name, future in list(pending_scans.items()):
+        if not future.done():
+            continue
+        del pending_scans[category_name]
+        try:
+            found = future.result()
+        except Exception as e:
+            logger.warning("Watch folder scan for '%s' failed: %s", category_name, e)
+            continue
+        rows = CatalogIndex().get_category(scene.as_pointer(), scene.character_list, category_name)
+        known = {collection.lower() for index, collection in rows}
+        discovered_entries[category_name] = [
+            discovered_entry(blend_path, collection)
+            for blend_path, collections in sorted(found.items())
+            for collection in collections
+            if collection.lower() not in known
+        ]
+    tag_redraw_view3d()
+    return SCAN_POLL_INTERVAL if pending_scans else None
+
+class CATEGORY_OT_scan_watch_folder(Operator):
+    bl_idname = "category.scan_watch_folder"
+    bl_label = "Scan Watch Folder"
+    bl_options = {'INTERNAL'}
+    bl_description = "Look for new collections in this category's watch folder. Runs in the background"
+
+    category_id: StringProperty()
+
+    def execute(self, context):
+        category = find_category(context.scene, self.category_id)
+        if category is None:
+            self.report({'ERROR'}, "This category isn't in the catalog anymore.")
+            return {'CANCELLED'}
+        if not category.watch_folder:
+            self.report({'ERROR'}, f"Category '{category.name}' has no watch folder.")
+            return {'CANCELLED'}
+        start_watch_folder_scan(category)
+        return {'FINISHED'}
+
+class CATEGORY_OT_add_discovered(Operator):
+    bl_idname = "category.add_discovered"
+    bl_label = "Add Discovered Collections"
+    bl_options = {'INTERNAL'}
+    bl_description = "Add the collections found in the watch folder to this category"
+
+    category_id: StringProperty()
+    dismiss: BoolProperty(default=False)
+
+    def execute(self, context):
+        category = find_category(context.scene, self.category_id)
+        if category is None:
+            self.report({'ERROR'}, "This category isn't in the catalog anymore.")
+            return {'CANCELLED'}
+        discovered = discovered_entries.pop(category.name, [])
+        if self.dismiss:
+            context.area.tag_redraw()
+            return {'FINISHED'}
+
+        added = []
+        for entry in discovered:
+            character = context.scene.character_list.add()
+            character.id = new_id()
+            character.name = entry["name"]
+            character.filepath = entry["filepath"]
+            character.collection = entry["collection"]
+            character.category = category.name
+            added.append(character)
+        SearchIndex().add_many(added)
+        CatalogIndex().invalidate()
+        check_library_health({entry["filepath"] for entry in discovered})
+        context.area.tag_redraw()
+
+        CacheService().cache_character_list(context.scene.character_list)
+        self.report({'INFO'}, f"Added {len(discovered)} collections to {category.name}")
+        return {'FINISHED'}
+
+class QUICKSPAWN_OT_cancel_spawn(Operator):
+    bl_idname = "quickspawn.cancel_spawn"
+    bl_label = "Cancel Spawn"
+    bl_options = {'INTERNAL'}
+    bl_description = "Remove queued spawns that haven't started yet"
+
+    # position in the queue, -1 for everything pending
+    position: IntProperty(default=-1)
+
+    def execute(self, context):
+        cancelled = SpawnQueue().cancel(self.position)
+        context.area.tag_redraw()
+        self.report({'INFO'}, f"Cancelled {cancelled} queued spawns.")
+        return {'FINISHED'}
+
+# how many queued spawns the panel lists before summarising the rest
+SPAWN_QUEUE_ROWS = 5
+
+# default height of a category's list before it starts scrolling
+CATALOG_LIST_ROWS = 8
+
+# rows of one category. list_id is the category name; blender only lays out the rows that are scrolled into view
+class CHARACTER_UL_catalog(UIList):
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        row = layout.row(align=True)
+        row.prop(item, "selected", text="")
+        # only rows that are scrolled into view get here, so only their thumbnails are ever loaded
+        library = library_filepath(item.filepath)
+        icon_value = thumbnail_cache.icon_id(library) if thumbnail_cache else 0
+        row.operator("character.import_character", text=item.collection, icon_value=icon_value).entry_id = item.id
+        state_icon = library_state_icon(library)
+        if state_icon:
+            row.label(text="", icon=state_icon)
+        row.operator("character.remove_character", text="", icon='TRASH').entry_id = item.id
+
+    # keep only this category's rows, sorted by collection name, matching the filter string
+    def filter_items(self, context, data, propname):
+        return CatalogIndex().get_filter(
+            data.as_pointer(), getattr(data, propname), self.list_id,
+            self.filter_name, self.bitflag_filter_item
+        )
+
+# entries the search index takes in per timer tick, and the pause between ticks
+SEARCH_INDEX_CHUNK = 500
+SEARCH_INDEX_INTERVAL = 0.01
+
+# brings the search index in line with the current scene's catalog a chunk at a time, so neither opening a file nor an undo
+# builds it inside the panel's draw
+def update_search_index():
+    scene = bpy.context.scene
+    if scene is None:
+        return None
+    if not SearchIndex().sync(scene.as_pointer(), scene.character_list, SEARCH_INDEX_CHUNK):
+        return SEARCH_INDEX_INTERVAL
+    if scene.quickspawn_search.strip():
+        tag_redraw_view3d()
+    return None
+
+def schedule_search_index():
+    if not bpy.app.timers.is_registered(update_search_index):
+        bpy.app.timers.register(update_search_index, first_interval=0.0)
+
+# best matches across every category, in place of the category boxes while there's something in the search field
+def draw_search_results(layout, scene, catalog_index, scene_key):
+    search_index = SearchIndex()
+    box = layout.box()
+    if not search_index.ready(scene_key):
+        schedule_search_index()
+    if not search_index.built(scene_key):
+        box.label(text="Indexing the catalog...", icon='TIME')
+        return
+    results = search_index.search(scene.quickspawn_search)
+    if not results:
+        box.label(text="No matches", icon='INFO')
+        return
+    for entry_id in results:
+        index = catalog_index.find(scene_key, QUICKSPAWN_CHARACTERLIST, scene.character_list, entry_id)
+        if index is None:
+            continue
+        character = scene.character_list[index]
+        row = box.row(align=True)
+        library = library_filepath(character.filepath)
+        icon_value = thumbnail_cache.icon_id(library) if thumbnail_cache else 0
+        row.operator("character.import_character", text=character.collection, icon_value=icon_value).entry_id = entry_id
+        state_icon = library_state_icon(library)
+        if state_icon:
+            row.label(text="", icon=state_icon)
+        row.label(text=character.category)
+
 # The main panel
 class CHARACTER_PT_panel(Panel):
     bl_label = "QuickSpawn"
@@ -488,39 +1094,153 @@ class CHARACTER_PT_panel(Panel):
         row.label(text="Import Mode")
         row.prop(scene, "quickspawn_import_mode", expand=True, text="Import Mode")
 
+        jobs = SpawnQueue().jobs()
+        if jobs:
+            box = layout.box()
+            row = box.row()
+            row.label(text=f"Spawning ({len(jobs)})", icon='SORTTIME')
+            row.operator("quickspawn.cancel_spawn", text="Cancel Pending", icon='CANCEL').position = -1
+            for position, job in enumerate(jobs[:SPAWN_QUEUE_ROWS]):
+                row = box.row()
+                row.label(text=f"{job.collection_name}: {job.stage_label}")
+                if not job.started:
+                    row.operator("quickspawn.cancel_spawn", text="", icon='X').position = position
+            if len(jobs) > SPAWN_QUEUE_ROWS:
+                box.label(text=f"... and {len(jobs) - SPAWN_QUEUE_ROWS} more")
+        elif SpawnQueue.last_message:
+            layout.label(text=SpawnQueue.last_message, icon='ERROR' if SpawnQueue.last_failed else 'CHECKMARK')
+
         row = layout.row()
         row.operator("category.add_category", text="Add Category", icon='ADD')
 
+        layout.prop(scene, "quickspawn_search", text="", icon='VIEWZOOM')
+
         layout.separator()
-        
-        for catNum, category in enumerate(scene.category_list):
+
+        catalog_index = CatalogIndex()
+        scene_key = scene.as_pointer()
+        if scene.quickspawn_search.strip():
+            draw_search_results(layout, scene, catalog_index, scene_key)
+            layout.separator()
+            layout.operator("quickspawn.clear_everything", text="Clear Everything", icon='TRASH')
+            return
+
+        for category in scene.category_list:
             box = layout.box()
             row = box.row()
             expand_ico = 'TRIA_DOWN' if category.is_expanded else 'TRIA_RIGHT'
-            row.operator("category.toggle_expand", text="", icon=expand_ico, emboss=False).index = catNum
+            row.operator("category.toggle_expand", text="", icon=expand_ico, emboss=False).category_id = category.id
             row.label(text=category.name)
-            row.operator("category.settings", text="", icon='SETTINGS').index = catNum
-            row.operator("category.remove_category", text="", icon='X').index = catNum
+            if category.watch_folder:
+                scanning = category.name in pending_scans
+                row.operator("category.scan_watch_folder", text="", icon='SORTTIME' if scanning else 'FILE_REFRESH').category_id = category.id
+            row.operator("category.settings", text="", icon='SETTINGS').category_id = category.id
+            row.operator("category.remove_category", text="", icon='X').category_id = category.id
             
             if category.is_expanded:
+                if category.name not in prefetched_categories:
+                    prefetch_category(scene, category.name)
+
                 row = box.row()
                 op = row.operator("character.add_character", text="Add Collection", icon='COLLECTION_NEW')
                 op.category = category.name
+
+                discovered = discovered_entries.get(category.name)
+                if discovered:
+                    row = box.row(align=True)
+                    row.label(text=f"{len(discovered)} new in watch folder", icon='INFO')
+                    row.operator("category.add_discovered", text="Add", icon='ADD').category_id = category.id
+                    op = row.operator("category.add_discovered", text="", icon='X')
+                    op.category_id = category.id
+                    op.dismiss = True
+
+                row = box.row(align=True)
+                op = row.operator("character.batch_import", text="Spawn Selected", icon='CHECKBOX_HLT')
+                op.category = category.name
+                op.selected_only = True
+                op = row.operator("character.batch_import", text="Spawn All", icon='DUPLICATE')
+                op.category = category.name
+                op.selected_only = False
                 
-                sorted_characters = sorted(
-                    [char for char in scene.character_list if char.category == category.name],
-                    key=lambda x: x.collection.lower()
+                # one scrollable list per category, keyed by category name so each keeps its own scroll and filter
+                category_rows = len(catalog_index.get_category(scene_key, scene.character_list, category.name))
+                box.template_list(
+                    "CHARACTER_UL_catalog", category.name,
+                    scene, "character_list",
+                    category, "active_index",
+                    rows=min(max(category_rows, 1), CATALOG_LIST_ROWS)
                 )
-                
-                for character in sorted_characters:
-                    row = box.row()
-                    op = row.operator("character.import_character", text=character.collection)
-                    op.index = scene.character_list.find(character.name)
-                    row.operator("character.remove_character", text="", icon='TRASH').index = scene.character_list.find(character.name)
 
         layout.separator()
         layout.operator("quickspawn.clear_everything", text="Clear Everything", icon='TRASH')
 
+# how many recently spawned entries the Stats subpanel lists
+SPAWN_STATS_ROWS = 8
+
+# last spawn of each recently spawned entry, phase by phase, next to the average over its last few spawns
+class CHARACTER_PT_stats(Panel):
+    bl_label = "Stats"
+    bl_idname = "CHARACTER_PT_stats"
+    bl_parent_id = "CHARACTER_PT_panel"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "QuickSpawn"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        self.draw_prefetch(layout)
+        spawn_stats = SpawnStats()
+        recent = spawn_stats.recent(SPAWN_STATS_ROWS)
+        if not recent:
+            layout.label(text="Nothing spawned yet", icon='INFO')
+            return
+        for last, runs in recent:
+            averages = spawn_stats.averages(runs)
+            box = layout.box()
+            row = box.row()
+            row.label(text=last.name, icon='TIME')
+            row.label(text=f"{last.total * 1000:.1f} ms")
+            column = box.column(align=True)
+            for phase, seconds in last.phases.items():
+                row = column.row()
+                row.label(text=PHASE_LABELS[phase])
+                row.label(text=f"{seconds * 1000:.1f} ms (avg {averages[phase] * 1000:.1f})")
+            box.label(text=f"{last.action}, last of {len(runs)} spawns" if len(runs) > 1 else last.action)
+        layout.operator("quickspawn.clear_stats", text="Clear Stats", icon='TRASH')
+
+    # first load of each library: warmed by the prefetcher (hit), still being read (late) or cold (miss)
+    def draw_prefetch(self, layout):
+        stats = PrefetchStats()
+        box = layout.box()
+        row = box.row()
+        row.label(text="Prefetch", icon='IMPORT')
+        row.label(text=f"{stats.hits} hits, {stats.late} late, {stats.misses} misses")
+        column = box.column(align=True)
+        if stats.hits:
+            column.label(text=f"Warm load avg {stats.hit_seconds / stats.hits * 1000:.1f} ms")
+        if stats.misses:
+            column.label(text=f"Cold load avg {stats.miss_seconds / stats.misses * 1000:.1f} ms")
+        budget_mb = prefetch_budget_mb()
+        text = f"Read {stats.warmed_bytes() / (1024 * 1024):.0f} of {budget_mb} MB"
+        if stats.over_budget:
+            text += f", {stats.over_budget} skipped over budget"
+        column.label(text=text if budget_mb > 0 else "Off (budget is 0)")
+
+class QUICKSPAWN_OT_clear_stats(Operator):
+    bl_idname = "quickspawn.clear_stats"
+    bl_label = "Clear Stats"
+    bl_options = {'INTERNAL'}
+    bl_description = "Forget the spawn timings and the prefetch counters"
+
+    def execute(self, context):
+        SpawnStats().clear()
+        # also frees the prefetch budget, expanded categories get read ahead again
+        PrefetchStats().clear()
+        prefetched_categories.clear()
+        context.area.tag_redraw()
+        return {'FINISHED'}
+
 class QUICKSPAWN_OT_clear_everything(Operator):
     bl_idname = "quickspawn.clear_everything"
     bl_label = "Clear Everything"
@@ -530,6 +1250,8 @@ class QUICKSPAWN_OT_clear_everything(Operator):
         # Clear all categories and characters from the scene
         context.scene.category_list.clear()
         context.scene.character_list.clear()
+        CatalogIndex().invalidate()
+        SearchIndex().invalidate()
 
         # Clear the cache file
         CacheService().write_to_blender_cache({QUICKSPAWN_CATEGORYLIST: [], QUICKSPAWN_CHARACTERLIST: []})
@@ -549,21 +1271,114 @@ class CATEGORY_OT_settings(Operator):
     bl_options = {'INTERNAL'}
     bl_description = "Settings for this category."
 
-    index: IntProperty()
+    category_id: StringProperty()
 
     def invoke(self, context, event):
         return context.window_manager.invoke_props_dialog(self)
 
     def draw(self, context):
         layout = self.layout
-        category = context.scene.category_list[self.index]
+        category = find_category(context.scene, self.category_id)
+        if category is None:
+            layout.label(text="This category isn't in the catalog anymore.", icon='ERROR')
+            return
         layout.prop(category, "generate_override")
+        col = layout.column()
+        col.active = category.generate_override
+        col.prop(category, "extra_overrides")
+        col.prop(category, "rig_pattern")
+        layout.prop(category, "exclude_patterns")
+        layout.prop(category, "keep_warm")
+        layout.prop(category, "watch_folder")
 
     def execute(self, context):
         return {'FINISHED'}
 
+# change between plain json and snapshot + journal on disk
+def log_level_update(self, context):
+    set_log_level(self.log_level)
+
+def storage_mode_update(self, context):
+    CacheService().set_storage_mode(self.storage_mode)
+
+class QUICKSPAWN_AP_preferences(AddonPreferences):
+    bl_idname = __name__
+
+    storage_mode: EnumProperty(
+        name="Cache Format",
+        description="How the QuickSpawn config is kept on disk",
+        items=[
+            ('JSON', "JSON", "Rewrite the whole quickspawn.json on every change"),
+            ('JOURNAL', "Journal", "Append each change to a journal next to quickspawn.json and fold it back in once it grows"),
+            ('SQLITE', "SQLite", "Keep the catalog in an indexed SQLite database (quickspawn.sqlite3) and only write what changed. Imports quickspawn.json the first time, for large studio catalogs")
+        ],
+        default='JSON',
+        update=storage_mode_update
+    )
+
+    shared_catalog_path: StringProperty(
+        name="Shared Catalog",
+        description="Optional quickspawn.json shared by the team (e.g. on a network drive). Its categories and collections show up under your own, which are the only ones written back",
+        subtype='FILE_PATH'
+    )
+
+    use_spawn_queue: BoolProperty(
+        name="Spawn in Background Queue",
+        description="Queue clicks and spawn them a step at a time so the interface stays responsive",
+        default=True
+    )
+
+    warm_template_limit: IntProperty(
+        name="Warm Templates",
+        description="How many kept-warm templates stay in memory before the least recently used one is dropped",
+        default=WARM_TEMPLATE_LIMIT,
+        min=1
+    )
+
+    prefetch_budget_mb: IntProperty(
+        name="Prefetch Budget (MB)",
+        description="How much of the libraries of expanded categories gets read ahead into the system's file cache per session, so the first spawn doesn't wait on a slow drive. 0 turns prefetching off",
+        default=DEFAULT_PREFETCH_BUDGET_MB,
+        min=0
+    )
+
+    log_level: EnumProperty(
+        name="Log Level",
+        description="How much QuickSpawn writes to the system console",
+        items=[
+            ('WARNING', "Warnings", "Only problems"),
+            ('INFO', "Info", "Also what QuickSpawn did, e.g. spawns and catalog updates"),
+            ('DEBUG', "Debug", "Everything, including how long each step of a spawn took")
+        ],
+        default=DEFAULT_LOG_LEVEL,
+        update=log_level_update
+    )
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "storage_mode")
+        layout.prop(self, "shared_catalog_path")
+        layout.prop(self, "use_spawn_queue")
+        layout.prop(self, "warm_template_limit")
+        layout.prop(self, "prefetch_budget_mb")
+        layout.prop(self, "log_level")
+
+# the addon preferences, or None if they aren't available (e.g. running the file directly)
+def get_preferences():
+    addon = bpy.context.preferences.addons.get(__name__)
+    return addon.preferences if addon else None
+
+def warm_template_limit():
+    preferences = get_preferences()
+    return preferences.warm_template_limit if preferences else WARM_TEMPLATE_LIMIT
+
+def prefetch_budget_mb():
+    preferences = get_preferences()
+    return preferences.prefetch_budget_mb if preferences else DEFAULT_PREFETCH_BUDGET_MB
+
 # list of the classes to register
 classes = (
+    QUICKSPAWN_AP_preferences,
     CATEGORY_PG_category,
     CHARACTER_PG_character,
     CATEGORY_OT_add_category,
@@ -571,9 +1386,16 @@ classes = (
     CHARACTER_OT_add_character,
     CHARACTER_OT_remove_character,
     CHARACTER_OT_import_character,
+    CHARACTER_OT_batch_import,
+    CHARACTER_UL_catalog,
     CHARACTER_PT_panel,
+    CHARACTER_PT_stats,
     CATEGORY_OT_toggle_expand,
     CATEGORY_OT_settings,
+    CATEGORY_OT_scan_watch_folder,
+    CATEGORY_OT_add_discovered,
+    QUICKSPAWN_OT_cancel_spawn,
+    QUICKSPAWN_OT_clear_stats,
     QUICKSPAWN_OT_clear_everything,
 )
 # change between append and link
@@ -582,45 +1404,130 @@ def import_mode_update(self, context):
 
 # done whenever add on is installed
 def register():
-    print("Registering QuickSpawn addon")
+    logger.debug("Registering QuickSpawn addon")
     for clas in classes:
         bpy.utils.register_class(clas)
+    preferences = get_preferences()
+    set_log_level(preferences.log_level if preferences else DEFAULT_LOG_LEVEL)
 
     bpy.types.Scene.character_list = CollectionProperty(type=CHARACTER_PG_character)
     bpy.types.Scene.category_list = CollectionProperty(type=CATEGORY_PG_category)
 
+    # catalog fingerprint the scene's lists were last saved or hydrated with
+    bpy.types.Scene.quickspawn_catalog_fingerprint = StringProperty(options={'HIDDEN'})
+
+    # searched on every keystroke, across all categories
+    bpy.types.Scene.quickspawn_search = StringProperty(
+        name="Search",
+        description="Find collections by name, library file or category",
+        options={'TEXTEDIT_UPDATE'}
+    )
+
     bpy.types.Scene.quickspawn_import_mode = EnumProperty(
         name="Import Mode",
         items=[
             ('APPEND', "Append", "Append the collection to the scene"),
-            ('LINK', "Link", "Link the collection to the scene")
+            ('LINK', "Link", "Link the collection to the scene"),
+            ('INSTANCE', "Instance", "Place an instance of the collection at the 3D cursor. The collection is linked once and shared by every instance, for static props and FX")
         ],
         default=CacheService().get_cached_quickspawn_settings(),
         update=import_mode_update
     )
 
+    global library_scanner, thumbnail_cache, library_health, library_prefetcher
+    library_scanner = LibraryScanner(LIBRARY_INDEX_FILEPATH)
+    thumbnail_cache = ThumbnailCache(THUMBNAIL_CACHE_DIRPATH)
+    library_health = LibraryHealth()
+    library_prefetcher = LibraryPrefetcher()
+
     # check for cache, if not found, create it
     cache_service = CacheService()
     if not cache_service.get_cache():
         # default empty stuff
         cache_service.write_to_blender_cache({QUICKSPAWN_CATEGORYLIST: [], QUICKSPAWN_CHARACTERLIST: []})
-        print("Cache created")
+        logger.debug("Cache created")
 
     # Register load handler (only if not already registered)
     if load_quickspawn_data not in bpy.app.handlers.load_post:
         bpy.app.handlers.load_post.append(load_quickspawn_data)
-        print("Load handler registered")
+        logger.debug("Load handler registered")
 
-    print("QuickSpawn addon registered")
+    # flush pending cache writes on save and on quit
+    if flush_quickspawn_cache not in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.append(flush_quickspawn_cache)
+    if stamp_catalog_fingerprint not in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.append(stamp_catalog_fingerprint)
+    atexit.register(flush_quickspawn_cache)
+
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if invalidate_cached_indexes not in handlers:
+            handlers.append(invalidate_cached_indexes)
+
+    # missing or changed libraries, flagged in the panel and refused before a spawn touches them
+    if not bpy.app.timers.is_registered(library_health_timer):
+        bpy.app.timers.register(library_health_timer, first_interval=LIBRARY_HEALTH_POLL_INTERVAL, persistent=True)
+
+    # other blender instances writing to the same config
+    if not bpy.app.timers.is_registered(watch_config_timer):
+        bpy.app.timers.register(watch_config_timer, first_interval=CONFIG_WATCH_INTERVAL, persistent=True)
+
+    logger.info("QuickSpawn addon registered")
 def unregister():
-    print("Unregistering QuickSpawn addon")
+    logger.debug("Unregistering QuickSpawn addon")
     # Unregister load handler
     if load_quickspawn_data in bpy.app.handlers.load_post:
         bpy.app.handlers.load_post.remove(load_quickspawn_data)
 
+    # write out anything still pending before we go away
+    if flush_quickspawn_cache in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.remove(flush_quickspawn_cache)
+    if stamp_catalog_fingerprint in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.remove(stamp_catalog_fingerprint)
+    if bpy.app.timers.is_registered(flush_cache_timer):
+        bpy.app.timers.unregister(flush_cache_timer)
+    if bpy.app.timers.is_registered(watch_config_timer):
+        bpy.app.timers.unregister(watch_config_timer)
+    atexit.unregister(flush_quickspawn_cache)
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if invalidate_cached_indexes in handlers:
+            handlers.remove(invalidate_cached_indexes)
+    flush_quickspawn_cache()
+    CacheService().close_store()
+
+    global library_scanner, thumbnail_cache, library_health, library_prefetcher
+    if library_prefetcher:
+        library_prefetcher.close()
+        library_prefetcher = None
+    prefetched_categories.clear()
+    PrefetchStats().clear()
+    if thumbnail_cache:
+        thumbnail_cache.close()
+        thumbnail_cache = None
+    for timer in (library_health_timer, poll_library_health):
+        if bpy.app.timers.is_registered(timer):
+            bpy.app.timers.unregister(timer)
+    if library_health:
+        library_health.close()
+        library_health = None
+    if bpy.app.timers.is_registered(poll_library_scans):
+        bpy.app.timers.unregister(poll_library_scans)
+    if bpy.app.timers.is_registered(update_search_index):
+        bpy.app.timers.unregister(update_search_index)
+    if library_scanner:
+        library_scanner.shutdown()
+        library_scanner = None
+    pending_scans.clear()
+    discovered_entries.clear()
+    SpawnQueue().clear()
+    TemplatePool().clear()
+    RigScriptCache().clear()
+    SpawnStats().clear()
+
     del bpy.types.Scene.character_list
     del bpy.types.Scene.category_list
     del bpy.types.Scene.quickspawn_import_mode
+    del bpy.types.Scene.quickspawn_catalog_fingerprint
+    del bpy.types.Scene.quickspawn_search
 
     for clas in reversed(classes):
         bpy.utils.unregister_class(clas)
@@ -629,32 +1536,139 @@ def unregister():
 if __name__ == "__main__":
     register()
 
+# true if a scene list is exactly the cached records, in the same order: what sync_property_list would leave it as
+def property_list_matches(items, records, key_fields, fields):
+    if len(items) != len(records):
+        return False
+    for item, record in zip(items, records):
+        if any(getattr(item, field) != record.get(field) for field in key_fields):
+            return False
+        if any(getattr(item, field) != record.get(field, default) for field, default in fields.items()):
+            return False
+    return True
+
+# bring a scene list in line with the cached records, touching only what differs: gone items are removed, missing ones
+# added, moved ones moved and changed fields set. items are matched on key_fields, properties are all of an item's
+# (see compact_property_list). returns how many items changed
+def sync_property_list(items, records, key_fields, fields, properties):
+    wanted = {}
+    order = []
+    for record in records:
+        key = tuple(record[field] for field in key_fields)
+        if key not in wanted:
+            wanted[key] = record
+            order.append(key)
+
+    # drop what's not in the config anymore (and duplicates)
+    current = []
+    present = set()
+    dropped = set()
+    for index, item in enumerate(items):
+        key = tuple(getattr(item, field) for field in key_fields)
+        if key in wanted and key not in present:
+            current.append(key)
+            present.add(key)
+        else:
+            dropped.add(index)
+    changed = compact_property_list(items, dropped, properties)
+
+    for position, key in enumerate(order):
+        touched = True
+        if position < len(current) and current[position] == key:
+            item = items[position]
+            touched = False
+        elif key in present:
+            old_position = current.index(key, position)
+            items.move(old_position, position)
+            current.insert(position, current.pop(old_position))
+            item = items[position]
+        else:
+            item = items.add()
+            for field, value in zip(key_fields, key):
+                setattr(item, field, value)
+            items.move(len(items) - 1, position)
+            current.insert(position, key)
+            present.add(key)
+            item = items[position]
+        record = wanted[key]
+        for field, default in fields.items():
+            value = record.get(field, default)
+            if getattr(item, field) != value:
+                setattr(item, field, value)
+                touched = True
+        changed += touched
+    return changed
+
+# items saved in a .blend from before ids get the id their config record was given (see storage.legacy_id), so the two
+# still line up
+def assign_legacy_ids(scene):
+    for category in scene.category_list:
+        if not category.id:
+            category.id = legacy_id(QUICKSPAWN_CATEGORYLIST, category.name)
+    for character in scene.character_list:
+        if not character.id:
+            character.id = legacy_id(QUICKSPAWN_CHARACTERLIST, (character.category, character.collection, character.filepath))
+
+# write the cached catalog into a scene's lists, unless the scene already has exactly this catalog. returns True if it had to
+def hydrate_scene(scene):
+    cache_service = CacheService()
+    fingerprint = cache_service.catalog_fingerprint()
+    if scene.quickspawn_catalog_fingerprint == fingerprint:
+        # saved with exactly this catalog, the lists in the file are already right
+        logger.debug("Catalog unchanged since this file was saved")
+        return False
+    global hydrating_catalog
+    hydrating_catalog = True
+    try:
+        assign_legacy_ids(scene)
+        categories_changed = sync_property_list(
+            scene.category_list, cache_service.get_cached_category_list(), CATEGORY_KEY,
+            {"name": "", **CATEGORY_FIELDS}, CATEGORY_PROPERTIES
+        )
+        characters_changed = sync_property_list(
+            scene.character_list, cache_service.get_cached_character_list(), CHARACTER_KEY, CHARACTER_FIELDS,
+            CHARACTER_PROPERTIES
+        )
+    finally:
+        hydrating_catalog = False
+    scene.quickspawn_catalog_fingerprint = fingerprint
+    CatalogIndex().invalidate()
+    SearchIndex().mark_stale()
+    schedule_search_index()
+    logger.info("Updated %d categories and %d characters", categories_changed, characters_changed)
+    return True
+
 # this is called when the file is loaded: from the cache, write the data to the scene's lists
 @persistent
 def load_quickspawn_data(dummy):
-    print("Starting load_quickspawn_data")
-    cache_service = CacheService()
-    
-    # Clear OLD!
-    bpy.context.scene.category_list.clear()
-    bpy.context.scene.character_list.clear()
-    print(f"Cleared lists. Category count: {len(bpy.context.scene.category_list)}, Character count: {len(bpy.context.scene.character_list)}")
-    
-    # Load categories
-    cached_categories = cache_service.get_cached_category_list()
-    for cat_data in cached_categories:
-        category = bpy.context.scene.category_list.add()
-        category.name = cat_data["name"]
-        category.is_expanded = cat_data["is_expanded"]
-        category.generate_override = cat_data.get("generate_override", True)  # Default to True if not found
-    
-    # Load characters
-    cached_characters = cache_service.get_cached_character_list()
-    for char_data in cached_characters:
-        character = bpy.context.scene.character_list.add()
-        character.name = char_data["name"]
-        character.filepath = char_data["filepath"]
-        character.collection = char_data["collection"]
-        character.category = char_data["category"]
-
-    print(f"Final counts - Categories: {len(bpy.context.scene.category_list)}, Characters: {len(bpy.context.scene.character_list)}")
\ No newline at end of file
+    logger.debug("Starting load_quickspawn_data")
+
+    # spawns queued against the previous file have nothing to land in anymore, same for warm templates
+    SpawnQueue().clear()
+    TemplatePool().clear()
+    LibraryRegistry().invalidate()
+    LoadedTexts().clear()
+
+    hydrate_scene(bpy.context.scene)
+    # a new file can reuse the old scene's pointer
+    CatalogIndex().invalidate()
+    SearchIndex().invalidate()
+    schedule_search_index()
+
+    # relative library paths point somewhere else now
+    if library_health:
+        library_health.clear()
+    if thumbnail_cache:
+        thumbnail_cache.forget_paths()
+    check_library_health()
+    # expanded categories of the new file get read ahead when the panel first draws them
+    prefetched_categories.clear()
+
+    # refresh watch folders in the background; unchanged files come straight from the library index
+    for category in bpy.context.scene.category_list:
+        start_watch_folder_scan(category)
+
+    logger.debug(
+        "Final counts - Categories: %d, Characters: %d",
+        len(bpy.context.scene.category_list), len(bpy.context.scene.character_list)
+    )
\ No newline at end of file
@@ -0,0 +1,304 @@
+# reads just enough of a .blend to list what's inside (collections, linked libraries, version) without blender.
+# the BHead stream is walked through mmap so only the block headers and the few blocks we look at get paged in.
+# nothing in here touches bpy
+import gzip
+import mmap
+import os
+import struct
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 2 letter ID codes as they appear in the BHead stream. collections still use their old "group" code
+ID_CODE_COLLECTION = b"GR\x00\x00"
+ID_CODE_LIBRARY = b"LI\x00\x00"
+CODE_DNA = b"DNA1"
+CODE_THUMBNAIL = b"TEST"
+CODE_GLOBAL = b"GLOB"
+CODE_END = b"ENDB"
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+class BlendFileError(Exception):
+    pass
+
+# what reading a truncated or corrupt file (or compressed stream) can end in
+CORRUPT_FILE_ERRORS = (BlendFileError, struct.error, EOFError, zlib.error, gzip.BadGzipFile, ValueError, IndexError, KeyError)
+if zstandard is not None:
+    CORRUPT_FILE_ERRORS += (zstandard.ZstdError,)
+
+# one block header. offset is where the block's data starts
+class BHead:
+    __slots__ = ("code", "size", "sdna_index", "count", "offset")
+
+    def __init__(self, code, size, sdna_index, count, offset):
+        self.code = code
+        self.size = size
+        self.sdna_index = sdna_index
+        self.count = count
+        self.offset = offset
+
+# the struct layout table (DNA1 block), only what's needed to find field offsets
+class SDNA:
+    def __init__(self, names, types, type_lengths, structs, pointer_size):
+        self.names = names
+        self.types = types
+        self.type_lengths = type_lengths
+        self.type_indices = {name: index for index, name in enumerate(types)}
+        # struct name -> [(type name, field name)]
+        self.structs = structs
+        self.pointer_size = pointer_size
+
+    def field_size(self, type_name, field_name):
+        if field_name.startswith("*") or field_name.startswith("(*"):
+            size = self.pointer_size
+        else:
+            size = self.type_lengths[self.type_indices[type_name]]
+        for dimension in field_name.split("[")[1:]:
+            size *= int(dimension.split("]")[0])
+        return size
+
+    # byte offset of a field inside a struct, matched on the bare field name (no *, no [n])
+    def field_offset(self, struct_name, field):
+        offset = 0
+        for type_name, field_name in self.structs[struct_name]:
+            if field_name.lstrip("*").split("[")[0] == field:
+                return offset, self.field_size(type_name, field_name)
+            offset += self.field_size(type_name, field_name)
+        raise BlendFileError(f"{struct_name}.{field} not found in SDNA")
+
+class BlendFile:
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.compression = None
+        self._file = None
+        self._mmap = None
+        self._sdna = None
+        self._blocks_by_code = None
+        try:
+            self.data = self.open_data()
+            self.read_header()
+        except Exception:
+            self.close()
+            raise
+
+    def open_data(self):
+        self._file = open(self.filepath, "rb")
+        magic = self._file.read(4)
+        self._file.seek(0)
+        if magic[:2] == GZIP_MAGIC:
+            # compressed files can't be mapped, decompress them into memory instead
+            self.compression = "gzip"
+            with gzip.GzipFile(fileobj=self._file) as stream:
+                return stream.read()
+        if magic == ZSTD_MAGIC:
+            self.compression = "zstd"
+            if zstandard is None:
+                raise BlendFileError(f"{self.filepath} is zstd compressed and the zstandard module isn't installed")
+            with zstandard.ZstdDecompressor().stream_reader(self._file) as stream:
+                return stream.read()
+        if os.fstat(self._file.fileno()).st_size == 0:
+            raise BlendFileError(f"{self.filepath} is empty")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # BLENDER_v303 (pointer size, endianness, version), or since 5.0 BLENDER17-01v0500 (header size, format version)
+    def read_header(self):
+        header = bytes(self.data[:17])
+        if header[:7] != b"BLENDER":
+            raise BlendFileError(f"{self.filepath} is not a .blend file")
+        if header[7:9].isdigit():
+            self.header_size = int(header[7:9])
+            self.format_version = int(header[10:12])
+            self.pointer_size = 8
+            endian = header[12:13]
+            self.version = int(header[13:17])
+        else:
+            self.header_size = 12
+            self.format_version = 0
+            self.pointer_size = 8 if header[7:8] == b"-" else 4
+            endian = header[8:9]
+            self.version = int(header[9:12])
+        self.endian = "<" if endian == b"v" else ">"
+
+        if self.format_version == 0:
+            pointer = "Q" if self.pointer_size == 8 else "I"
+            self._bhead = struct.Struct(self.endian + "4si" + pointer + "ii")
+        else:
+            self._bhead = struct.Struct(self.endian + "4siQqq")
+
+    # (major, minor), e.g. (3, 3) for a file saved by blender 3.3
+    @property
+    def version_tuple(self):
+        return divmod(self.version, 100)
+
+    def blocks(self):
+        offset = self.header_size
+        end = len(self.data)
+        while offset + self._bhead.size <= end:
+            if self.format_version == 0:
+                code, size, _old, sdna_index, count = self._bhead.unpack_from(self.data, offset)
+            else:
+                code, sdna_index, _old, size, count = self._bhead.unpack_from(self.data, offset)
+            offset += self._bhead.size
+            block = BHead(code, size, sdna_index, count, offset)
+            if code == CODE_END:
+                return
+            if size < 0 or offset + size > end:
+                raise BlendFileError(f"{self.filepath} is truncated, {code!r} block runs past the end")
+            yield block
+            offset += size
+        raise BlendFileError(f"{self.filepath} is truncated, no ENDB block")
+
+    # every block header grouped by code, from a single walk of the file
+    def blocks_by_code(self, code):
+        if self._blocks_by_code is None:
+            self._blocks_by_code = {}
+            for block in self.blocks():
+                self._blocks_by_code.setdefault(block.code, []).append(block)
+        return self._blocks_by_code.get(code, [])
+
+    @property
+    def sdna(self):
+        if self._sdna is None:
+            blocks = self.blocks_by_code(CODE_DNA)
+            if not blocks:
+                raise BlendFileError(f"{self.filepath} has no DNA1 block")
+            self._sdna = self.read_sdna(blocks[0])
+        return self._sdna
+
+    def read_sdna(self, block):
+        data = bytes(self.data[block.offset:block.offset + block.size])
+        position = 0
+
+        def expect(tag):
+            nonlocal position
+            if data[position:position + 4] != tag:
+                raise BlendFileError(f"{self.filepath}: corrupt DNA1 block, expected {tag!r}")
+            position += 4
+
+        def read_int():
+            nonlocal position
+            value = struct.unpack_from(self.endian + "i", data, position)[0]
+            position += 4
+            return value
+
+        def read_strings(count):
+            nonlocal position
+            strings = []
+            for _ in range(count):
+                end = data.index(b"\x00", position)
+                strings.append(data[position:end].decode("utf-8", "replace"))
+                position = end + 1
+            return strings
+
+        def align():
+            nonlocal position
+            position = (position + 3) & ~3
+
+        expect(b"SDNA")
+        expect(b"NAME")
+        names = read_strings(read_int())
+        align()
+        expect(b"TYPE")
+        types = read_strings(read_int())
+        align()
+        expect(b"TLEN")
+        type_lengths = struct.unpack_from(self.endian + f"{len(types)}h", data, position)
+        position += 2 * len(types)
+        align()
+        expect(b"STRC")
+        structs = {}
+        for _ in range(read_int()):
+            type_index, field_count = struct.unpack_from(self.endian + "hh", data, position)
+            position += 4
+            fields = struct.unpack_from(self.endian + f"{field_count * 2}h", data, position)
+            position += 4 * field_count
+            structs[types[type_index]] = [(types[fields[i]], names[fields[i + 1]]) for i in range(0, len(fields), 2)]
+        return SDNA(names, types, list(type_lengths), structs, self.pointer_size)
+
+    def read_string(self, offset, size):
+        raw = bytes(self.data[offset:offset + size])
+        return raw.split(b"\x00", 1)[0].decode("utf-8", "replace")
+
+    # names of every block with the given ID code, without the 2 letter prefix
+    def id_names(self, code):
+        name_offset, name_size = self.sdna.field_offset("ID", "name")
+        return [self.read_string(block.offset + name_offset, name_size)[2:]
+                for block in self.blocks_by_code(code)]
+
+    def collections(self):
+        return self.id_names(ID_CODE_COLLECTION)
+
+    # file paths of the libraries this file links from, as stored (usually // relative)
+    def libraries(self):
+        sdna = self.sdna
+        try:
+            path_offset, path_size = sdna.field_offset("Library", "filepath")
+        except BlendFileError:
+            # older files called it name
+            path_offset, path_size = sdna.field_offset("Library", "name")
+        return [self.read_string(block.offset + path_offset, path_size)
+                for block in self.blocks_by_code(ID_CODE_LIBRARY)]
+
+    # the file's embedded thumbnail as (width, height, RGBA bytes, bottom row first), or None if it was saved without one.
+    # it's written right after the header, before GLOB, so only the first few block headers are looked at
+    def thumbnail(self):
+        for block in self.blocks():
+            if block.code == CODE_THUMBNAIL:
+                width, height = struct.unpack_from(self.endian + "ii", self.data, block.offset)
+                size = width * height * 4
+                if width <= 0 or height <= 0 or size + 8 > block.size:
+                    return None
+                return width, height, bytes(self.data[block.offset + 8:block.offset + 8 + size])
+            if block.code in (CODE_GLOBAL, CODE_DNA):
+                return None
+        return None
+
+# what QuickSpawn wants to know about a library, read in one go
+class BlendFileInfo:
+    def __init__(self, filepath, version, compression, collections, libraries):
+        self.filepath = filepath
+        self.version = version
+        self.compression = compression
+        self.collections = collections
+        self.libraries = libraries
+
+# the readers below give None for a truncated or corrupt file instead of raising. one that can't be opened still raises OSError
+def read_blend(filepath, read):
+    try:
+        with BlendFile(filepath) as blend:
+            return read(blend)
+    except CORRUPT_FILE_ERRORS:
+        return None
+
+def read_blend_info(filepath):
+    return read_blend(filepath, lambda blend: BlendFileInfo(
+        filepath, blend.version_tuple, blend.compression, blend.collections(), blend.libraries()
+    ))
+
+def list_collections(filepath):
+    return read_blend(filepath, BlendFile.collections)
+
+# also None for a file saved without a thumbnail
+def read_thumbnail(filepath):
+    return read_blend(filepath, BlendFile.thumbnail)
@@ -0,0 +1,96 @@
+# view model for the panel: category -> [(index, collection name)] sorted by collection name.
+# built once from scene.character_list and thrown away only when the list changes, so a redraw doesn't rescan the whole list
+class CatalogIndex:
+    # one grouping per scene, keyed by scene pointer; shared by every CatalogIndex()
+    _groups = {}
+    # scene -> {(category, lowered collection name)}, for duplicate checks
+    _names = {}
+    # (scene, category) -> (filter string, flags, new order) for the panel's UILists
+    _filters = {}
+    # (scene, list name) -> {id: index}, so operators can find their category or entry without scanning the list
+    _ids = {}
+    # scene -> (list length, {character.filepath}), the distinct library directories, for the library health checks
+    _libraries = {}
+
+    # call whenever character_list gets items added, removed or cleared
+    def invalidate(self):
+        CatalogIndex._groups.clear()
+        CatalogIndex._names.clear()
+        CatalogIndex._filters.clear()
+        CatalogIndex._ids.clear()
+        CatalogIndex._libraries.clear()
+
+    def build(self, character_list):
+        groups = {}
+        for index, character in enumerate(character_list):
+            groups.setdefault(character.category, []).append((index, character.collection))
+        for rows in groups.values():
+            rows.sort(key=lambda row: row[1].lower())
+        return groups
+
+    # rows for one category. the length check is a cheap guard in case the list changed behind our back
+    def get_category(self, scene_key, character_list, category_name):
+        cached = CatalogIndex._groups.get(scene_key)
+        if cached is None or cached[0] != len(character_list):
+            cached = (len(character_list), self.build(character_list))
+            CatalogIndex._groups[scene_key] = cached
+            CatalogIndex._names.pop(scene_key, None)
+            CatalogIndex._filters.clear()
+        return cached[1].get(category_name, ())
+
+    # is there already an entry for this collection in the category (names compared case insensitively)
+    def has_collection(self, scene_key, character_list, category_name, collection_name):
+        self.get_category(scene_key, character_list, category_name)
+        names = CatalogIndex._names.get(scene_key)
+        if names is None:
+            names = {
+                (category, collection.lower())
+                for category, rows in CatalogIndex._groups[scene_key][1].items() for index, collection in rows
+            }
+            CatalogIndex._names[scene_key] = names
+        return (category_name, collection_name.lower()) in names
+
+    # where the item with this id sits in items (category_list or character_list), or None. the hit is checked against the
+    # list itself, so a map that missed a change gets rebuilt instead of pointing at the wrong item
+    def find(self, scene_key, list_name, items, item_id):
+        ids = CatalogIndex._ids.get((scene_key, list_name))
+        index = ids.get(item_id) if ids is not None else None
+        if index is not None and index < len(items) and items[index].id == item_id:
+            return index
+        ids = {item.id: index for index, item in enumerate(items)}
+        CatalogIndex._ids[(scene_key, list_name)] = ids
+        return ids.get(item_id)
+
+    def get_libraries(self, scene_key, character_list):
+        cached = CatalogIndex._libraries.get(scene_key)
+        if cached is None or cached[0] != len(character_list):
+            cached = (len(character_list), {character.filepath for character in character_list})
+            CatalogIndex._libraries[scene_key] = cached
+        return cached[1]
+
+    # UIList.filter_items result for one category: flags marks the category's rows that match the filter,
+    # new order puts them first in collection name order. the filter string is lowered once and the result is kept until it changes
+    def get_filter(self, scene_key, character_list, category_name, filter_name, bitflag):
+        rows = self.get_category(scene_key, character_list, category_name)
+        needle = filter_name.lower()
+        cached = CatalogIndex._filters.get((scene_key, category_name))
+        if cached is not None and cached[0] == needle:
+            return cached[1], cached[2]
+
+        total = len(character_list)
+        flags = [0] * total
+        new_order = [0] * total
+        position = 0
+        for index, collection in rows:
+            if needle in collection.lower():
+                flags[index] = bitflag
+                new_order[index] = position
+                position += 1
+        # everything filtered out still needs a slot so new order stays a permutation
+        for index in range(total):
+            if not flags[index]:
+                new_order[index] = position
+                position += 1
+
+        CatalogIndex._filters[(scene_key, category_name)] = (needle, flags, new_order)
+        return flags, new_order
@@ -0,0 +1,203 @@
+# loads catalog entries through bpy.data.libraries.load, which hands back the loaded IDs directly,
+# instead of going through bpy.ops.wm.append/link and diffing bpy.data before and after
+import os
+from collections import OrderedDict
+
+import bpy
+
+# character.filepath is the file browser's directory inside the .blend, e.g. /assets/hero.blend/Collection/
+def library_filepath(directory):
+    return os.path.dirname(directory.rstrip("/\\"))
+
+# one spelling per file on disk: absolute, symlinks resolved, case folded where the filesystem does
+def normalize_library_path(filepath):
+    return os.path.normcase(os.path.realpath(bpy.path.abspath(filepath)))
+
+# normalized path -> name of the Library datablock already loaded from it. the same .blend reached through a different
+# spelling (relative vs absolute, a symlinked mount) would otherwise become a second Library and duplicate all its linked data.
+# shared by every LibraryRegistry(), rebuilt whenever bpy.data.libraries changes size or a lookup goes stale
+class LibraryRegistry:
+    _libraries = {}
+    _count = -1
+
+    def invalidate(self):
+        LibraryRegistry._libraries = {}
+        LibraryRegistry._count = -1
+
+    def rebuild(self):
+        LibraryRegistry._libraries = {
+            normalize_library_path(library.filepath): library.name for library in bpy.data.libraries
+        }
+        LibraryRegistry._count = len(bpy.data.libraries)
+
+    def find(self, filepath):
+        if LibraryRegistry._count != len(bpy.data.libraries):
+            self.rebuild()
+        key = normalize_library_path(filepath)
+        name = LibraryRegistry._libraries.get(key)
+        library = bpy.data.libraries.get(name) if name else None
+        # renamed or swapped since the last rebuild
+        if name and (library is None or normalize_library_path(library.filepath) != key):
+            self.rebuild()
+            name = LibraryRegistry._libraries.get(key)
+            library = bpy.data.libraries.get(name) if name else None
+        return library
+
+def id_key(id_data):
+    return (id_data.name, id_data.library.filepath if id_data.library is not None else None)
+
+# loaded collection -> the rig ui texts (*_ui.py) that showed up in bpy.data with it, the way spawns used to find them before
+# loaded_ids read them off custom properties. kept as the fallback for rigs whose armature doesn't point at its ui text.
+# shared by every LoadedTexts(), only the most recent loads are remembered
+class LoadedTexts:
+    _texts = OrderedDict()
+    limit = 64
+
+    def record(self, collections, texts):
+        keys = [id_key(text) for text in texts if "_ui.py" in text.name]
+        for collection in collections:
+            key = id_key(collection)
+            LoadedTexts._texts[key] = keys
+            LoadedTexts._texts.move_to_end(key)
+        while len(LoadedTexts._texts) > LoadedTexts.limit:
+            LoadedTexts._texts.popitem(last=False)
+
+    # texts loaded along with collection, or with the linked collection it overrides. ones removed since are skipped
+    def get(self, collection):
+        override = collection.override_library
+        if override is not None and override.reference is not None:
+            collection = override.reference
+        texts = set()
+        for key in LoadedTexts._texts.get(id_key(collection), ()):
+            text = bpy.data.texts.get(key)
+            if text is not None:
+                texts.add(text)
+        return texts
+
+    def clear(self):
+        LoadedTexts._texts = OrderedDict()
+
+# load (append or link) the named collections from one .blend in a single library read. returns name -> collection
+def load_collections(directory, collection_names, link):
+    filepath = library_filepath(directory)
+    if link:
+        # link through the path the library was first loaded with, so blender reuses it instead of adding a duplicate
+        library = LibraryRegistry().find(filepath)
+        if library is not None:
+            filepath = library.filepath
+    initial_texts = set(bpy.data.texts)
+    with bpy.data.libraries.load(filepath, link=link) as (data_from, data_to):
+        missing = [name for name in collection_names if name not in data_from.collections]
+        if missing:
+            raise KeyError(f"{', '.join(missing)} not found in {filepath}")
+        data_to.collections = list(collection_names)
+    loaded = dict(zip(collection_names, data_to.collections))
+    if any(collection is None for collection in loaded.values()):
+        raise RuntimeError(f"Could not load {', '.join(name for name, coll in loaded.items() if coll is None)} from {filepath}")
+    LoadedTexts().record(loaded.values(), set(bpy.data.texts) - initial_texts)
+    return loaded
+
+def load_collection(directory, collection_name, link):
+    return load_collections(directory, [collection_name], link)[collection_name]
+
+# linked collections: whatever is already linked from that library is reused, only the rest gets loaded (and the library is
+# not even opened when everything is there)
+def get_linked_collections(directory, collection_names):
+    library = LibraryRegistry().find(library_filepath(directory))
+    found = {}
+    if library is not None:
+        for name in collection_names:
+            collection = bpy.data.collections.get((name, library.filepath))
+            if collection is not None:
+                found[name] = collection
+    missing = [name for name in collection_names if name not in found]
+    if missing:
+        found.update(load_collections(directory, missing, link=True))
+    return found
+
+def get_linked_collection(directory, collection_name):
+    return get_linked_collections(directory, [collection_name])[collection_name]
+
+def deselect_all(context):
+    for obj in context.selected_objects:
+        obj.select_set(False)
+
+# appended: put the collection under the active collection and select what came with it, like wm.append does
+def add_collection_to_scene(context, collection, deselect=True):
+    context.view_layer.active_layer_collection.collection.children.link(collection)
+    if deselect:
+        deselect_all(context)
+    for obj in collection.all_objects:
+        if obj.name in context.view_layer.objects:
+            obj.select_set(True)
+
+# linked: an empty instancing the collection at the 3d cursor, selected and active, like wm.link does
+def instance_collection(context, collection, deselect=True):
+    instance = bpy.data.objects.new(collection.name, None)
+    instance.instance_type = 'COLLECTION'
+    instance.instance_collection = collection
+    instance.location = context.scene.cursor.location
+    context.view_layer.active_layer_collection.collection.objects.link(instance)
+    if deselect:
+        deselect_all(context)
+    instance.select_set(True)
+    context.view_layer.objects.active = instance
+    return instance
+
+# collection -> every LayerCollection showing it in the view layer, from a single walk of the layer tree.
+# built once per spawn (or batch) instead of searching from the root for every collection
+def layer_collection_index(view_layer):
+    index = {}
+    stack = [view_layer.layer_collection]
+    while stack:
+        layer_collection = stack.pop()
+        index.setdefault(layer_collection.collection, []).append(layer_collection)
+        stack.extend(layer_collection.children)
+    return index
+
+# turn each linked instance empty into a library override hierarchy of just that collection, without the operator and
+# without looking at anything else in the scene. returns the override collections in the same order
+def override_instances(context, instances):
+    overrides = []
+    for instance in instances:
+        linked = instance.instance_collection
+        # the instance tells blender which collections to put the override in
+        override = linked.override_hierarchy_create(context.scene, context.view_layer, reference=instance)
+        # same as make_override_library: the override replaces the instance empty
+        bpy.data.objects.remove(instance)
+        overrides.append(override)
+    return overrides
+
+# make an object of a fresh override hierarchy editable (e.g. a light direction control), overriding it first if it's
+# still plain linked data
+def make_editable_override(obj):
+    if obj.override_library is not None:
+        obj.override_library.is_system_override = False
+        return obj
+    if obj.library is not None:
+        return obj.override_create(remap_local_usages=True)
+    return obj
+
+# text datablocks (e.g. rigify's rig ui script) that an ID points at through its custom properties
+def referenced_texts(id_data):
+    texts = set()
+    for key in id_data.keys():
+        value = id_data[key]
+        if isinstance(value, bpy.types.Text):
+            texts.add(value)
+    return texts
+
+# collections, texts and armatures that came in with a spawned collection, worked out from the collection itself
+def loaded_ids(collection):
+    collections = [collection] + list(collection.children_recursive)
+    armatures = set()
+    texts = set()
+    for obj in collection.all_objects:
+        if obj.type == 'ARMATURE':
+            armatures.add(obj.data)
+            texts |= referenced_texts(obj)
+            texts |= referenced_texts(obj.data)
+    # nothing points at a ui text: fall back to the ones that were loaded with the collection
+    if armatures and not texts:
+        texts = LoadedTexts().get(collection)
+    return collections, texts, armatures
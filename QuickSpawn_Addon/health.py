@@ -0,0 +1,97 @@
+# library health: every distinct library file in the catalog gets stat'ed on worker threads on a schedule, and the result
+# (exists, size, mtime) is cached so the panel and the spawn operators can look it up without touching the disk.
+# a stat on an offline network share can hang for a long time, but it only ever holds up a worker. nothing in here touches bpy
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HEALTH_WORKERS = 4
+
+LIBRARY_OK = 'OK'
+LIBRARY_MISSING = 'MISSING'
+# there, but not the size or modification time it had when first checked this session
+LIBRARY_CHANGED = 'CHANGED'
+
+class LibraryStatus:
+    __slots__ = ("exists", "size", "mtime", "checked", "state")
+
+    def __init__(self, exists, size, mtime, checked, state):
+        self.exists = exists
+        self.size = size
+        self.mtime = mtime
+        # time.time() of the stat
+        self.checked = checked
+        self.state = state
+
+class LibraryHealth:
+    def __init__(self, max_workers=HEALTH_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="quickspawn-health")
+        self._done = queue.SimpleQueue()
+        # everything below is only touched on the main thread. library path as stored -> LibraryStatus
+        self._status = {}
+        # (size, mtime) a library had the first time it was found this session
+        self._baseline = {}
+        self._in_flight = set()
+        # bumped by clear(), so stats that were already running when it happened are dropped
+        self._generation = 0
+
+    # queue a stat of every (key, absolute path) that isn't being checked already
+    def check(self, libraries):
+        for key, path in libraries:
+            if key in self._in_flight:
+                continue
+            self._in_flight.add(key)
+            self._pool.submit(self.stat, key, path, self._generation)
+
+    # worker thread
+    def stat(self, key, path, generation):
+        try:
+            stat = os.stat(path)
+            result = (True, stat.st_size, stat.st_mtime)
+        except OSError:
+            result = (False, 0, 0.0)
+        self._done.put((generation, key, result, time.time()))
+
+    # main thread: take in the finished stats. returns True if a library's state changed
+    def collect(self):
+        changed = False
+        while True:
+            try:
+                generation, key, (exists, size, mtime), checked = self._done.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self._generation:
+                continue
+            self._in_flight.discard(key)
+            if not exists:
+                state = LIBRARY_MISSING
+            elif self._baseline.setdefault(key, (size, mtime)) == (size, mtime):
+                state = LIBRARY_OK
+            else:
+                state = LIBRARY_CHANGED
+            old = self._status.get(key)
+            changed = changed or old is None or old.state != state
+            self._status[key] = LibraryStatus(exists, size, mtime, checked, state)
+        return changed
+
+    def pending(self):
+        return bool(self._in_flight)
+
+    # cached status of a library, None until its first check finished
+    def status(self, key):
+        return self._status.get(key)
+
+    def state(self, key):
+        status = self._status.get(key)
+        return status.state if status is not None else None
+
+    # a different file is open, relative paths mean something else now
+    def clear(self):
+        self._generation += 1
+        self._status = {}
+        self._baseline = {}
+        self._in_flight = set()
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
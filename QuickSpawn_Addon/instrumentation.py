@@ -0,0 +1,84 @@
+# where spawn time goes: each spawn is timed phase by phase, and the last few spawns of every entry are kept for the
+# panel's Stats subpanel. nothing in here touches bpy
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+PHASE_LOAD = 'LOAD'
+PHASE_OVERRIDE = 'OVERRIDE'
+PHASE_DETECT = 'DETECT'
+PHASE_EXCLUDE = 'EXCLUDE'
+PHASE_RIG_SCRIPT = 'RIG_SCRIPT'
+
+PHASE_LABELS = {
+    PHASE_LOAD: "Load",
+    PHASE_OVERRIDE: "Override",
+    PHASE_DETECT: "Find rig",
+    PHASE_EXCLUDE: "Exclude collections",
+    PHASE_RIG_SCRIPT: "Rig script",
+}
+
+# spawns kept per entry, and entries kept before the least recently spawned one is dropped
+SPAWN_HISTORY_LENGTH = 10
+SPAWN_HISTORY_ENTRIES = 50
+
+def entry_key(character):
+    return (character.category, character.collection, character.filepath)
+
+# one spawn: seconds per phase, in the order they ran. a queued spawn's phases run on different ticks, so the total is
+# their sum rather than the wall clock time
+class SpawnTimer:
+    def __init__(self, key, name, action=""):
+        self.key = key
+        self.name = name
+        self.action = action
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[phase] = self.phases.get(phase, 0.0) + time.perf_counter() - start
+
+    @property
+    def total(self):
+        return sum(self.phases.values())
+
+    def describe(self):
+        return ", ".join(f"{PHASE_LABELS[phase]} {seconds * 1000:.1f} ms" for phase, seconds in self.phases.items())
+
+# entry key -> its last few SpawnTimers, oldest first. shared by every SpawnStats()
+class SpawnStats:
+    _history = OrderedDict()
+
+    def record(self, timer):
+        runs = SpawnStats._history.get(timer.key)
+        if runs is None:
+            runs = SpawnStats._history[timer.key] = deque(maxlen=SPAWN_HISTORY_LENGTH)
+        runs.append(timer)
+        SpawnStats._history.move_to_end(timer.key)
+        while len(SpawnStats._history) > SPAWN_HISTORY_ENTRIES:
+            SpawnStats._history.popitem(last=False)
+
+    # [(last spawn, its history)], most recently spawned entry first
+    def recent(self, limit):
+        entries = []
+        for key in reversed(SpawnStats._history):
+            runs = SpawnStats._history[key]
+            entries.append((runs[-1], runs))
+            if len(entries) == limit:
+                break
+        return entries
+
+    # phase -> average seconds over an entry's history, for the phases any of its spawns had
+    def averages(self, runs):
+        totals = {}
+        for timer in runs:
+            for phase, seconds in timer.phases.items():
+                totals[phase] = totals.get(phase, 0.0) + seconds
+        return {phase: seconds / len(runs) for phase, seconds in totals.items()}
+
+    def clear(self):
+        SpawnStats._history.clear()
@@ -0,0 +1,18 @@
+# the addon's logger. quiet by default: only warnings and errors get through until the preference turns it up.
+# nothing in here touches bpy
+import logging
+
+LOG_LEVELS = ('WARNING', 'INFO', 'DEBUG')
+DEFAULT_LOG_LEVEL = 'WARNING'
+
+logger = logging.getLogger("quickspawn")
+logger.setLevel(DEFAULT_LOG_LEVEL)
+# its own handler so the output looks the same whatever else configured logging in blender; only one across addon reloads
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("QuickSpawn %(levelname)s: %(message)s"))
+    logger.addHandler(handler)
+    logger.propagate = False
+
+def set_log_level(level):
+    logger.setLevel(level if level in LOG_LEVELS else DEFAULT_LOG_LEVEL)
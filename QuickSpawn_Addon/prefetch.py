@@ -0,0 +1,131 @@
+# warms the os page cache with a category's library files once it's expanded, so the first spawn from a library on a slow
+# share doesn't wait on cold reads. files are read start to end in big chunks on low priority worker threads, up to a byte
+# budget. nothing in here touches bpy
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+PREFETCH_WORKERS = 2
+PREFETCH_CHUNK_BYTES = 8 * 1024 * 1024
+DEFAULT_PREFETCH_BUDGET_MB = 512
+# niceness of the worker threads, where the os lets a thread have its own
+PREFETCH_NICENESS = 10
+
+# lower the calling thread's cpu priority. linux applies setpriority to a single thread when given its id
+def lower_thread_priority():
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), PREFETCH_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+# what got warmed and whether it paid off: the first load of each library this session counts as a hit if its prefetch had
+# finished, late if it was still running, and a miss otherwise. shared by every PrefetchStats(), workers update it too
+class PrefetchStats:
+    _lock = threading.Lock()
+    # absolute library path -> bytes read into the cache, and libraries queued but not done yet
+    _warmed = {}
+    _queued = set()
+    # libraries whose first load was already counted
+    _loaded = set()
+    spent_bytes = 0
+    over_budget = 0
+    hits = 0
+    late = 0
+    misses = 0
+    # seconds the counted loads took, to compare warm and cold ones
+    hit_seconds = 0.0
+    miss_seconds = 0.0
+
+    def is_known(self, library):
+        with PrefetchStats._lock:
+            return library in PrefetchStats._warmed or library in PrefetchStats._queued
+
+    def queued(self, library):
+        with PrefetchStats._lock:
+            PrefetchStats._queued.add(library)
+
+    # reserve a file's size from the budget before reading it. False if it doesn't fit
+    def reserve(self, library, size, budget_bytes):
+        with PrefetchStats._lock:
+            if PrefetchStats.spent_bytes + size > budget_bytes:
+                PrefetchStats._queued.discard(library)
+                PrefetchStats.over_budget += 1
+                return False
+            PrefetchStats.spent_bytes += size
+            return True
+
+    def finished(self, library, read_bytes):
+        with PrefetchStats._lock:
+            PrefetchStats._queued.discard(library)
+            if read_bytes is not None:
+                PrefetchStats._warmed[library] = read_bytes
+
+    # a spawn loaded from library in seconds
+    def record_load(self, library, seconds):
+        with PrefetchStats._lock:
+            if library in PrefetchStats._loaded:
+                return
+            PrefetchStats._loaded.add(library)
+            if library in PrefetchStats._warmed:
+                PrefetchStats.hits += 1
+                PrefetchStats.hit_seconds += seconds
+            elif library in PrefetchStats._queued:
+                PrefetchStats.late += 1
+            else:
+                PrefetchStats.misses += 1
+                PrefetchStats.miss_seconds += seconds
+
+    def warmed_bytes(self):
+        with PrefetchStats._lock:
+            return sum(PrefetchStats._warmed.values())
+
+    def clear(self):
+        with PrefetchStats._lock:
+            PrefetchStats._warmed = {}
+            PrefetchStats._queued = set()
+            PrefetchStats._loaded = set()
+            PrefetchStats.spent_bytes = 0
+            PrefetchStats.over_budget = 0
+            PrefetchStats.hits = PrefetchStats.late = PrefetchStats.misses = 0
+            PrefetchStats.hit_seconds = PrefetchStats.miss_seconds = 0.0
+
+class LibraryPrefetcher:
+    def __init__(self, max_workers=PREFETCH_WORKERS):
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="quickspawn-prefetch", initializer=lower_thread_priority
+        )
+
+    # queue the absolute library paths that weren't warmed or queued yet. budget_bytes caps the session's total
+    def prefetch(self, libraries, budget_bytes):
+        stats = PrefetchStats()
+        for library in libraries:
+            if budget_bytes <= 0 or stats.is_known(library):
+                continue
+            stats.queued(library)
+            self._pool.submit(self.warm, library, budget_bytes)
+
+    # worker thread: read the whole file sequentially into a reused buffer, which is what leaves it in the page cache
+    def warm(self, library, budget_bytes):
+        stats = PrefetchStats()
+        read_bytes = None
+        try:
+            with open(library, 'rb', buffering=0) as file:
+                if not stats.reserve(library, os.fstat(file.fileno()).st_size, budget_bytes):
+                    return
+                if hasattr(os, "posix_fadvise"):
+                    # a bigger readahead window for the reads below
+                    os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                buffer = bytearray(PREFETCH_CHUNK_BYTES)
+                read_bytes = 0
+                while True:
+                    count = file.readinto(buffer)
+                    if not count:
+                        break
+                    read_bytes += count
+        except OSError:
+            read_bytes = None
+        finally:
+            stats.finished(library, read_bytes)
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
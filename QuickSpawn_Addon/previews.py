@@ -0,0 +1,141 @@
+# preview icons for the panel, taken from each library's embedded thumbnail (the .blend TEST block).
+# extracted thumbnails are cached on disk and in memory keyed by file path + size + mtime; reading (and the stat that notices
+# a re-saved file) happens on worker threads and only the main thread touches bpy.utils.previews, so the panel never waits
+# on a thumbnail
+import os
+import hashlib
+import queue
+import struct
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+import bpy
+import bpy.utils.previews
+
+from .blendfile import read_thumbnail
+from .engine import normalize_library_path
+from .logs import logger
+from .utils import tag_redraw_view3d
+
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_POLL_INTERVAL = 0.2
+# how long an icon is shown before its file gets stat'ed again to see if it was re-saved
+THUMBNAIL_RECHECK_INTERVAL = 30.0
+
+class ThumbnailCache:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.previews = bpy.utils.previews.new()
+        # resolved blend path -> (icon id, cache key, time.monotonic() of the last check). icon id is 0 when the file has no
+        # thumbnail, the key is None when it couldn't be read
+        self._icons = {}
+        # paths with a fetch in flight
+        self._requested = set()
+        # library path as stored -> resolved path. relative ones depend on the open file, see forget_paths
+        self._paths = {}
+        self._done = queue.SimpleQueue()
+        self._pool = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix="quickspawn-thumbs")
+        # every self.poll is a new bound method, so the one handed to bpy.app.timers is kept to unregister it again
+        self._timer = self.poll
+        self._closed = False
+
+    # icon for a library, or 0 while it's still being fetched. only called for rows that are actually drawn.
+    # once it's older than THUMBNAIL_RECHECK_INTERVAL the file is checked again and keeps its icon until a new one is in
+    def icon_id(self, blend_path):
+        path = self._paths.get(blend_path)
+        if path is None:
+            path = self._paths[blend_path] = normalize_library_path(blend_path)
+        entry = self._icons.get(path)
+        if entry is not None and time.monotonic() - entry[2] < THUMBNAIL_RECHECK_INTERVAL:
+            return entry[0]
+        if path not in self._requested and not self._closed:
+            self._requested.add(path)
+            self._pool.submit(self.fetch, path, entry[1] if entry else None)
+            if not bpy.app.timers.is_registered(self._timer):
+                bpy.app.timers.register(self._timer, first_interval=THUMBNAIL_POLL_INTERVAL)
+        return entry[0] if entry else 0
+
+    # a different file is open, relative library paths mean something else now
+    def forget_paths(self):
+        self._paths.clear()
+
+    def cache_filepath(self, blend_path, stat):
+        key = hashlib.sha1(f"{blend_path}|{stat.st_size}|{stat.st_mtime}".encode("utf-8")).hexdigest()
+        return key, os.path.join(self.cache_dir, key + ".thumb")
+
+    # worker thread: nothing to do if the file is as it was (known_key), else disk cache first, otherwise pull it out of the
+    # .blend and cache it
+    def fetch(self, blend_path, known_key):
+        key = thumbnail = None
+        try:
+            key, cache_path = self.cache_filepath(blend_path, os.stat(blend_path))
+            if key == known_key:
+                self._done.put((blend_path, key, None, True))
+                return
+            thumbnail = self.read_cached(cache_path)
+            if thumbnail is None:
+                thumbnail = read_thumbnail(blend_path)
+                if thumbnail is not None:
+                    self.write_cached(cache_path, thumbnail)
+        except Exception as e:
+            logger.warning("Could not read thumbnail of %s: %s", blend_path, e)
+            key = None
+        self._done.put((blend_path, key, thumbnail, False))
+
+    def read_cached(self, cache_path):
+        try:
+            with open(cache_path, 'rb') as file:
+                data = file.read()
+        except OSError:
+            return None
+        width, height = struct.unpack_from("<ii", data)
+        if len(data) != 8 + width * height * 4:
+            return None
+        return width, height, data[8:]
+
+    def write_cached(self, cache_path, thumbnail):
+        width, height, pixels = thumbnail
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(struct.pack("<ii", width, height))
+            file.write(pixels)
+        os.replace(tmp_path, cache_path)
+
+    # main thread: turn fetched thumbnails into preview icons
+    def poll(self):
+        if self._closed:
+            return None
+        loaded = False
+        now = time.monotonic()
+        while True:
+            try:
+                blend_path, key, thumbnail, unchanged = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._requested.discard(blend_path)
+            if unchanged:
+                icon, key, checked = self._icons[blend_path]
+                self._icons[blend_path] = (icon, key, now)
+                continue
+            if thumbnail is None:
+                loaded = loaded or blend_path in self._icons
+                self._icons[blend_path] = (0, key, now)
+                continue
+            width, height, pixels = thumbnail
+            preview = self.previews.get(key) or self.previews.new(key)
+            preview.image_size = (width, height)
+            preview.image_pixels.foreach_set(array('i', pixels))
+            self._icons[blend_path] = (preview.icon_id, key, now)
+            loaded = True
+        if loaded:
+            tag_redraw_view3d()
+        return THUMBNAIL_POLL_INTERVAL if self._requested else None
+
+    def close(self):
+        self._closed = True
+        if bpy.app.timers.is_registered(self._timer):
+            bpy.app.timers.unregister(self._timer)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        bpy.utils.previews.remove(self.previews)
@@ -0,0 +1,146 @@
+# rig ui scripts (rigify's <rig>_ui.py) parsed once per distinct source text. the spots where the armature name and the
+# rig_id go are found once; after that a spawn only binds the new name/id, writes the text and runs the compiled code.
+# nothing in here touches bpy
+import ast
+import hashlib
+import io
+import re
+import tokenize
+from collections import OrderedDict
+
+RIG_TEMPLATE_LIMIT = 16
+
+RIG_ID_MARKER = 'rig_id = "'
+
+# the compiled template reads its rewritten string literals from this list, filled in per spawn
+BINDINGS_NAME = "__quickspawn_strings__"
+
+# unique per armature and file, but the same every time (hash() of a str changes between blender sessions)
+def make_rig_id(blend_filepath, armature_name):
+    return hashlib.sha1(f"{blend_filepath}|{armature_name}".encode("utf-8")).hexdigest()[:16]
+
+# the name a duplicated armature had before blender added .001 to it
+def base_armature_name(armature_name):
+    return armature_name.split(".")[0]
+
+class RigScriptTemplate:
+    def __init__(self, source, base_name, filename):
+        try:
+            self.rig_id = source.split(RIG_ID_MARKER)[1].split('"')[0]
+        except IndexError:
+            raise ValueError(f"{filename} has no rig_id")
+        self.base_name = base_name
+        self.filename = filename
+        targets = sorted({target for target in (base_name, self.rig_id) if target}, key=len, reverse=True)
+        self.pattern = re.compile("|".join(re.escape(target) for target in targets))
+        # the source cut at every substitution point: text, point, text, point, ..., text
+        self.segments = re.split(f"({self.pattern.pattern})", source)
+        self.code, self.strings = self.parameterize(source)
+
+    def bind(self, armature_name, rig_id):
+        return {self.base_name: armature_name, self.rig_id: rig_id}
+
+    # the patched script text, for the text datablock (it's what runs when the .blend is opened again)
+    def render(self, bindings):
+        return "".join(bindings.get(segment, segment) if i % 2 else segment for i, segment in enumerate(self.segments))
+
+    def substitute(self, text, bindings):
+        return self.pattern.sub(lambda match: bindings[match.group()], text)
+
+    # what text.run_script does, minus parsing the script again
+    def run(self, bindings, filename):
+        namespace = {"__name__": "__main__", "__file__": filename}
+        if self.code is None:
+            # the points couldn't all be turned into bindings, so this one gets compiled per spawn
+            code = compile(self.render(bindings), filename, "exec")
+        else:
+            namespace[BINDINGS_NAME] = [self.substitute(value, bindings) for value in self.strings]
+            code = self.code
+        exec(code, namespace)
+
+    # swap every string literal holding a substitution point for a lookup into BINDINGS_NAME and compile that once.
+    # returns (None, None) if a point shows up anywhere else (an identifier, an f-string, bytes)
+    def parameterize(self, source):
+        try:
+            tokens = list(tokenize.generate_tokens(io.StringIO(source).readline))
+        except (tokenize.TokenError, SyntaxError):
+            return None, None
+        line_starts = [0]
+        for line in io.StringIO(source).readlines():
+            line_starts.append(line_starts[-1] + len(line))
+
+        def offset(position):
+            return line_starts[position[0] - 1] + position[1]
+
+        # runs of adjacent string literals ("a" "b" is one string), and comments, which can keep their points
+        runs = []
+        comments = []
+        run = None
+        for token in tokens:
+            if token.type == tokenize.STRING:
+                if run is None:
+                    run = [offset(token.start), offset(token.end)]
+                else:
+                    run[1] = offset(token.end)
+                continue
+            if token.type == tokenize.COMMENT:
+                comments.append((offset(token.start), offset(token.end)))
+            if token.type in (tokenize.NL, tokenize.COMMENT):
+                continue
+            if run is not None:
+                runs.append(run)
+                run = None
+        if run is not None:
+            runs.append(run)
+
+        strings = []
+        replaced = []
+        for start, end in runs:
+            text = source[start:end]
+            if not self.pattern.search(text):
+                continue
+            try:
+                value = ast.literal_eval("(" + text + "\n)")
+            except (ValueError, SyntaxError):
+                return None, None
+            if not isinstance(value, str):
+                return None, None
+            replaced.append((start, end, len(strings)))
+            strings.append(value)
+
+        covered = [(start, end) for start, end, _ in replaced] + comments
+        for match in self.pattern.finditer(source):
+            if not any(start <= match.start() and match.end() <= end for start, end in covered):
+                return None, None
+
+        parts = []
+        position = 0
+        for start, end, index in replaced:
+            parts.append(source[position:start])
+            parts.append(f"({BINDINGS_NAME}[{index}])")
+            position = end
+        parts.append(source[position:])
+        try:
+            code = compile("".join(parts), self.filename, "exec")
+        except SyntaxError:
+            return None, None
+        return code, strings
+
+# (source hash, base armature name) -> RigScriptTemplate, least recently used dropped first. shared by every RigScriptCache()
+class RigScriptCache:
+    _templates = OrderedDict()
+
+    def get(self, source, base_name, filename):
+        key = (hashlib.sha1(source.encode("utf-8")).hexdigest(), base_name)
+        template = RigScriptCache._templates.get(key)
+        if template is None:
+            template = RigScriptTemplate(source, base_name, filename)
+            RigScriptCache._templates[key] = template
+            while len(RigScriptCache._templates) > RIG_TEMPLATE_LIMIT:
+                RigScriptCache._templates.popitem(last=False)
+        else:
+            RigScriptCache._templates.move_to_end(key)
+        return template
+
+    def clear(self):
+        RigScriptCache._templates.clear()
@@ -0,0 +1,116 @@
+# background scanning of folders full of .blend files for collections, for a category's watch folder.
+# results are kept in a persistent index keyed by (path, size, mtime) so unchanged files are never opened again.
+# nothing in here touches bpy; the addon polls the returned futures from a timer
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .blendfile import BlendFileError, list_collections
+from .logs import logger
+from .storage import atomic_write_json
+
+SCAN_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+
+# path -> {"size", "mtime", "collections"}, loaded once and written back after every scan that changed something
+class LibraryIndex:
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._entries = None
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def load(self):
+        try:
+            with open(self.filepath, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def entries(self):
+        if self._entries is None:
+            self._entries = self.load()
+        return self._entries
+
+    # cached collections for a file, or None if it changed (or was never scanned)
+    def get(self, path, size, mtime):
+        with self._lock:
+            entry = self.entries().get(path)
+        if entry and entry["size"] == size and entry["mtime"] == mtime:
+            return entry["collections"]
+        return None
+
+    def put(self, path, size, mtime, collections):
+        with self._lock:
+            self.entries()[path] = {"size": size, "mtime": mtime, "collections": collections}
+            self._dirty = True
+
+    # forget files that were under a scanned folder but aren't there anymore
+    def prune(self, folder, seen):
+        prefix = os.path.join(folder, "")
+        with self._lock:
+            stale = [path for path in self.entries() if path.startswith(prefix) and path not in seen]
+            for path in stale:
+                del self._entries[path]
+            self._dirty = self._dirty or bool(stale)
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self.entries())
+            self._dirty = False
+        atomic_write_json(self.filepath, snapshot)
+
+def find_blend_files(folder):
+    for root, dirs, files in os.walk(folder):
+        # skip hidden folders (.git, .svn, ...) and blender's backup files
+        dirs[:] = [name for name in dirs if not name.startswith(".")]
+        for name in files:
+            if name.lower().endswith(".blend"):
+                yield os.path.join(root, name)
+
+class LibraryScanner:
+    def __init__(self, index_filepath, max_workers=SCAN_WORKERS):
+        self.index = LibraryIndex(index_filepath)
+        # the walk runs on its own thread so it can wait on the readers without taking one of their slots
+        self._walker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quickspawn-walk")
+        self._readers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="quickspawn-scan")
+
+    # returns a future resolving to {blend path: [collection names]} for every .blend under folder
+    def scan(self, folder):
+        return self._walker.submit(self.scan_folder, os.path.abspath(folder))
+
+    def scan_folder(self, folder):
+        results = {}
+        pending = {}
+        for path in find_blend_files(folder):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            cached = self.index.get(path, stat.st_size, stat.st_mtime)
+            if cached is not None:
+                results[path] = cached
+            else:
+                pending[path] = (stat, self._readers.submit(list_collections, path))
+
+        for path, (stat, future) in pending.items():
+            try:
+                collections = future.result()
+                if collections is None:
+                    raise BlendFileError("truncated or not a .blend file")
+            except Exception as e:
+                # remembered as empty so a broken file isn't retried until it changes
+                logger.warning("Could not scan %s: %s", path, e)
+                collections = []
+            self.index.put(path, stat.st_size, stat.st_mtime, collections)
+            results[path] = collections
+
+        self.index.prune(folder, results)
+        self.index.save()
+        return results
+
+    def shutdown(self):
+        self._walker.shutdown(wait=False, cancel_futures=True)
+        self._readers.shutdown(wait=False, cancel_futures=True)
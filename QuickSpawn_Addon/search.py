@@ -0,0 +1,313 @@
+# fuzzy search over the catalog: every entry's collection name, library file name and category are broken into word
+# trigrams, and a query is ranked by how many of its trigrams an entry has. built a chunk at a time outside the panel's draw,
+# then kept up to date by the operators that add and remove entries and gone over again in place after undo, so typing in the
+# search field never rescans the catalog. nothing in here touches bpy
+import os
+import re
+
+SEARCH_RESULT_LIMIT = 20
+# share of the query's trigrams an entry needs to show up at all
+SEARCH_MIN_SCORE = 0.5
+# a posting turns into a bit mask once it has this many entries, or one in 256 of the catalog if that's more. about where a
+# set of doc ids starts taking more memory than the mask would
+SEARCH_DENSE_POSTING = 64
+
+WORD_SPLIT = re.compile(r"[\W_]+")
+
+def words(text):
+    return WORD_SPLIT.sub(" ", text.lower()).split()
+
+# " hero " -> " he", "her", "ero", "ro ". the padding makes word starts (and ends) count
+def word_trigrams(text_words):
+    grams = set()
+    for word in text_words:
+        padded = f" {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def text_trigrams(text):
+    return word_trigrams(words(text))
+
+# the last word of a query is usually still being typed, so it's only padded at the front
+def query_trigrams(query):
+    grams = set()
+    query_words = words(query)
+    for position, word in enumerate(query_words):
+        padded = f" {word} " if position < len(query_words) - 1 or query.endswith(" ") else f" {word}"
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def library_name(filepath):
+    return os.path.splitext(os.path.basename(os.path.dirname(filepath.rstrip("/\\"))))[0]
+
+# besides its collection name, an entry is found by the .blend it comes from and its category
+def context_trigrams(filepath, category):
+    return text_trigrams(library_name(filepath)) | text_trigrams(category)
+
+# doc ids as an int with those bits set, which is what a query is worked out on
+def doc_mask(docs):
+    if docs is None:
+        return 0
+    if isinstance(docs, int):
+        return docs
+    if not docs:
+        return 0
+    data = bytearray(max(docs) // 8 + 1)
+    for doc_id in docs:
+        data[doc_id >> 3] |= 1 << (doc_id & 7)
+    return int.from_bytes(data, "little")
+
+# the doc ids in a mask, lowest first
+def mask_docs(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+# the docs having a trigram (or name length, character, library...) are a set while they're few and a mask after that.
+# changes come in batches of key -> doc ids
+def post(postings, additions, dense_size):
+    for key, doc_ids in additions.items():
+        docs = postings.get(key)
+        if isinstance(docs, int):
+            postings[key] = docs | doc_mask(doc_ids)
+            continue
+        if docs is None:
+            docs = postings[key] = set()
+        docs.update(doc_ids)
+        if len(docs) >= dense_size:
+            postings[key] = doc_mask(docs)
+
+def unpost(postings, removals):
+    for key, doc_ids in removals.items():
+        docs = postings.get(key)
+        if isinstance(docs, int):
+            docs &= ~doc_mask(doc_ids)
+        elif docs is not None:
+            docs.difference_update(doc_ids)
+        if docs:
+            postings[key] = docs
+        else:
+            postings.pop(key, None)
+
+# at_least[k] is the docs having k or more of a query's trigrams so far; the docs in mask have one more
+def count_trigram(at_least, mask):
+    for k in range(len(at_least) - 1, 0, -1):
+        gained = at_least[k - 1] & mask
+        if gained:
+            at_least[k] |= gained
+
+# shared by every SearchIndex(); one catalog (the scene the panel shows) at a time
+class SearchIndex:
+    _scene = None
+    # set when the list may have changed without add/remove hearing about it (undo, a fresh file): sync goes over it again
+    # from _cursor, keeping whatever is indexed already
+    _stale = True
+    _cursor = 0
+    # went over the whole list at least once. a stale index that's built still answers, undo rarely changes much
+    _built = False
+    # entry id -> doc id, doc id -> (entry id, (collection, filepath, category) as indexed), and doc ids free for reuse
+    _ids = {}
+    _docs = {}
+    _free = []
+    # mask of every doc
+    _all = 0
+    # trigram -> docs with it in their collection name, and docs with it in their library or category.
+    # character -> docs with it in their name, and name length -> docs, names as searched: lowered, one space between words
+    _names = {}
+    _contexts = {}
+    _chars = {}
+    _lengths = {}
+    # the last query and its results, so redraws don't search again
+    _last = (None, None)
+
+    # drop everything; sync builds it again from the list
+    def invalidate(self):
+        SearchIndex._scene = None
+        SearchIndex._stale = True
+        SearchIndex._cursor = 0
+        SearchIndex._built = False
+        SearchIndex._ids = {}
+        SearchIndex._docs = {}
+        SearchIndex._free = []
+        SearchIndex._all = 0
+        SearchIndex._names = {}
+        SearchIndex._contexts = {}
+        SearchIndex._chars = {}
+        SearchIndex._lengths = {}
+        SearchIndex._last = (None, None)
+
+    def mark_stale(self):
+        SearchIndex._stale = True
+        SearchIndex._cursor = 0
+        SearchIndex._last = (None, None)
+
+    def ready(self, scene_key):
+        return SearchIndex._scene == scene_key and not SearchIndex._stale
+
+    def built(self, scene_key):
+        return SearchIndex._scene == scene_key and SearchIndex._built
+
+    # one step of bringing the index in line with a scene's character_list: the next count entries get added, or indexed
+    # again if they changed. once at the end, whatever isn't in the list anymore goes. True when it's all caught up
+    def sync(self, scene_key, character_list, count):
+        if SearchIndex._scene != scene_key:
+            self.invalidate()
+            SearchIndex._scene = scene_key
+        if not SearchIndex._stale:
+            return True
+        start = SearchIndex._cursor
+        end = min(start + count, len(character_list))
+        missing = []
+        changed = []
+        for position in range(start, end):
+            character = character_list[position]
+            doc_id = SearchIndex._ids.get(self.key(character))
+            if doc_id is None:
+                missing.append(character)
+            elif SearchIndex._docs[doc_id][1] != self.source(character):
+                changed.append(character)
+        self.remove_many(changed)
+        self.add_many(changed + missing)
+        SearchIndex._cursor = end
+        if end < len(character_list):
+            return False
+        if len(SearchIndex._ids) != len(character_list):
+            present = {self.key(character) for character in character_list}
+            self.remove_keys([key for key in SearchIndex._ids if key not in present])
+            # entries the pass stepped over because the list shifted under it between steps
+            self.add_many([character for character in character_list if self.key(character) not in SearchIndex._ids])
+        SearchIndex._stale = False
+        SearchIndex._built = True
+        return True
+
+    def key(self, character):
+        return character.id
+
+    def source(self, character):
+        return (character.collection, character.filepath, character.category)
+
+    # incremental updates; ignored while there's no index, it'll be built with them in it anyway
+    def add(self, character):
+        self.add_many([character])
+
+    def add_many(self, characters):
+        if SearchIndex._scene is None:
+            return
+        added = []
+        for character in characters:
+            key = self.key(character)
+            if key in SearchIndex._ids:
+                continue
+            doc_id = SearchIndex._free.pop() if SearchIndex._free else len(SearchIndex._docs)
+            SearchIndex._ids[key] = doc_id
+            SearchIndex._docs[doc_id] = (key, self.source(character))
+            added.append(doc_id)
+        if not added:
+            return
+        dense_size = max(SEARCH_DENSE_POSTING, len(SearchIndex._docs) >> 8)
+        for postings, additions in zip(self.postings(), self.entry_postings(added)):
+            post(postings, additions, dense_size)
+        SearchIndex._all |= doc_mask(added)
+        SearchIndex._last = (None, None)
+
+    def remove(self, character):
+        self.remove_keys([self.key(character)])
+
+    def remove_many(self, characters):
+        self.remove_keys([self.key(character) for character in characters])
+
+    def remove_keys(self, keys):
+        if SearchIndex._scene is None:
+            return
+        removed = [SearchIndex._ids.pop(key) for key in keys if key in SearchIndex._ids]
+        if not removed:
+            return
+        for postings, removals in zip(self.postings(), self.entry_postings(removed)):
+            unpost(postings, removals)
+        for doc_id in removed:
+            del SearchIndex._docs[doc_id]
+        SearchIndex._all &= ~doc_mask(removed)
+        SearchIndex._free.extend(removed)
+        SearchIndex._last = (None, None)
+
+    def postings(self):
+        return SearchIndex._names, SearchIndex._contexts, SearchIndex._chars, SearchIndex._lengths
+
+    # key -> doc ids for each of postings(), for a batch of docs. library and category trigrams are worked out once per pair
+    def entry_postings(self, doc_ids):
+        names, contexts, chars, lengths = {}, {}, {}, {}
+        pairs = {}
+        for doc_id in doc_ids:
+            collection, filepath, category = SearchIndex._docs[doc_id][1]
+            name_words = words(collection)
+            for gram in word_trigrams(name_words):
+                names.setdefault(gram, []).append(doc_id)
+            name = " ".join(name_words)
+            for char in set(name):
+                chars.setdefault(char, []).append(doc_id)
+            lengths.setdefault(len(name), []).append(doc_id)
+            pairs.setdefault((filepath, category), []).append(doc_id)
+        for pair, pair_docs in pairs.items():
+            for gram in context_trigrams(*pair):
+                contexts.setdefault(gram, []).extend(pair_docs)
+        return names, contexts, chars, lengths
+
+    # entry ids best match first: most of the query's trigrams, then most of them in the collection name itself, then the
+    # shorter name. a query too short for a trigram finds the names containing it, shortest first
+    def search(self, query, limit=SEARCH_RESULT_LIMIT):
+        if SearchIndex._last[0] == (query, limit):
+            return SearchIndex._last[1]
+        grams = query_trigrams(query)
+        needle = " ".join(words(query))
+        if grams:
+            ranked = self.rank(grams, limit)
+        elif needle:
+            ranked = self.shortest(doc_mask(SearchIndex._chars.get(needle)), limit)
+        else:
+            ranked = []
+        results = [SearchIndex._docs[doc_id][0] for doc_id in ranked]
+        SearchIndex._last = ((query, limit), results)
+        return results
+
+    # the whole query is worked out on masks over every doc: which docs have at least k of its trigrams, for each k.
+    # a trigram counts once whether it's in the name, the library or the category
+    def rank(self, grams, limit):
+        total = len(grams)
+        needed = max(1, int(total * SEARCH_MIN_SCORE + 0.5))
+        at_least = [SearchIndex._all] + [0] * total
+        name_at_least = list(at_least)
+        for gram in grams:
+            name_docs = doc_mask(SearchIndex._names.get(gram))
+            if name_docs:
+                count_trigram(name_at_least, name_docs)
+            docs = name_docs | doc_mask(SearchIndex._contexts.get(gram))
+            if docs:
+                count_trigram(at_least, docs)
+
+        results = []
+        for score in range(total, needed - 1, -1):
+            tier = at_least[score] & ~at_least[score + 1] if score < total else at_least[total]
+            # a doc's name can't have more of the trigrams than its score
+            for name_count in range(score, -1, -1):
+                if not tier:
+                    break
+                level = tier & name_at_least[name_count]
+                if level:
+                    tier &= ~level
+                    results.extend(self.shortest(level, limit - len(results)))
+                    if len(results) == limit:
+                        return results
+        return results
+
+    # up to limit docs of a mask, shortest name first
+    def shortest(self, mask, limit):
+        results = []
+        if not mask:
+            return results
+        for length in sorted(SearchIndex._lengths):
+            for doc_id in mask_docs(mask & doc_mask(SearchIndex._lengths[length])):
+                results.append(doc_id)
+                if len(results) == limit:
+                    return results
+        return results
@@ -0,0 +1,414 @@
+# the spawn pipeline shared by the import operators and the spawn queue: override extras, character detection,
+# excluding wgt (and other) collections and the rig ui script (see rigui.py)
+import fnmatch
+from collections import deque
+from contextlib import nullcontext
+
+import bpy
+
+from .engine import (
+    load_collection, get_linked_collection, add_collection_to_scene, instance_collection, override_instances,
+    make_editable_override, layer_collection_index, loaded_ids, library_filepath, id_key
+)
+from .rigui import RigScriptCache, make_rig_id, base_armature_name
+from .templates import TemplatePool, WARM_TEMPLATE_LIMIT, template_ids
+from .instrumentation import (
+    SpawnTimer, SpawnStats, entry_key, PHASE_LOAD, PHASE_OVERRIDE, PHASE_DETECT, PHASE_EXCLUDE, PHASE_RIG_SCRIPT
+)
+from .prefetch import PrefetchStats
+from .logs import logger
+from .utils import tag_redraw_view3d
+
+# how long the queue gives the ui between two stages
+SPAWN_QUEUE_INTERVAL = 0.01
+
+# a queued spawn runs one of these per timer tick
+STAGE_LOAD = 'LOAD'
+STAGE_OVERRIDE = 'OVERRIDE'
+STAGE_POST = 'POST'
+STAGE_RIG = 'RIG'
+STAGE_DONE = 'DONE'
+
+DEFAULT_EXTRA_OVERRIDES = "Light Direction"
+DEFAULT_RIG_PATTERN = "Rig"
+DEFAULT_EXCLUDE_PATTERNS = "wgt"
+
+# comma separated name patterns from a category setting
+def split_patterns(text):
+    return [pattern.strip() for pattern in text.split(",") if pattern.strip()]
+
+# a pattern matches anywhere in the name, and can use * and ? wildcards
+def name_matches(name, patterns):
+    return any(fnmatch.fnmatchcase(name, f"*{pattern}*") for pattern in patterns)
+
+STAGE_LABELS = {
+    STAGE_LOAD: "Queued",
+    STAGE_OVERRIDE: "Overriding",
+    STAGE_POST: "Setting up",
+    STAGE_RIG: "Running rig script",
+    STAGE_DONE: "Done",
+}
+
+# spawning steps shared by the single and the batch import operators
+class CharacterSpawnMixin:
+    # times a step of the spawn, if this spawn is being timed (it has a spawn_timer, see instrumentation.py)
+    def phase(self, phase):
+        timer = getattr(self, "spawn_timer", None)
+        return timer.phase(phase) if timer is not None else nullcontext()
+
+    # run on a fresh override of what's been LINKED. only the objects that came with it are looked at
+    def override_extras(self, context, spawned, extra_patterns, rig_pattern):
+        new_objs = list(spawned.all_objects)
+
+        # LIB OVERRIDE: e.g. LIGHT DIRECTION. whatever the category lists gets turned into an editable override
+        if extra_patterns:
+            for obj in new_objs:
+                if name_matches(obj.name, extra_patterns):
+                    make_editable_override(obj)
+
+        # Reselect char rig for convenience.
+        if rig_pattern:
+            for obj in new_objs:
+                if name_matches(obj.name, [rig_pattern]) and obj.name in context.view_layer.objects:
+                    obj.select_set(True)
+                    context.view_layer.objects.active = obj
+                    break
+
+    # identify if the collection we just added is a character: (rig object, its collection, texts, armatures) or None
+    def find_character(self, spawned):
+        # what came in is read off the spawned collection itself, no before/after diff of bpy.data
+        new_colls, new_texts, new_armatures = loaded_ids(spawned)
+
+        for new_collection in new_colls:
+            for obj in new_collection.objects:
+                # we only care about armatures that are not named metarig
+                if obj.type == 'ARMATURE' and "metarig" not in obj.name.lower():
+                    logger.debug("Found rig object: %s. Is Character.", obj.name)
+                    return obj, new_collection, new_texts, new_armatures
+        return None
+
+    # set the spawned collection up if it's a character. returns True for characters.
+    # pass the same layer_index for a whole batch so the layer tree is only walked once
+    def setup_spawned(self, spawned, action, exclude_patterns, layer_index=None):
+        with self.phase(PHASE_DETECT):
+            character = self.find_character(spawned)
+        if character is None:
+            return False
+        if layer_index is None:
+            layer_index = layer_collection_index(bpy.context.view_layer)
+        # Perform character-specific operations here
+        rig_object, collection, texts, armatures = character
+        self.process_character(rig_object, collection, texts, armatures, action, exclude_patterns, layer_index)
+        return True
+
+    # after we identify the character, we can do some processing
+    def process_character(self, rig_object, collection, texts, armatures, action_name, exclude_patterns, layer_index):
+        with self.phase(PHASE_EXCLUDE):
+            self.exclude_child_collections(collection, exclude_patterns, layer_index)
+        with self.phase(PHASE_RIG_SCRIPT):
+            self.setup_rig_script(texts, armatures, action_name)
+        self.report({'INFO'}, "Setup successful")
+
+    # if existing, close the wgt collection (or whatever else the category excludes on spawn).
+    # the character collection's children are checked against every pattern in one go, case insensitive
+    def exclude_child_collections(self, collection, exclude_patterns, layer_index):
+        patterns = [pattern.lower() for pattern in exclude_patterns]
+        if not patterns:
+            return
+        for layer_collection in layer_index.get(collection, ()):
+            for child in layer_collection.children:
+                if not child.exclude and name_matches(child.name.lower(), patterns):
+                    logger.debug("Disabling collection: %s", child.name)
+                    child.exclude = True
+
+    def setup_rig_script(self, texts, armatures, action_name):
+        # identify the armature
+        char_armature = None
+        for armature in armatures:
+            # if armature name doesn't have metarig in it, we can assume it's the character
+            if "metarig" not in armature.name.lower():
+                char_armature = armature
+                break
+        if not char_armature:
+            return
+
+        base_name = base_armature_name(char_armature.name)
+        source_file = None
+        script_file = None
+        # if we have an armature, we can identify the rig script.
+        for text in texts:
+            if "_ui.py" in text.name:
+                source_file = text
+                if action_name == "Appended":
+                    script_file = text
+                break
+
+        # If linking duplicate characters, this is the case below. 
+        if len(texts) == 0 and "overridden" in action_name:
+            # if it's missing, it's likely a rig with no corresponding rig script, in which case, just ignore.
+            source_file = bpy.data.texts.get(base_name + "_ui.py")
+
+        if source_file is None or (script_file is None and "overridden" not in action_name):
+            return
+
+        try:
+            # parsed once per distinct script, every spawn after that just fills in the name and id
+            template = RigScriptCache().get(source_file.as_string(), base_name, source_file.name)
+
+            if script_file is None:
+                script_file = bpy.data.texts.new(char_armature.name + "_ui.py")
+                script_file.use_module = True # enables the text to be treated as a script - to be ran at .blend startup
+
+            # this allows us to handle duplicate armature names, that way, the rig layers can be present for duplicated characters
+            # every char should just have a unique id; this needs to especially be true for duplicate characters.
+            rig_id = make_rig_id(bpy.data.filepath, char_armature.name)
+            char_armature["rig_id"] = rig_id
+            logger.debug("Generated new rig_id: %s", rig_id)
+
+            bindings = template.bind(char_armature.name, rig_id)
+            script_file.clear()
+            script_file.write(template.render(bindings))
+            template.run(bindings, script_file.name)
+
+        except Exception as e:
+            logger.warning("Could not set up rig script for %s: %s", char_armature.name, e)
+
+
+# a context for bpy.ops from a timer, which otherwise runs without a window or area
+def view3d_context():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                region = next((region for region in area.regions if region.type == 'WINDOW'), None)
+                return {"window": window, "area": area, "region": region}
+    return {}
+
+# keep a finished spawn's timings for the Stats subpanel
+def record_spawn(timer):
+    SpawnStats().record(timer)
+    if PHASE_LOAD in timer.phases:
+        PrefetchStats().record_load(bpy.path.abspath(library_filepath(timer.key[2])), timer.phases[PHASE_LOAD])
+    logger.debug("%s %s in %.1f ms: %s", timer.action, timer.name, timer.total * 1000, timer.describe())
+
+# one queued click: the same steps as CHARACTER_OT_import_character, split into stages so the ui gets a frame in between.
+# what a stage made is kept as (name, library path) keys and looked up again by the next stage, never as the ID itself:
+# anything can happen to bpy.data between two ticks
+class SpawnJob(CharacterSpawnMixin):
+    def __init__(self, character, category, link, template_limit=WARM_TEMPLATE_LIMIT):
+        self.name = character.name
+        self.filepath = character.filepath
+        self.collection_name = character.collection
+        self.link = link
+        # the category's settings as they were when the click happened
+        self.override = link and category is not None and category.generate_override
+        self.keep_warm = category is not None and category.keep_warm
+        self.extra_overrides = split_patterns(category.extra_overrides) if category else split_patterns(DEFAULT_EXTRA_OVERRIDES)
+        self.rig_pattern = category.rig_pattern if category else DEFAULT_RIG_PATTERN
+        self.exclude_patterns = split_patterns(category.exclude_patterns if category else DEFAULT_EXCLUDE_PATTERNS)
+        self.template_limit = template_limit
+        self.stage = STAGE_LOAD
+        # the spawned collection (linked, appended or the override) and the instance empty while there is one
+        self.spawned = None
+        self.instance = None
+        self.is_character = False
+        self.messages = []
+        self.spawn_timer = SpawnTimer(entry_key(character), character.collection, self.action)
+
+    # same signature as Operator.report so the shared spawn steps can use it
+    def report(self, level, message):
+        if 'ERROR' in level:
+            logger.error(message)
+        else:
+            logger.info(message)
+        self.messages.append((level, message))
+
+    @property
+    def started(self):
+        return self.stage != STAGE_LOAD
+
+    @property
+    def stage_label(self):
+        return STAGE_LABELS[self.stage]
+
+    @property
+    def action(self):
+        if not self.link:
+            return "Appended"
+        return "Linked and overridden" if self.override else "Linked"
+
+    def summary(self):
+        kind = "character" if self.is_character else "collection"
+        return f"{self.action} {kind}: {self.name}"
+
+    def find(self, data, key, what):
+        item = data.get(key) if key is not None else None
+        if item is None:
+            raise RuntimeError(f"the {what} spawned so far was removed")
+        return item
+
+    # runs the current stage and moves on to the next. returns True once the job is done
+    def run_stage(self, context):
+        if self.stage == STAGE_LOAD:
+            with self.phase(PHASE_LOAD):
+                if self.link:
+                    spawned = get_linked_collection(self.filepath, self.collection_name)
+                elif self.keep_warm:
+                    spawned = TemplatePool().append(self.filepath, [self.collection_name], self.template_limit)[self.collection_name]
+                else:
+                    spawned = load_collection(self.filepath, self.collection_name, link=False)
+                self.spawned = id_key(spawned)
+                if self.link:
+                    self.instance = id_key(instance_collection(context, spawned))
+                else:
+                    add_collection_to_scene(context, spawned)
+            if self.link:
+                self.stage = STAGE_OVERRIDE if self.override else STAGE_POST
+            else:
+                self.stage = STAGE_POST
+        elif self.stage == STAGE_OVERRIDE:
+            instance = self.find(bpy.data.objects, self.instance, "instance")
+            with self.phase(PHASE_OVERRIDE):
+                spawned = override_instances(context, [instance])[0]
+                # the override took the instance's place
+                self.instance = None
+                self.spawned = id_key(spawned)
+                self.override_extras(context, spawned, self.extra_overrides, self.rig_pattern)
+            self.stage = STAGE_POST
+        elif self.stage == STAGE_POST:
+            spawned = self.find(bpy.data.collections, self.spawned, "collection")
+            with self.phase(PHASE_DETECT):
+                rig = self.find_character(spawned)
+            self.is_character = rig is not None
+            if rig:
+                with self.phase(PHASE_EXCLUDE):
+                    self.exclude_child_collections(rig[1], self.exclude_patterns, layer_collection_index(context.view_layer))
+                self.stage = STAGE_RIG
+            else:
+                self.stage = STAGE_DONE
+        elif self.stage == STAGE_RIG:
+            spawned = self.find(bpy.data.collections, self.spawned, "collection")
+            rig = self.find_character(spawned)
+            if rig is None:
+                raise RuntimeError("the rig spawned so far was removed")
+            rig_object, collection, texts, armatures = rig
+            with self.phase(PHASE_RIG_SCRIPT):
+                self.setup_rig_script(texts, armatures, self.action)
+            self.report({'INFO'}, "Setup successful")
+            self.stage = STAGE_DONE
+        if self.stage == STAGE_DONE:
+            record_spawn(self.spawn_timer)
+        return self.stage == STAGE_DONE
+
+    # a stage failed: remove what this job added so far. linked data stays, other spawns share it
+    def rollback(self):
+        ids = set()
+        instance = bpy.data.objects.get(self.instance) if self.instance is not None else None
+        if instance is not None:
+            ids.add(instance)
+        spawned = bpy.data.collections.get(self.spawned) if self.spawned is not None else None
+        if spawned is not None and spawned.library is None:
+            ids |= {id_data for id_data in template_ids(spawned) if id_data.library is None}
+        if ids:
+            bpy.data.batch_remove(ids)
+        self.instance = self.spawned = None
+        return len(ids)
+
+# clicks go in here and get drained by run_spawn_queue, one stage per tick. shared by every SpawnQueue()
+class SpawnQueue:
+    _jobs = deque()
+    last_message = ""
+    # the last message is about a spawn that didn't make it
+    last_failed = False
+
+    def jobs(self):
+        return list(SpawnQueue._jobs)
+
+    def enqueue(self, job):
+        SpawnQueue._jobs.append(job)
+        if not bpy.app.timers.is_registered(run_spawn_queue):
+            bpy.app.timers.register(run_spawn_queue, first_interval=SPAWN_QUEUE_INTERVAL)
+
+    # drop a job that hasn't started yet, or every one of them when position is -1
+    def cancel(self, position=-1):
+        jobs = SpawnQueue._jobs
+        if position < 0:
+            kept = [job for job in jobs if job.started]
+            cancelled = len(jobs) - len(kept)
+            jobs.clear()
+            jobs.extend(kept)
+            return cancelled
+        if position < len(jobs) and not jobs[position].started:
+            del jobs[position]
+            return 1
+        return 0
+
+    # undo and redo free whatever a started job made so far, and the job can't pick it up again. jobs still waiting only
+    # hold names and settings, they stay queued
+    def abort_started(self):
+        jobs = SpawnQueue._jobs
+        aborted = [job for job in jobs if job.started]
+        if not aborted:
+            return 0
+        kept = [job for job in jobs if not job.started]
+        jobs.clear()
+        jobs.extend(kept)
+        names = ", ".join(job.collection_name for job in aborted)
+        logger.info("Undo stopped spawning %s", names)
+        SpawnQueue.last_message = f"Undo stopped spawning {names}"
+        SpawnQueue.last_failed = True
+        return len(aborted)
+
+    def clear(self):
+        SpawnQueue._jobs.clear()
+        if bpy.app.timers.is_registered(run_spawn_queue):
+            bpy.app.timers.unregister(run_spawn_queue)
+
+# a job's stage raised: take back what it made, say so in the panel and in a popup, and leave an undo step like a finished
+# spawn does
+def fail_spawn_job(job, override, error):
+    message = f"Could not spawn {job.collection_name}: {error}"
+    try:
+        job.rollback()
+    except Exception as e:
+        message += f" (and could not remove what it made so far: {e})"
+    job.report({'ERROR'}, message)
+    SpawnQueue.last_message = message
+    SpawnQueue.last_failed = True
+    if override:
+        try:
+            with bpy.context.temp_override(**override):
+                bpy.context.window_manager.popup_menu(
+                    lambda menu, context: menu.layout.label(text=message), title="QuickSpawn", icon='ERROR'
+                )
+        except Exception as e:
+            logger.warning("Could not show the spawn error: %s", e)
+    push_spawn_undo(override, f"QuickSpawn: could not spawn {job.collection_name}")
+
+# timers don't get an undo step of their own. a failed push only costs the step, the queue has to keep going
+def push_spawn_undo(override, message):
+    try:
+        with bpy.context.temp_override(**override):
+            bpy.ops.ed.undo_push(message=message)
+    except Exception as e:
+        logger.warning("Could not push an undo step for \"%s\": %s", message, e)
+
+def run_spawn_queue():
+    jobs = SpawnQueue._jobs
+    if not jobs:
+        return None
+    job = jobs[0]
+    override = view3d_context()
+    try:
+        with bpy.context.temp_override(**override):
+            finished = job.run_stage(bpy.context)
+    except Exception as e:
+        jobs.popleft()
+        fail_spawn_job(job, override, e)
+    else:
+        if finished:
+            jobs.popleft()
+            SpawnQueue.last_message = job.summary()
+            SpawnQueue.last_failed = False
+            push_spawn_undo(override, f"QuickSpawn: {job.summary()}")
+    tag_redraw_view3d()
+    return SPAWN_QUEUE_INTERVAL if jobs else None
@@ -0,0 +1,545 @@
+# on-disk formats for the quickspawn config. nothing in here touches bpy, so it can be used outside blender too
+import os
+import json
+import hashlib
+import sqlite3
+import tempfile
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:
+    # windows
+    fcntl = None
+    import msvcrt
+
+QUICKSPAWN_CATEGORYLIST = "quickspawn_categorylist"
+QUICKSPAWN_CHARACTERLIST = "quickspawn_characterlist"
+
+# once the journal grows past this it gets folded back into a fresh snapshot
+JOURNAL_COMPACT_BYTES = 256 * 1024
+
+# how long a process waits for another one to let go of the config before giving up on this write
+LOCK_TIMEOUT = 2.0
+LOCK_RETRY_INTERVAL = 0.01
+
+# bumped whenever the sqlite schema changes; 0 (a fresh database) means quickspawn.json still has to be imported.
+# 1 keyed categories on name and entries on (category, collection, filepath), 2 keyed both on their id,
+# 3 keeps the id and makes the old keys unique again
+SQLITE_SCHEMA_VERSION = 3
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS categories (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id TEXT PRIMARY KEY,
+    category TEXT NOT NULL,
+    collection TEXT NOT NULL,
+    filepath TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS categories_by_position ON categories (position);
+CREATE INDEX IF NOT EXISTS entries_by_position ON entries (position);
+CREATE INDEX IF NOT EXISTS entries_by_category ON entries (category, position);
+"""
+
+# made by compact() once the tables are empty, so a database from before them can't fail to get them over duplicates
+SQLITE_UNIQUE_INDEXES = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS categories_by_name ON categories (name)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS entries_by_key ON entries (category, collection, filepath)",
+)
+
+# config list -> (table, columns next to the id). the columns are the item's natural key and stay unique, like they are
+# in the json formats. anything else in the config goes into settings as json
+SQLITE_TABLES = {
+    QUICKSPAWN_CATEGORYLIST: ("categories", ("name",)),
+    QUICKSPAWN_CHARACTERLIST: ("entries", ("category", "collection", "filepath")),
+}
+
+# namespace of the ids worked out for items written before items had one
+LEGACY_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://github.com/OctavoPE/QuickSpawn")
+
+# write to a temp file next to the target and swap it in, so a crash mid-write never leaves a half written config
+def atomic_write_json(filepath, config):
+    directory = os.path.dirname(filepath) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".quickspawn-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as file:
+            json.dump(config, file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, filepath)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+# what identified an item before items had ids: a category's name, an entry's (category, collection, filepath)
+def natural_key(list_name, item):
+    if list_name == QUICKSPAWN_CATEGORYLIST:
+        return item["name"]
+    return (item["category"], item["collection"], item["filepath"])
+
+def new_id():
+    return str(uuid.uuid4())
+
+# id of an item from before ids, derived from its natural key so every process (and the shared catalog) comes up with the same one
+def legacy_id(list_name, key):
+    return str(uuid.uuid5(LEGACY_ID_NAMESPACE, json.dumps([list_name, key])))
+
+# what identifies an item inside one of the lists, so the journal can address it
+def item_key(list_name, item):
+    item_id = item.get("id")
+    if item_id:
+        return item_id
+    return legacy_id(list_name, natural_key(list_name, item))
+
+# the config with an id on every category and entry. lists that already have them are passed through as they are
+def assign_ids(config):
+    for list_name in (QUICKSPAWN_CATEGORYLIST, QUICKSPAWN_CHARACTERLIST):
+        items = config.get(list_name)
+        if items and not all(item.get("id") for item in items):
+            config[list_name] = [item if item.get("id") else {"id": item_key(list_name, item), **item} for item in items]
+    return config
+
+# hash of the catalog itself (categories and entries, not the ui settings). stored on the scene when it's saved, so opening
+# a file whose lists already match the config can skip hydrating them
+def catalog_fingerprint(config):
+    catalog = [config.get(QUICKSPAWN_CATEGORYLIST, []), config.get(QUICKSPAWN_CHARACTERLIST, [])]
+    return hashlib.sha1(json.dumps(catalog, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+# shallow copy that's safe as long as the item dicts themselves are never mutated (CacheService always builds fresh ones)
+def copy_config(config):
+    return {key: list(value) if isinstance(value, list) else value for key, value in config.items()}
+
+# the plain format: the whole config rewritten on every save
+class JsonStore:
+    mode = 'JSON'
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+
+    def load(self):
+        with open(self.filepath, 'r') as file:
+            return assign_ids(json.load(file))
+
+    def save(self, config):
+        atomic_write_json(self.filepath, config)
+
+    def compact(self, config):
+        self.save(config)
+
+    def close(self):
+        pass
+
+# snapshot (the regular quickspawn.json) plus an append-only journal of per-item changes next to it.
+# a save only appends the records for what changed since the last save. a torn last line from a crash is dropped on load and
+# cut off the file, so the next save doesn't append onto it
+class JournalStore:
+    mode = 'JOURNAL'
+
+    def __init__(self, filepath, journal_path=None, compact_bytes=JOURNAL_COMPACT_BYTES):
+        self.filepath = filepath
+        self.journal_path = journal_path or os.path.splitext(filepath)[0] + ".journal"
+        self.compact_bytes = compact_bytes
+        # what's on disk right now (snapshot + journal), used to work out the next batch of records
+        self._persisted = None
+
+    def load(self):
+        try:
+            with open(self.filepath, 'r') as file:
+                config = json.load(file)
+        except FileNotFoundError:
+            config = {}
+        for record in self.read_journal():
+            apply_record(config, record)
+        assign_ids(config)
+        self._persisted = copy_config(config)
+        return config
+
+    def read_journal(self):
+        records = []
+        # end of the last record that read back whole
+        good_end = 0
+        try:
+            with open(self.journal_path, 'rb') as file:
+                for line in file:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # only the last write can be torn; anything after it is garbage too
+                        break
+                    good_end += len(line)
+                else:
+                    return records
+        except FileNotFoundError:
+            return records
+        with open(self.journal_path, 'r+b') as file:
+            file.truncate(good_end)
+            file.flush()
+            os.fsync(file.fileno())
+        return records
+
+    def save(self, config):
+        if self._persisted is None:
+            self.compact(config)
+            return
+        records = diff_configs(self._persisted, config)
+        if not records:
+            return
+        lines = "".join(json.dumps(record) + "\n" for record in records)
+        with open(self.journal_path, 'a+b') as file:
+            # a whole last record whose newline never made it to disk
+            if file.tell() and not self.ends_with_newline(file):
+                lines = "\n" + lines
+            file.write(lines.encode("utf-8"))
+            file.flush()
+            os.fsync(file.fileno())
+        self._persisted = copy_config(config)
+        if os.path.getsize(self.journal_path) > self.compact_bytes:
+            self.compact(config)
+
+    def ends_with_newline(self, file):
+        file.seek(-1, os.SEEK_END)
+        return file.read(1) == b"\n"
+
+    # fold everything into a fresh snapshot. records are idempotent, so a crash between the two steps just replays a few again
+    def compact(self, config):
+        atomic_write_json(self.filepath, config)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._persisted = copy_config(config)
+
+    def close(self):
+        pass
+
+# a sqlite database next to quickspawn.json (quickspawn.sqlite3) with categories and entries in their own indexed tables.
+# a save runs only the statements for what changed, in one transaction; WAL keeps readers from blocking on it.
+# the first open imports quickspawn.json (and its journal), which is left where it is for the other formats
+class SqliteStore:
+    mode = 'SQLITE'
+
+    def __init__(self, filepath, database_path=None):
+        self.filepath = filepath
+        self.database_path = database_path or os.path.splitext(filepath)[0] + ".sqlite3"
+        self._connection = None
+        self._persisted = None
+
+    def connect(self):
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.database_path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.database_path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SQLITE_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def load(self):
+        connection = self.connect()
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version == 0:
+            self.migrate()
+        elif version < SQLITE_SCHEMA_VERSION:
+            self.upgrade()
+        config = self.read(connection)
+        self._persisted = copy_config(config)
+        return config
+
+    def read(self, connection):
+        config = {key: json.loads(value) for key, value in connection.execute("SELECT key, value FROM settings")}
+        for list_name, (table, _columns) in SQLITE_TABLES.items():
+            config[list_name] = [json.loads(data) for (data,) in connection.execute(f"SELECT data FROM {table} ORDER BY position")]
+        return config
+
+    # one time import of whatever the json formats left behind
+    def migrate(self):
+        config = JournalStore(self.filepath).load() if os.path.exists(self.filepath) else {}
+        self.compact(config)
+
+    # an older schema: read everything out, make the tables again and write it back with ids. of entries that share a
+    # natural key (schema 2 let them in) the last one is kept
+    def upgrade(self):
+        connection = self.connect()
+        config = assign_ids(self.read(connection))
+        with connection:
+            for table, _columns in SQLITE_TABLES.values():
+                connection.execute(f"DROP TABLE {table}")
+        connection.executescript(SQLITE_SCHEMA)
+        self.compact(config)
+
+    def save(self, config):
+        if self._persisted is None:
+            self.compact(config)
+            return
+        records = diff_configs(self._persisted, config)
+        if not records:
+            return
+        connection = self.connect()
+        with connection:
+            for record in records:
+                self.apply(connection, config, record)
+        self._persisted = copy_config(config)
+
+    def apply(self, connection, config, record):
+        op = record["op"]
+        if op == "set":
+            self.set_setting(connection, record["key"], record["value"])
+            return
+        list_name = record["list"]
+        if list_name not in SQLITE_TABLES:
+            self.set_setting(connection, list_name, config.get(list_name, []))
+            return
+        table, columns = SQLITE_TABLES[list_name]
+        if op == "replace":
+            connection.execute(f"DELETE FROM {table}")
+            self.insert_items(connection, list_name, record["items"])
+        elif op == "remove":
+            connection.execute(f"DELETE FROM {table} WHERE id = ?", (record["key"],))
+        else:
+            # add goes after everything else, update keeps its place. an item with the same natural key under
+            # another id replaces it
+            item = record["item"]
+            connection.execute(
+                f"DELETE FROM {table} WHERE {' AND '.join(f'{column} = ?' for column in columns)} AND id != ?",
+                [item[column] for column in columns] + [item_key(list_name, item)]
+            )
+            connection.execute(
+                f"INSERT INTO {table} (id, {', '.join(columns)}, position, data) "
+                f"VALUES (?, {', '.join('?' for _ in columns)}, (SELECT COALESCE(MAX(position), -1) + 1 FROM {table}), ?) "
+                f"ON CONFLICT (id) DO UPDATE SET {', '.join(f'{column} = excluded.{column}' for column in columns)}, data = excluded.data",
+                [item_key(list_name, item)] + [item[column] for column in columns] + [json.dumps(item)]
+            )
+
+    def set_setting(self, connection, key, value):
+        connection.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def insert_items(self, connection, list_name, items):
+        table, columns = SQLITE_TABLES[list_name]
+        # a duplicate id (older json files can have the same entry twice) keeps the last copy
+        connection.executemany(
+            f"INSERT OR REPLACE INTO {table} (id, {', '.join(columns)}, position, data) "
+            f"VALUES (?, {', '.join('?' for _ in columns)}, ?, ?)",
+            (
+                [item_key(list_name, item)] + [item[column] for column in columns] + [position, json.dumps(item)]
+                for position, item in enumerate(items)
+            )
+        )
+
+    # rewrite every table from the config
+    def compact(self, config):
+        connection = self.connect()
+        with connection:
+            for table in ["settings"] + [table for table, _columns in SQLITE_TABLES.values()]:
+                connection.execute(f"DELETE FROM {table}")
+            for statement in SQLITE_UNIQUE_INDEXES:
+                connection.execute(statement)
+            for key, value in config.items():
+                if key in SQLITE_TABLES:
+                    self.insert_items(connection, key, value)
+                else:
+                    self.set_setting(connection, key, value)
+            connection.execute(f"PRAGMA user_version = {SQLITE_SCHEMA_VERSION}")
+        self._persisted = copy_config(config)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+class ConfigLockTimeout(Exception):
+    pass
+
+# advisory lock on a file next to the config (quickspawn.lock), held around every read and write of the config so several
+# blender instances can share it. only other QuickSpawns honour it, which is all that writes there
+class ConfigLock:
+    def __init__(self, filepath, timeout=LOCK_TIMEOUT):
+        self.lock_path = os.path.splitext(filepath)[0] + ".lock"
+        self.timeout = timeout
+        self._file = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+        self._file = open(self.lock_path, "a+")
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                self.lock()
+                return self
+            except OSError:
+                if time.monotonic() > deadline:
+                    self._file.close()
+                    self._file = None
+                    raise ConfigLockTimeout(f"{self.lock_path} is held by another process")
+                time.sleep(LOCK_RETRY_INTERVAL)
+
+    def __exit__(self, *exc):
+        try:
+            self.unlock()
+        finally:
+            self._file.close()
+            self._file = None
+
+    def lock(self):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def unlock(self):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+
+# the config's version stamp (quickspawn.version): bumped on every write, so a process can tell someone else wrote since it last
+# read without loading the whole config
+def version_filepath(filepath):
+    return os.path.splitext(filepath)[0] + ".version"
+
+def read_version(filepath):
+    try:
+        with open(version_filepath(filepath), 'r') as file:
+            return int(json.load(file))
+    except (OSError, ValueError, TypeError):
+        return 0
+
+def write_version(filepath, version):
+    atomic_write_json(version_filepath(filepath), version)
+
+# cheap change check for polling: (inode, mtime, size) of a file, None if it isn't there. every atomic write is a new inode,
+# so two writes inside one mtime tick still look different
+def file_stamp(filepath):
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+# replay what changed from base to ours on top of theirs (what another process wrote meanwhile). per item records merge
+# cleanly; a reorder is recorded as a whole list replace and wins over their changes to that list
+def merge_configs(base, ours, theirs):
+    merged = copy_config(theirs)
+    for record in diff_configs(base or {}, ours):
+        apply_record(merged, record)
+    return merged
+
+# a shared catalog (e.g. on a network drive) under the personal one: shared items come first, a personal item with the same key
+# replaces its shared one, and personal settings win
+def layer_configs(shared, personal):
+    if not shared:
+        return personal
+    config = {key: value for key, value in shared.items() if not isinstance(value, list)}
+    config.update(personal)
+    for list_name in (QUICKSPAWN_CATEGORYLIST, QUICKSPAWN_CHARACTERLIST):
+        if list_name not in shared:
+            continue
+        personal_items = personal.get(list_name, [])
+        overrides = {item_key(list_name, item): item for item in personal_items}
+        shared_keys = set()
+        items = []
+        for item in shared[list_name]:
+            key = item_key(list_name, item)
+            if key not in shared_keys:
+                shared_keys.add(key)
+                items.append(overrides.get(key, item))
+        items.extend(item for item in personal_items if item_key(list_name, item) not in shared_keys)
+        config[list_name] = items
+    return config
+
+# the personal part of a layered config: everything except the items that are exactly as the shared catalog has them
+def strip_layer(shared, config):
+    if not shared:
+        return config
+    personal = dict(config)
+    for list_name in (QUICKSPAWN_CATEGORYLIST, QUICKSPAWN_CHARACTERLIST):
+        if list_name not in shared or list_name not in config:
+            continue
+        shared_by_key = {item_key(list_name, item): item for item in shared[list_name]}
+        personal[list_name] = [item for item in config[list_name] if shared_by_key.get(item_key(list_name, item)) != item]
+    return personal
+
+def make_store(mode, filepath):
+    if mode == 'JOURNAL':
+        return JournalStore(filepath)
+    if mode == 'SQLITE':
+        return SqliteStore(filepath)
+    return JsonStore(filepath)
+
+# apply a single journal record onto a loaded config
+def apply_record(config, record):
+    op = record.get("op")
+    if op == "set":
+        config[record["key"]] = record["value"]
+        return
+    list_name = record["list"]
+    items = config.setdefault(list_name, [])
+    if op == "replace":
+        config[list_name] = list(record["items"])
+        return
+    if op == "remove":
+        # journals written before ids address items by their natural key
+        key = tuple(record["key"]) if isinstance(record["key"], list) else record["key"]
+        config[list_name] = [
+            item for item in items if item_key(list_name, item) != key and natural_key(list_name, item) != key
+        ]
+        return
+    # add and update both mean "this item now looks like this"
+    item = record["item"]
+    key = item_key(list_name, item)
+    for position, existing in enumerate(items):
+        if item_key(list_name, existing) == key:
+            items[position] = item
+            return
+    items.append(item)
+
+# the records that turn old into new, per item where possible
+def diff_configs(old, new):
+    records = []
+    for key in new:
+        if isinstance(new[key], list):
+            records.extend(diff_list(key, old.get(key, []), new[key]))
+        elif key not in old or old[key] != new[key]:
+            records.append({"op": "set", "key": key, "value": new[key]})
+    for key in old:
+        if key not in new and isinstance(old[key], list):
+            records.extend(diff_list(key, old[key], []))
+    return records
+
+def diff_list(list_name, old_items, new_items):
+    old_by_key = {item_key(list_name, item): item for item in old_items}
+    new_keys = set()
+    records = []
+    for item in new_items:
+        key = item_key(list_name, item)
+        new_keys.add(key)
+        existing = old_by_key.get(key)
+        if existing is None:
+            records.append({"op": "add", "list": list_name, "item": item})
+        elif existing != item:
+            records.append({"op": "update", "list": list_name, "item": item})
+    for key in old_by_key:
+        if key not in new_keys:
+            records.append({"op": "remove", "list": list_name, "key": key})
+
+    # adds land at the end and removes keep the order, which covers every mutation the operators make.
+    # if the result would still come out in a different order, just record the whole list
+    kept = [key for key in (item_key(list_name, item) for item in old_items) if key in new_keys]
+    kept_set = set(kept)
+    expected = kept + [key for key in (item_key(list_name, item) for item in new_items) if key not in kept_set]
+    if expected != [item_key(list_name, item) for item in new_items] or len(new_keys) != len(new_items):
+        return [{"op": "replace", "list": list_name, "items": list(new_items)}]
+    return records
@@ -0,0 +1,175 @@
+# warm templates for categories that keep their appends warm: the first append of a collection is kept hidden in
+# bpy.data, and every spawn after that is a deep copy of it instead of another read of the library.
+# templates are looked up by name (pointers don't survive undo) and evicted least recently used first
+from collections import OrderedDict
+
+import bpy
+
+from .engine import LoadedTexts, load_collections, library_filepath, referenced_texts
+
+WARM_TEMPLATE_LIMIT = 8
+
+# custom property marking a template collection, holds its pool key
+TEMPLATE_TAG = "quickspawn_template"
+
+# point every ID pointer of a struct that refers to something in ids at its copy instead
+def remap_pointers(struct, ids):
+    for prop in struct.bl_rna.properties:
+        if prop.type != 'POINTER' or prop.is_readonly:
+            continue
+        value = getattr(struct, prop.identifier, None)
+        if value is not None and value in ids:
+            setattr(struct, prop.identifier, ids[value])
+
+def remap_custom_properties(id_data, ids):
+    for key in id_data.keys():
+        value = id_data[key]
+        if isinstance(value, bpy.types.ID) and value in ids:
+            id_data[key] = ids[value]
+
+def remap_drivers(id_data, ids):
+    animation_data = getattr(id_data, "animation_data", None)
+    if animation_data is None:
+        return
+    for fcurve in animation_data.drivers:
+        for variable in fcurve.driver.variables:
+            for target in variable.targets:
+                if target.id is not None and target.id in ids:
+                    target.id = ids[target.id]
+
+def remap_constraints(constraints, ids):
+    for constraint in constraints:
+        remap_pointers(constraint, ids)
+        # the armature constraint keeps its targets in a list
+        for target in getattr(constraint, "targets", ()):
+            remap_pointers(target, ids)
+
+# make a copied object refer to the other copies (parent, modifiers, constraints, bone shapes, drivers, rig ui text)
+def remap_object(obj, ids):
+    if obj.parent is not None and obj.parent in ids:
+        obj.parent = ids[obj.parent]
+    for modifier in obj.modifiers:
+        remap_pointers(modifier, ids)
+    remap_constraints(obj.constraints, ids)
+    if obj.pose is not None:
+        for pose_bone in obj.pose.bones:
+            if pose_bone.custom_shape is not None and pose_bone.custom_shape in ids:
+                pose_bone.custom_shape = ids[pose_bone.custom_shape]
+            remap_constraints(pose_bone.constraints, ids)
+    remap_custom_properties(obj, ids)
+    remap_drivers(obj, ids)
+    if obj.data is not None:
+        remap_custom_properties(obj.data, ids)
+        remap_drivers(obj.data, ids)
+
+# everything that makes up a template: its collections, objects, their data and the rig ui texts they point at or were
+# loaded with
+def template_ids(collection):
+    ids = {collection} | LoadedTexts().get(collection)
+    ids.update(collection.children_recursive)
+    for obj in collection.all_objects:
+        ids.add(obj)
+        if obj.data is not None:
+            ids.add(obj.data)
+            ids |= referenced_texts(obj.data)
+        ids |= referenced_texts(obj)
+    return ids
+
+# deep copy of a collection hierarchy: own objects, object data and rig ui texts, all pointing at each other
+def copy_collection_tree(collection):
+    ids = {}
+    for obj in collection.all_objects:
+        new_obj = obj.copy()
+        ids[obj] = new_obj
+        if obj.data is not None:
+            if obj.data not in ids:
+                ids[obj.data] = obj.data.copy()
+            new_obj.data = ids[obj.data]
+    for obj in collection.all_objects:
+        for text in referenced_texts(obj) | (referenced_texts(obj.data) if obj.data is not None else set()):
+            if text not in ids:
+                ids[text] = text.copy()
+    # ui texts nothing points at go along too, and the copy remembers them like a fresh load would
+    loaded_texts = [text for text in LoadedTexts().get(collection) if text not in ids]
+    for text in loaded_texts:
+        ids[text] = text.copy()
+
+    def copy_collection(source):
+        if source in ids:
+            return ids[source]
+        # copy() keeps the settings but shares the contents, swap those for the copies
+        new_collection = source.copy()
+        ids[source] = new_collection
+        if TEMPLATE_TAG in new_collection:
+            del new_collection[TEMPLATE_TAG]
+        for obj in list(new_collection.objects):
+            new_collection.objects.unlink(obj)
+            new_collection.objects.link(ids[obj])
+        for child in list(new_collection.children):
+            new_collection.children.unlink(child)
+            new_collection.children.link(copy_collection(child))
+        return new_collection
+
+    root = copy_collection(collection)
+    if loaded_texts:
+        LoadedTexts().record([root], [ids[text] for text in loaded_texts])
+    for source, new_obj in list(ids.items()):
+        if isinstance(source, bpy.types.Object):
+            remap_object(new_obj, ids)
+    return root
+
+# shared by every TemplatePool(); key -> template collection name, oldest first
+class TemplatePool:
+    _templates = OrderedDict()
+
+    def key(self, directory, collection_name):
+        return f"{library_filepath(directory)}|{collection_name}"
+
+    def get_template(self, key):
+        name = TemplatePool._templates.get(key)
+        if name is None:
+            return None
+        template = bpy.data.collections.get(name)
+        # gone (orphans purged, file reloaded) or the name now belongs to something else
+        if template is None or template.get(TEMPLATE_TAG) != key:
+            del TemplatePool._templates[key]
+            return None
+        TemplatePool._templates.move_to_end(key)
+        return template
+
+    def add_template(self, key, template):
+        template[TEMPLATE_TAG] = key
+        TemplatePool._templates[key] = template.name
+        TemplatePool._templates.move_to_end(key)
+
+    def evict(self, limit):
+        while len(TemplatePool._templates) > limit:
+            old_key, old_name = TemplatePool._templates.popitem(last=False)
+            self.remove_template(old_key, old_name)
+
+    def remove_template(self, key, name):
+        template = bpy.data.collections.get(name)
+        if template is not None and template.get(TEMPLATE_TAG) == key:
+            bpy.data.batch_remove(template_ids(template))
+
+    # fresh copies of the named collections, ready to be linked into the scene. only templates that aren't warm yet
+    # get read from the library, all in one load
+    def append(self, directory, collection_names, limit=WARM_TEMPLATE_LIMIT):
+        templates = {}
+        missing = []
+        for name in collection_names:
+            template = self.get_template(self.key(directory, name))
+            if template is None:
+                missing.append(name)
+            else:
+                templates[name] = template
+        if missing:
+            for name, template in load_collections(directory, missing, link=False).items():
+                self.add_template(self.key(directory, name), template)
+                templates[name] = template
+        copies = {name: copy_collection_tree(template) for name, template in templates.items()}
+        self.evict(limit)
+        return copies
+
+    def clear(self):
+        TemplatePool._templates.clear()
@@ -0,0 +1,9 @@
+# small bpy helpers shared by the addon's modules
+import bpy
+
+# redraw every 3d viewport, e.g. after background work finished and the panel has something new to show
+def tag_redraw_view3d():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
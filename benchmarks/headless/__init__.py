@@ -0,0 +1,3 @@
+# headless benchmarks: synthetic catalogs of 100 / 10k / 100k entries, timed through CacheService, the load_post handler,
+# the panel's draw and the import operator. runs under blender --background, or under plain python with the bpy stand-in
+# in bpy_stub.py. see __main__.py for how to run it
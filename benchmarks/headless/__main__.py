@@ -0,0 +1,12 @@
+# python -m benchmarks.headless [--sizes 100 10000] [--output report.json] [--baseline old.json]
+# blender --background --factory-startup --python benchmarks/headless/__main__.py -- [same options]
+import os
+import sys
+
+if not __package__:
+    # run as a script (blender --python), make the package importable first
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from benchmarks.headless.runner import main
+
+sys.exit(main())
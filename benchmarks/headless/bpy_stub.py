@@ -0,0 +1,496 @@
+# a stand-in for the parts of bpy QuickSpawn uses, so the addon can be imported, registered and driven from plain python.
+# it only keeps state (property groups, datablocks, the view layer); nothing gets drawn, and libraries.load reads the
+# collection names out of the fixture files with the addon's blendfile.py instead of really loading them.
+# install() before importing the addon
+import os
+import sys
+import types
+from contextlib import contextmanager
+
+STUB_VERSION = (4, 2, 0)
+
+# what bpy.props.X(...) returns. registering a class (or a Scene attribute) turns these into plain values on each instance
+class PropertyDefinition:
+    DEFAULTS = {
+        "StringProperty": "",
+        "BoolProperty": False,
+        "IntProperty": 0,
+        "FloatProperty": 0.0,
+    }
+
+    def __init__(self, kind, options):
+        self.kind = kind
+        self.options = options
+
+    def default(self):
+        if self.kind == "CollectionProperty":
+            return CollectionPropertyValue(self.options["type"])
+        if self.kind == "PointerProperty":
+            return self.options["type"]()
+        if "default" in self.options:
+            return self.options["default"]
+        if self.kind == "EnumProperty":
+            return self.options["items"][0][0]
+        return PropertyDefinition.DEFAULTS[self.kind]
+
+    # bpy.types.Scene.x = ... also applies to scenes that already exist: they get the default the first time it's read
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        for klass in owner.__mro__:
+            for name, value in vars(klass).items():
+                if value is self:
+                    instance.__dict__[name] = self.default()
+                    return instance.__dict__[name]
+        raise AttributeError(self.kind)
+
+def property_function(kind):
+    def define(**options):
+        return PropertyDefinition(kind, options)
+    define.__name__ = kind
+    return define
+
+# the properties a class declares as annotations, like every registered addon class does
+def property_definitions(cls):
+    definitions = {}
+    for klass in reversed(cls.__mro__):
+        for name, value in vars(klass).get("__annotations__", {}).items():
+            if isinstance(value, PropertyDefinition):
+                definitions[name] = value
+    return definitions
+
+class bpy_struct:
+    def __init__(self):
+        for name, definition in property_definitions(type(self)).items():
+            setattr(self, name, definition.default())
+
+    def as_pointer(self):
+        return id(self)
+
+# CollectionProperty: a list with blender's add/remove/move/find
+class CollectionPropertyValue(list):
+    def __init__(self, item_type):
+        super().__init__()
+        self.item_type = item_type
+
+    def add(self):
+        item = self.item_type()
+        self.append(item)
+        return item
+
+    def remove(self, index):
+        del self[index]
+
+    def move(self, from_index, to_index):
+        self.insert(to_index, self.pop(from_index))
+
+    def find(self, name):
+        for index, item in enumerate(self):
+            if item.name == name:
+                return index
+        return -1
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            index = self.find(key)
+            if index < 0:
+                raise KeyError(key)
+            key = index
+        return super().__getitem__(key)
+
+class Operator(bpy_struct):
+    def __init__(self):
+        super().__init__()
+        self.reports = []
+
+    def report(self, level, message):
+        self.reports.append((level, message))
+
+class Panel(bpy_struct):
+    pass
+
+class UIList(bpy_struct):
+    pass
+
+class PropertyGroup(bpy_struct):
+    pass
+
+class AddonPreferences(bpy_struct):
+    pass
+
+# datablocks. custom properties live in their own dict, like ID properties do
+class ID(bpy_struct):
+    def __init__(self, name=""):
+        super().__init__()
+        self.name = name
+        self.library = None
+        self.override_library = None
+        self.use_fake_user = False
+        self.properties = {}
+
+    def keys(self):
+        return self.properties.keys()
+
+    def get(self, key, default=None):
+        return self.properties.get(key, default)
+
+    def __getitem__(self, key):
+        return self.properties[key]
+
+    def __setitem__(self, key, value):
+        self.properties[key] = value
+
+    def __delitem__(self, key):
+        del self.properties[key]
+
+    def __contains__(self, key):
+        return key in self.properties
+
+class Library(ID):
+    def __init__(self, name="", filepath=""):
+        super().__init__(name)
+        self.filepath = filepath
+
+class Text(ID):
+    def __init__(self, name=""):
+        super().__init__(name)
+        self.lines = []
+        self.use_module = False
+
+    def as_string(self):
+        return "".join(self.lines)
+
+    def clear(self):
+        self.lines = []
+
+    def write(self, text):
+        self.lines.append(text)
+
+class Object(ID):
+    def __init__(self, name="", data=None):
+        super().__init__(name)
+        self.data = data
+        self.type = 'EMPTY' if data is None else getattr(data, "object_type", 'MESH')
+        self.parent = None
+        self.instance_type = 'NONE'
+        self.instance_collection = None
+        self.location = (0.0, 0.0, 0.0)
+        self.modifiers = []
+        self.constraints = []
+        self.pose = None
+        self.animation_data = None
+        self.selected = False
+
+    def select_set(self, state):
+        self.selected = state
+
+    def select_get(self):
+        return self.selected
+
+class CollectionObjects(list):
+    def link(self, obj):
+        if obj in self:
+            raise RuntimeError(f"Object '{obj.name}' already in collection")
+        self.append(obj)
+
+    def unlink(self, obj):
+        self.remove(obj)
+
+class Collection(ID):
+    def __init__(self, name=""):
+        super().__init__(name)
+        self.objects = CollectionObjects()
+        self.children = CollectionObjects()
+
+    @property
+    def children_recursive(self):
+        found = []
+        for child in self.children:
+            found.append(child)
+            found.extend(child.children_recursive)
+        return found
+
+    @property
+    def all_objects(self):
+        seen = set()
+        objects = []
+        for collection in [self] + self.children_recursive:
+            for obj in collection.objects:
+                if id(obj) not in seen:
+                    seen.add(id(obj))
+                    objects.append(obj)
+        return objects
+
+# the view layer's mirror of the collection tree; children are made on demand and kept, so exclude sticks
+class LayerCollection:
+    def __init__(self, collection):
+        self.collection = collection
+        self.name = collection.name
+        self.exclude = False
+        self._children = {}
+
+    @property
+    def children(self):
+        children = []
+        for child in self.collection.children:
+            layer_collection = self._children.get(id(child))
+            if layer_collection is None:
+                layer_collection = self._children[id(child)] = LayerCollection(child)
+            children.append(layer_collection)
+        return children
+
+class ViewLayerObjects:
+    def __init__(self, view_layer):
+        self.view_layer = view_layer
+        self.active = None
+
+    def names(self):
+        return {obj.name for obj in self.view_layer.scene.collection.all_objects}
+
+    def __contains__(self, name):
+        return name in self.names()
+
+    def __iter__(self):
+        return iter(self.view_layer.scene.collection.all_objects)
+
+class ViewLayer:
+    def __init__(self, scene):
+        self.scene = scene
+        self.layer_collection = LayerCollection(scene.collection)
+        self.active_layer_collection = self.layer_collection
+        self.objects = ViewLayerObjects(self)
+
+class Scene(ID):
+    def __init__(self, name="Scene"):
+        super().__init__(name)
+        self.collection = Collection("Scene Collection")
+        self.cursor = types.SimpleNamespace(location=(0.0, 0.0, 0.0))
+        self.view_layers = [ViewLayer(self)]
+
+# bpy.data.<collections|objects|texts|libraries>: looked up by name, or by (name, library path) for linked data
+class IDCollection:
+    def __init__(self, id_type):
+        self.id_type = id_type
+        self.items = {}
+
+    def key(self, item):
+        return (item.name, item.library.filepath if item.library is not None else None)
+
+    def unique_name(self, name, library):
+        library_path = library.filepath if library is not None else None
+        if (name, library_path) not in self.items:
+            return name
+        number = 1
+        while (f"{name}.{number:03d}", library_path) in self.items:
+            number += 1
+        return f"{name}.{number:03d}"
+
+    def add(self, item):
+        item.name = self.unique_name(item.name, item.library)
+        self.items[self.key(item)] = item
+        return item
+
+    def new(self, name, *args):
+        return self.add(self.id_type(name, *args))
+
+    def get(self, key, default=None):
+        if isinstance(key, tuple):
+            return self.items.get(key, default)
+        return self.items.get((key, None), default)
+
+    def remove(self, item):
+        self.items.pop(self.key(item), None)
+
+    def __contains__(self, item):
+        return self.items.get(self.key(item)) is item
+
+    def __iter__(self):
+        return iter(list(self.items.values()))
+
+    def __len__(self):
+        return len(self.items)
+
+class Libraries(IDCollection):
+    def __init__(self, data):
+        super().__init__(Library)
+        self.data = data
+
+    # reads the collection names from the file, and on exit makes a collection (holding one empty) for each one asked for
+    @contextmanager
+    def load(self, filepath, link=False):
+        from QuickSpawn_Addon.blendfile import list_collections
+
+        path = abspath(filepath)
+        collections = list_collections(path)
+        if collections is None:
+            raise OSError(f"Cannot read file '{path}'")
+        data_from = types.SimpleNamespace(collections=collections)
+        data_to = types.SimpleNamespace(collections=[])
+        yield data_from, data_to
+
+        library = None
+        if link:
+            library = next((item for item in self if item.filepath == filepath), None)
+            if library is None:
+                library = self.add(Library(os.path.basename(path), filepath))
+        loaded = []
+        for name in data_to.collections:
+            if name not in data_from.collections:
+                loaded.append(None)
+                continue
+            if link and self.data.collections.get((name, library.filepath)) is not None:
+                loaded.append(self.data.collections.get((name, library.filepath)))
+                continue
+            collection = Collection(name)
+            obj = Object(name + "_root")
+            collection.library = obj.library = library
+            self.data.objects.add(obj)
+            collection.objects.link(obj)
+            loaded.append(self.data.collections.add(collection))
+        data_to.collections = loaded
+
+class BlendData:
+    def __init__(self):
+        self.filepath = ""
+        self.collections = IDCollection(Collection)
+        self.objects = IDCollection(Object)
+        self.texts = IDCollection(Text)
+        self.scenes = IDCollection(Scene)
+        self.libraries = Libraries(self)
+
+    def batch_remove(self, ids):
+        for item in ids:
+            for collection in (self.collections, self.objects, self.texts, self.libraries):
+                if item in collection:
+                    collection.remove(item)
+
+class Context:
+    def __init__(self, data):
+        self.scene = data.scenes.add(Scene())
+        self.view_layer = self.scene.view_layers[0]
+        self.preferences = types.SimpleNamespace(addons={})
+        self.window_manager = types.SimpleNamespace(windows=[])
+        self.area = None
+        self.region = None
+        self.window = None
+
+    @property
+    def selected_objects(self):
+        return [obj for obj in self.view_layer.objects if obj.selected]
+
+    @contextmanager
+    def temp_override(self, **override):
+        yield
+
+class Timers:
+    def __init__(self):
+        self.registered = {}
+
+    def register(self, function, first_interval=0.0, persistent=False):
+        self.registered[function] = first_interval
+
+    def unregister(self, function):
+        self.registered.pop(function, None)
+
+    def is_registered(self, function):
+        return function in self.registered
+
+# bpy.ops.<module>.<name>(**properties) runs the registered operator's execute right away
+class OperatorModule:
+    def __init__(self, operators, module):
+        self.operators = operators
+        self.module = module
+
+    def __getattr__(self, name):
+        operator_class = self.operators.get(f"{self.module}.{name}")
+        if operator_class is None:
+            raise AttributeError(f"bpy.ops.{self.module}.{name} is not registered")
+
+        def call(**properties):
+            operator = operator_class()
+            for key, value in properties.items():
+                setattr(operator, key, value)
+            return operator.execute(bpy.context)
+        return call
+
+class Operators:
+    def __init__(self):
+        self.registered = {}
+
+    def __getattr__(self, module):
+        if module.startswith("__"):
+            raise AttributeError(module)
+        return OperatorModule(self.registered, module)
+
+class PreviewImage:
+    def __init__(self, icon_id):
+        self.icon_id = icon_id
+        self.image_size = (0, 0)
+        self.image_pixels = types.SimpleNamespace(foreach_set=lambda pixels: None)
+
+class PreviewCollection(dict):
+    icon_ids = 0
+
+    def new(self, key):
+        PreviewCollection.icon_ids += 1
+        self[key] = PreviewImage(PreviewCollection.icon_ids)
+        return self[key]
+
+def abspath(path):
+    if path.startswith("//"):
+        return os.path.join(os.path.dirname(bpy.data.filepath), path[2:])
+    return os.path.abspath(path)
+
+bpy = None
+
+def module(name, **attributes):
+    created = types.ModuleType(name)
+    created.__dict__.update(attributes)
+    sys.modules[name] = created
+    return created
+
+# put the stand-in into sys.modules as bpy. config_dir is what bpy.utils.user_resource('CONFIG') hands out
+def install(config_dir):
+    global bpy
+    operators = Operators()
+
+    def register_class(cls):
+        if issubclass(cls, Operator):
+            operators.registered[cls.bl_idname] = cls
+
+    def unregister_class(cls):
+        if issubclass(cls, Operator):
+            operators.registered.pop(cls.bl_idname, None)
+
+    handlers = module(
+        "bpy.app.handlers", persistent=lambda function: function,
+        **{name: [] for name in ("load_pre", "load_post", "save_pre", "save_post", "undo_post", "redo_post")}
+    )
+    app = module("bpy.app", handlers=handlers, timers=Timers(), version=STUB_VERSION, background=True)
+    previews = module("bpy.utils.previews", new=PreviewCollection, remove=lambda collection: collection.clear())
+    utils = module(
+        "bpy.utils", previews=previews, register_class=register_class, unregister_class=unregister_class,
+        user_resource=lambda resource_type, path="", create=False: os.path.join(config_dir, path)
+    )
+    bpy_types = module(
+        "bpy.types", bpy_struct=bpy_struct, Operator=Operator, Panel=Panel, UIList=UIList, PropertyGroup=PropertyGroup,
+        AddonPreferences=AddonPreferences, ID=ID, Library=Library, Text=Text, Object=Object, Collection=Collection,
+        Scene=Scene
+    )
+    props = module("bpy.props", **{
+        kind: property_function(kind) for kind in (
+            "StringProperty", "BoolProperty", "IntProperty", "FloatProperty", "EnumProperty", "CollectionProperty",
+            "PointerProperty"
+        )
+    })
+    path = module("bpy.path", abspath=abspath)
+    bpy = module(
+        "bpy", app=app, utils=utils, types=bpy_types, props=props, path=path, ops=operators, data=None, context=None
+    )
+    new_file()
+    return bpy
+
+# an empty file: new bpy.data and a fresh scene, like wm.read_homefile(use_empty=True) minus the load handlers
+def new_file():
+    bpy.data = BlendData()
+    bpy.context = Context(bpy.data)
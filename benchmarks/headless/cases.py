@@ -0,0 +1,224 @@
+# the timed cases. each one goes through the same entry points blender does (CacheService, the load_post handler, the
+# panel's draw, bpy.ops), so they run unchanged under blender --background and under the stub
+import os
+import shutil
+import time
+from itertools import compress
+from types import SimpleNamespace
+
+import bpy
+
+from QuickSpawn_Addon.storage import QUICKSPAWN_CHARACTERLIST, new_id
+
+from .catalogs import import_samples, collection_name
+
+STORAGE_MODES = ('JSON', 'JOURNAL', 'SQLITE')
+
+# typed one key at a time into the panel's search field
+SEARCH_KEYSTROKES = ("c", "cr", "cra", "crat", "crate", "crate ", "crate 0", "crate 00")
+
+# blender's UIList.bitflag_filter_item
+FILTER_ITEM_FLAG = 1 << 30
+
+# call a timer function until it stops asking to be called again
+def run_timer(function):
+    while function() is not None:
+        pass
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000
+
+# a UILayout that counts what it's asked for. template_list does what blender does with a UIList: filter the whole list,
+# then draw only the rows that fit
+class RecordingLayout:
+    def __init__(self, addon, context):
+        self.addon = addon
+        self.context = context
+        self.items = 0
+
+    def row(self, **kwargs):
+        return self
+
+    def column(self, **kwargs):
+        return self
+
+    def box(self):
+        return self
+
+    def split(self, **kwargs):
+        return self
+
+    def separator(self, **kwargs):
+        pass
+
+    def label(self, **kwargs):
+        self.items += 1
+
+    def prop(self, *args, **kwargs):
+        self.items += 1
+
+    def operator(self, *args, **kwargs):
+        self.items += 1
+        return SimpleNamespace()
+
+    def template_list(self, list_type, list_id, data, propname, active_data, active_propname, rows=5, **kwargs):
+        list_class = getattr(self.addon, list_type)
+        ui_list = SimpleNamespace(list_id=list_id, filter_name="", bitflag_filter_item=FILTER_ITEM_FLAG)
+        items = getattr(data, propname)
+        flags, new_order = list_class.filter_items(ui_list, self.context, data, propname)
+        # picked out in C, like blender does, so it doesn't count against the addon
+        shown = sorted(compress(range(len(flags)), flags), key=new_order.__getitem__)
+        for index in shown[:rows]:
+            list_class.draw_item(ui_list, self.context, self, data, items[index], 0, active_data, active_propname, index)
+
+def draw_panel(addon, context):
+    layout = RecordingLayout(addon, context)
+    addon.CHARACTER_PT_panel.draw(SimpleNamespace(layout=layout), context)
+    return layout
+
+# every CacheService() shares class level state; start over as if the addon was just enabled with this store
+def reset_cache_service(addon, mode):
+    service = addon.CacheService
+    service().close_store()
+    service._config = None
+    service._dirty = False
+    service._fingerprint = None
+    service._base = {}
+    service._version = 0
+    service._version_stamp = None
+    service._shared = {}
+    service._shared_stamp = None
+    service._merged = False
+    service._store = addon.make_store(mode, addon.BLENDER_ADDON_CONFIG_FILEPATH)
+    return service()
+
+def point_config_at(addon, config_dir):
+    os.makedirs(config_dir, exist_ok=True)
+    addon.BLENDER_ADDON_CONFIG_FILEPATH = os.path.join(config_dir, addon.BLENDER_ADDON_CONFIG_FILENAME)
+
+# a copy of an existing entry under a new collection name (and id)
+def extra_entry(config, number):
+    characters = config[QUICKSPAWN_CHARACTERLIST]
+    entry = dict(characters[number % len(characters)])
+    entry["id"] = new_id()
+    entry["collection"] = f"Extra_{number:06d}"
+    return entry
+
+# write the whole catalog into an empty store, one more entry into a full one, and read it all back, per storage format
+def cache_cases(bench):
+    addon = bench.addon
+    results = []
+    for mode in STORAGE_MODES:
+        config_dir = os.path.join(bench.work_dir, f"config_{mode.lower()}")
+        full = []
+        for _ in range(bench.repeat):
+            shutil.rmtree(config_dir, ignore_errors=True)
+            point_config_at(addon, config_dir)
+            service = reset_cache_service(addon, mode)
+            service.write_to_blender_cache(addon.copy_config(bench.config))
+            full.append(timed(service.flush))
+        results.append(("cache.write_full", mode, full, {}))
+
+        delta = []
+        cache = service.get_cache()
+        for number in range(bench.repeat):
+            cache[QUICKSPAWN_CHARACTERLIST].append(extra_entry(bench.config, number))
+            service.write_to_blender_cache(cache)
+            delta.append(timed(service.flush))
+        results.append(("cache.write_one_entry", mode, delta, {}))
+
+        read = []
+        for _ in range(bench.repeat):
+            service = reset_cache_service(addon, mode)
+            read.append(timed(service.get_cache))
+        results.append(("cache.read", mode, read, {}))
+        service.close_store()
+    return results
+
+# the catalog as the rest of the cases see it: flushed to a json config, nothing in the scene yet
+def prepare_catalog(bench):
+    point_config_at(bench.addon, os.path.join(bench.work_dir, "config"))
+    service = reset_cache_service(bench.addon, 'JSON')
+    service.write_to_blender_cache(bench.addon.copy_config(bench.config))
+    service.flush()
+
+# load_post into a scene with empty lists, into one that already has the catalog, and after one entry changed
+def load_cases(bench):
+    addon = bench.addon
+    scene = bpy.context.scene
+    cold = []
+    for _ in range(bench.repeat):
+        scene.category_list.clear()
+        scene.character_list.clear()
+        scene.quickspawn_catalog_fingerprint = ""
+        cold.append(timed(addon.load_quickspawn_data, None))
+    unchanged = [timed(addon.load_quickspawn_data, None) for _ in range(bench.repeat)]
+
+    changed = []
+    service = addon.CacheService()
+    for number in range(bench.repeat):
+        cache = service.get_cache()
+        cache[QUICKSPAWN_CHARACTERLIST].append(extra_entry(bench.config, number))
+        service.write_to_blender_cache(cache)
+        changed.append(timed(addon.load_quickspawn_data, None))
+    return [
+        ("load_post.empty_scene", "", cold, {}),
+        ("load_post.unchanged", "", unchanged, {}),
+        ("load_post.one_entry_changed", "", changed, {}),
+    ]
+
+# one redraw of the panel with every category expanded: building the view model, then redrawing from it,
+# then typing into the search field
+def panel_cases(bench):
+    addon = bench.addon
+    context = bpy.context
+    scene = context.scene
+    for category in scene.category_list:
+        category.is_expanded = True
+    scene.quickspawn_search = ""
+
+    addon.CatalogIndex().invalidate()
+    first = timed(draw_panel, addon, context)
+    cached = [timed(draw_panel, addon, context) for _ in range(bench.repeat)]
+    layout_items = draw_panel(addon, context).items
+
+    # the index is built by a timer in blender; the stub doesn't run timers, so its ticks are run here
+    addon.SearchIndex().invalidate()
+    search_index = timed(run_timer, addon.update_search_index)
+    scene.quickspawn_search = SEARCH_KEYSTROKES[0]
+    search_first = timed(draw_panel, addon, context)
+    typing = []
+    for keystroke in SEARCH_KEYSTROKES[1:]:
+        scene.quickspawn_search = keystroke
+        typing.append(timed(draw_panel, addon, context))
+    scene.quickspawn_search = ""
+    return [
+        ("panel.draw_first", "", [first], {"layout_items": layout_items}),
+        ("panel.draw_cached", "", cached, {"layout_items": layout_items}),
+        ("panel.search_index", "", [search_index], {}),
+        ("panel.search_first", "", [search_first], {}),
+        ("panel.search_keystroke", "", typing, {}),
+    ]
+
+# spawn the sampled entries through the operator: appended, then instanced (first from an unread library, then again)
+def import_cases(bench):
+    scene = bpy.context.scene
+    ids = {character.collection: character.id for character in scene.character_list}
+    samples = [ids[collection_name(sample)] for sample in import_samples(bench.entries)]
+    results = []
+    for label, mode in (("append", 'APPEND'), ("instance_first", 'INSTANCE'), ("instance_again", 'INSTANCE')):
+        scene.quickspawn_import_mode = mode
+        durations = []
+        failures = 0
+        for entry_id in samples:
+            start = time.perf_counter()
+            result = bpy.ops.character.import_character(entry_id=entry_id)
+            durations.append((time.perf_counter() - start) * 1000)
+            failures += 'FINISHED' not in result
+        results.append(("import_character", label, durations, {"failures": failures}))
+    scene.quickspawn_import_mode = 'APPEND'
+    return results
+
+CASES = (cache_cases, load_cases, panel_cases, import_cases)
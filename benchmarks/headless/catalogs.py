@@ -0,0 +1,140 @@
+# synthetic catalogs and the fixture .blend files their entries point at. a catalog of n entries is the same every time,
+# so reports from different runs (and machines) compare like with like
+import os
+import struct
+import uuid
+
+CATALOG_SIZES = (100, 10000, 100000)
+
+# categories grow with the catalog, like a real asset library's do, up to a point
+ENTRIES_PER_CATEGORY = 200
+MAX_CATEGORIES = 50
+# same for the .blend files the entries come from
+ENTRIES_PER_LIBRARY = 50
+MAX_LIBRARIES = 200
+
+# entries the import cases spawn, spread evenly over the catalog
+IMPORT_SAMPLES = 8
+
+# collections in a fixture besides the sampled ones, and padding standing in for the rest of the file (meshes, images)
+FIXTURE_FILLER_COLLECTIONS = 64
+FIXTURE_PAYLOAD_BYTES = 256 * 1024
+
+ASSET_WORDS = (
+    "Hero", "Villain", "Guard", "Crowd", "Tree", "Rock", "Crate", "Barrel", "Lamp", "Door", "Chair", "Table", "Car",
+    "Sword", "Shield", "Fire", "Smoke", "Spark", "Rain", "Dust",
+)
+
+# ids are derived from the position in the catalog, so they're the same every time too
+CATALOG_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "quickspawn-benchmark")
+
+def catalog_id(kind, number):
+    return str(uuid.uuid5(CATALOG_ID_NAMESPACE, f"{kind}-{number}"))
+
+def category_count(entries):
+    return max(1, min(MAX_CATEGORIES, entries // ENTRIES_PER_CATEGORY))
+
+def library_count(entries):
+    return max(1, min(MAX_LIBRARIES, entries // ENTRIES_PER_LIBRARY))
+
+def library_path(library_dir, number):
+    return os.path.join(library_dir, f"library_{number:03d}.blend")
+
+def collection_name(number):
+    return f"{ASSET_WORDS[number % len(ASSET_WORDS)]}_{number:06d}"
+
+# the config dict CacheService keeps, for a catalog of entries spread over categories and library files.
+# category_fields are the addon's cached category settings with their defaults
+def make_config(entries, library_dir, category_fields, categorylist_key, characterlist_key):
+    categories = [f"Category {number:02d}" for number in range(category_count(entries))]
+    libraries = library_count(entries)
+    return {
+        categorylist_key: [
+            {"id": catalog_id("category", number), "name": name, **category_fields} for number, name in enumerate(categories)
+        ],
+        characterlist_key: [
+            {
+                "id": catalog_id("entry", number),
+                "name": os.path.basename(library_path(library_dir, number % libraries)),
+                "filepath": library_path(library_dir, number % libraries) + "/Collection/",
+                "collection": collection_name(number),
+                "category": categories[number % len(categories)],
+            }
+            for number in range(entries)
+        ],
+    }
+
+# positions of the entries the import cases spawn
+def import_samples(entries):
+    step = max(1, entries // IMPORT_SAMPLES)
+    return list(range(0, entries, step))[:IMPORT_SAMPLES]
+
+# library file -> collection names it has to contain: the sampled entries plus filler, and at least the filler for every
+# file the catalog mentions (thumbnails get looked up in all of them)
+def fixture_contents(entries):
+    libraries = library_count(entries)
+    contents = {
+        number: [f"Filler_{number:03d}_{filler:03d}" for filler in range(FIXTURE_FILLER_COLLECTIONS)]
+        for number in range(libraries)
+    }
+    for sample in import_samples(entries):
+        contents[sample % libraries].append(collection_name(sample))
+    return contents
+
+# a .blend that blendfile.py (and the stub's libraries.load) can read: a header, one GR block per collection, a padding
+# block, the DNA and ENDB. blender itself won't open these, write_fixtures_blender makes ones it will
+SDNA_NAMES = ("*next", "*prev", "name[66]")
+SDNA_TYPES = ("char", "void", "ID")
+SDNA_TYPE_LENGTHS = (1, 0, 82)
+ID_STRUCT_SIZE = 82
+
+def sdna_block():
+    def strings(values):
+        data = b"".join(value.encode("ascii") + b"\x00" for value in values)
+        return data + b"\x00" * (-len(data) % 4)
+
+    data = b"SDNA"
+    data += b"NAME" + struct.pack("<i", len(SDNA_NAMES)) + strings(SDNA_NAMES)
+    data += b"TYPE" + struct.pack("<i", len(SDNA_TYPES)) + strings(SDNA_TYPES)
+    lengths = struct.pack(f"<{len(SDNA_TYPE_LENGTHS)}h", *SDNA_TYPE_LENGTHS)
+    data += b"TLEN" + lengths + b"\x00" * (-len(lengths) % 4)
+    # struct ID { void *next, *prev; char name[66]; }
+    data += b"STRC" + struct.pack("<i", 1) + struct.pack("<hh", 2, 3) + struct.pack("<6h", 1, 0, 1, 1, 0, 2)
+    return data
+
+def write_fixture_blend(filepath, collection_names, payload_bytes=FIXTURE_PAYLOAD_BYTES):
+    bhead = struct.Struct("<4siQii")
+    with open(filepath, "wb") as file:
+        file.write(b"BLENDER-v300")
+        for number, name in enumerate(collection_names):
+            id_data = struct.pack("<QQ", 0, 0) + ("GR" + name).encode("utf-8")[:65].ljust(66, b"\x00")
+            file.write(bhead.pack(b"GR\x00\x00", len(id_data), number + 1, 2, 1))
+            file.write(id_data)
+        file.write(bhead.pack(b"DATA", payload_bytes, 0, 0, 1))
+        file.write(b"\x00" * payload_bytes)
+        dna = sdna_block()
+        file.write(bhead.pack(b"DNA1", len(dna), 0, 0, 1))
+        file.write(dna)
+        file.write(bhead.pack(b"ENDB", 0, 0, 0, 0))
+
+def write_fixtures(entries, library_dir):
+    os.makedirs(library_dir, exist_ok=True)
+    for number, names in fixture_contents(entries).items():
+        write_fixture_blend(library_path(library_dir, number), names)
+
+# real .blend files, written from inside blender: each collection holds one empty
+def write_fixtures_blender(entries, library_dir):
+    import bpy
+
+    os.makedirs(library_dir, exist_ok=True)
+    for number, names in fixture_contents(entries).items():
+        collections = set()
+        objects = set()
+        for name in names:
+            collection = bpy.data.collections.new(name)
+            obj = bpy.data.objects.new(name + "_root", None)
+            collection.objects.link(obj)
+            collections.add(collection)
+            objects.add(obj)
+        bpy.data.libraries.write(library_path(library_dir, number), collections, fake_user=True)
+        bpy.data.batch_remove(collections | objects)
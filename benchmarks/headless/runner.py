@@ -0,0 +1,174 @@
+# sets up a throwaway config dir, the addon and the fixtures, runs every case for every catalog size and writes the report
+import argparse
+import contextlib
+import datetime
+import importlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+
+from .catalogs import CATALOG_SIZES, make_config, write_fixtures, write_fixtures_blender
+
+# a case whose median got this much slower than in the baseline report is called out
+REGRESSION_RATIO = 1.25
+# and only if it takes at least this long, so noise in sub-millisecond cases doesn't count
+REGRESSION_MIN_MS = 0.5
+
+REPORT_VERSION = 1
+
+# what the cases get handed: the addon module, the catalog being measured and where to put files
+class Bench:
+    def __init__(self, addon, entries, config, work_dir, repeat):
+        self.addon = addon
+        self.entries = entries
+        self.config = config
+        self.work_dir = work_dir
+        self.repeat = repeat
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="benchmarks.headless", description="Time QuickSpawn against synthetic catalogs.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(CATALOG_SIZES), help="catalog sizes (entries)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case")
+    parser.add_argument("--output", default="quickspawn_benchmark.json", help="where to write the JSON report")
+    parser.add_argument("--baseline", help="an earlier report to compare against; exits with 1 on a regression")
+    parser.add_argument("--keep", action="store_true", help="keep the work directory (configs, fixtures)")
+    parser.add_argument("--verbose", action="store_true", help="let the addon's own output through")
+    return parser.parse_args(argv)
+
+# blender passes its own arguments along; ours come after --
+def script_argv():
+    if "--" in sys.argv:
+        return sys.argv[sys.argv.index("--") + 1:]
+    return sys.argv[1:]
+
+def in_blender():
+    try:
+        import bpy
+    except ImportError:
+        return False
+    return bool(getattr(bpy.app, "binary_path", ""))
+
+# the addon, registered against config files in work_dir instead of the user's
+def load_addon(work_dir, stub):
+    repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if repo_root not in sys.path:
+        sys.path.insert(0, repo_root)
+    config_dir = os.path.join(work_dir, "config")
+    if stub:
+        from . import bpy_stub
+        bpy_stub.install(config_dir)
+    addon = importlib.import_module("QuickSpawn_Addon")
+    os.makedirs(config_dir, exist_ok=True)
+    addon.BLENDER_ADDON_CONFIG_FILEPATH = os.path.join(config_dir, addon.BLENDER_ADDON_CONFIG_FILENAME)
+    addon.LIBRARY_INDEX_FILEPATH = os.path.join(config_dir, "quickspawn_library_index.json")
+    addon.THUMBNAIL_CACHE_DIRPATH = os.path.join(config_dir, "quickspawn_thumbnails")
+    addon.register()
+    return addon
+
+def new_file(stub):
+    import bpy
+    if stub:
+        from . import bpy_stub
+        bpy_stub.new_file()
+    else:
+        bpy.ops.wm.read_homefile(use_empty=True)
+
+def summarize(case, variant, entries, durations, extra):
+    return {
+        "case": case,
+        "variant": variant,
+        "entries": entries,
+        "runs": len(durations),
+        "min_ms": round(min(durations), 3),
+        "median_ms": round(statistics.median(durations), 3),
+        "max_ms": round(max(durations), 3),
+        **extra,
+    }
+
+def environment(stub):
+    import bpy
+    return {
+        "runtime": "cpython+stub" if stub else "blender",
+        "blender": ".".join(str(part) for part in bpy.app.version),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+    }
+
+# (case, variant, entries) -> (baseline median, new median) for every case that got noticeably slower
+def find_regressions(baseline, results):
+    before = {(row["case"], row["variant"], row["entries"]): row["median_ms"] for row in baseline["results"]}
+    regressions = []
+    for row in results:
+        key = (row["case"], row["variant"], row["entries"])
+        old = before.get(key)
+        if old is not None and row["median_ms"] >= REGRESSION_MIN_MS and row["median_ms"] > old * REGRESSION_RATIO:
+            regressions.append((key, old, row["median_ms"]))
+    return regressions
+
+def print_results(results, out):
+    for row in results:
+        name = f"{row['case']} {row['variant']}".strip()
+        print(f"{row['entries']:>8}  {name:<36} {row['median_ms']:>10.3f} ms  (min {row['min_ms']:.3f}, max {row['max_ms']:.3f})", file=out)
+
+def run(args, stub):
+    out = sys.stdout
+    quiet = open(os.devnull, "w")
+    work_dir = tempfile.mkdtemp(prefix="quickspawn-benchmark-")
+    results = []
+    try:
+        with contextlib.redirect_stdout(out if args.verbose else quiet):
+            addon = load_addon(work_dir, stub)
+        # imports bpy, so only once it's there
+        from . import cases
+        for entries in args.sizes:
+            print(f"{entries} entries", file=out)
+            library_dir = os.path.join(work_dir, f"libraries_{entries}")
+            config = make_config(
+                entries, library_dir, addon.CATEGORY_FIELDS, addon.QUICKSPAWN_CATEGORYLIST, addon.QUICKSPAWN_CHARACTERLIST
+            )
+            bench = Bench(addon, entries, config, work_dir, args.repeat)
+            with contextlib.redirect_stdout(out if args.verbose else quiet):
+                (write_fixtures if stub else write_fixtures_blender)(entries, library_dir)
+                new_file(stub)
+            for case in cases.CASES:
+                with contextlib.redirect_stdout(out if args.verbose else quiet):
+                    if case is cases.load_cases:
+                        cases.prepare_catalog(bench)
+                    rows = [summarize(name, variant, entries, durations, extra) for name, variant, durations, extra in case(bench)]
+                print_results(rows, out)
+                results.extend(rows)
+        with contextlib.redirect_stdout(out if args.verbose else quiet):
+            addon.unregister()
+    finally:
+        quiet.close()
+        if args.keep:
+            print(f"Work directory kept at {work_dir}", file=out)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+def main(argv=None):
+    args = parse_args(script_argv() if argv is None else argv)
+    stub = not in_blender()
+    results = run(args, stub)
+    report = {"version": REPORT_VERSION, "environment": environment(stub), "results": results}
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Report written to {args.output}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    regressions = find_regressions(baseline, results)
+    for (case, variant, entries), old, new in regressions:
+        print(f"Slower: {case} {variant} at {entries} entries, {old:.3f} -> {new:.3f} ms")
+    if not regressions:
+        print(f"No regressions against {args.baseline}")
+    return 1 if regressions else 0
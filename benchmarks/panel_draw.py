@@ -0,0 +1,127 @@
+# redraw cost of the catalog panel with a big character list, old inline scan vs the CatalogIndex view model.
+# runs under plain python: python benchmarks/panel_draw.py [entries] [categories]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "QuickSpawn_Addon"))
+from catalog_index import CatalogIndex
+
+# just enough of a CollectionProperty: find() is a linear scan by name, like blender's
+class FakeCollectionProperty(list):
+    def find(self, name):
+        for index, item in enumerate(self):
+            if item.name == name:
+                return index
+        return -1
+
+class FakeCharacter:
+    def __init__(self, name, filepath, collection, category):
+        self.name = name
+        self.filepath = filepath
+        self.collection = collection
+        self.category = category
+
+class FakeCategory:
+    def __init__(self, name):
+        self.name = name
+        self.is_expanded = True
+
+# counts what the panel asks the layout for; the real UI cost is roughly proportional to it
+class FakeLayout:
+    def __init__(self):
+        self.items = 0
+
+    def row(self):
+        return self
+
+    def box(self):
+        return self
+
+    def operator(self, *args, **kwargs):
+        self.items += 1
+        return FakeOperatorProperties()
+
+    def label(self, *args, **kwargs):
+        self.items += 1
+
+class FakeOperatorProperties:
+    pass
+
+def make_catalog(entries, categories):
+    category_list = [FakeCategory(f"Category {number}") for number in range(categories)]
+    character_list = FakeCollectionProperty(
+        FakeCharacter(f"asset_{number}.blend", f"/assets/asset_{number}.blend/Collection/",
+                      f"Collection {number}", category_list[number % categories].name)
+        for number in range(entries)
+    )
+    return category_list, character_list
+
+# what CHARACTER_PT_panel.draw did before: a full scan + sort per category and two find() calls per row
+def draw_legacy(layout, category_list, character_list):
+    for category in category_list:
+        layout.label(text=category.name)
+        if category.is_expanded:
+            sorted_characters = sorted(
+                [char for char in character_list if char.category == category.name],
+                key=lambda x: x.collection.lower()
+            )
+            for character in sorted_characters:
+                row = layout.row()
+                row.operator("character.import_character", text=character.collection).index = character_list.find(character.name)
+                row.operator("character.remove_character", text="", icon='TRASH').index = character_list.find(character.name)
+
+# rows a category's UIList shows before scrolling, see CATALOG_LIST_ROWS
+VISIBLE_ROWS = 8
+
+# CatalogIndex rows laid out inline (the panel between the view model and the UIList)
+def draw_indexed(layout, category_list, character_list):
+    catalog_index = CatalogIndex()
+    for category in category_list:
+        layout.label(text=category.name)
+        if category.is_expanded:
+            for index, collection in catalog_index.get_category(0, character_list, category.name):
+                row = layout.row()
+                row.operator("character.import_character", text=collection).index = index
+                row.operator("character.remove_character", text="", icon='TRASH').index = index
+
+# what it does now: each category is a UIList, filter_items comes from CatalogIndex and only the visible rows get laid out
+def draw_uilist(layout, category_list, character_list):
+    catalog_index = CatalogIndex()
+    for category in category_list:
+        layout.label(text=category.name)
+        if category.is_expanded:
+            flags, new_order = catalog_index.get_filter(0, character_list, category.name, "", 1)
+            for index, collection in catalog_index.get_category(0, character_list, category.name)[:VISIBLE_ROWS]:
+                row = layout.row()
+                row.operator("character.import_character", text=collection).index = index
+                row.operator("character.remove_character", text="", icon='TRASH').index = index
+
+def time_redraws(draw, category_list, character_list, redraws):
+    start = time.perf_counter()
+    for _ in range(redraws):
+        draw(FakeLayout(), category_list, character_list)
+    return (time.perf_counter() - start) / redraws
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    categories = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    category_list, character_list = make_catalog(entries, categories)
+
+    legacy = time_redraws(draw_legacy, category_list, character_list, 1)
+
+    CatalogIndex().invalidate()
+    start = time.perf_counter()
+    draw_indexed(FakeLayout(), category_list, character_list)
+    first = time.perf_counter() - start
+    indexed = time_redraws(draw_indexed, category_list, character_list, 20)
+    uilist = time_redraws(draw_uilist, category_list, character_list, 20)
+
+    print(f"{entries} entries in {categories} categories, all expanded")
+    print(f"  before (scan + find per row): {legacy * 1000:10.2f} ms / redraw")
+    print(f"  after, first redraw (build):  {first * 1000:10.2f} ms")
+    print(f"  after, cached redraw:         {indexed * 1000:10.2f} ms / redraw")
+    print(f"  uilist, visible rows only:    {uilist * 1000:10.2f} ms / redraw")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# the .blend reader against small files written here: every header and BHead layout it knows, plain and compressed, with
+# and without a thumbnail, and cut short or mangled. blendfile.py doesn't touch bpy, so it's loaded on its own
+import gzip
+import importlib.util
+import os
+import struct
+
+import pytest
+
+BLENDFILE_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "QuickSpawn_Addon", "blendfile.py")
+spec = importlib.util.spec_from_file_location("quickspawn_blendfile", BLENDFILE_PATH)
+blendfile = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(blendfile)
+
+COLLECTIONS = ["Hero", "Rock_Large", "Crate.001"]
+LIBRARIES = ["//lib/props.blend", "/abs/rigs.blend"]
+THUMBNAIL = (3, 2, bytes(range(3 * 2 * 4)))
+
+# struct ID { void *next, *prev; char name[66]; } and struct Library { ID id; char filepath[1024]; }
+SDNA_NAMES = ("*next", "*prev", "name[66]", "id", "filepath[1024]")
+SDNA_TYPES = ("char", "void", "ID", "Library")
+
+# how a file lays out its header and block headers: pointer size, byte order and BHead format version
+class Layout:
+    def __init__(self, pointer_size, endian, format_version):
+        self.pointer_size = pointer_size
+        self.endian = endian
+        self.format_version = format_version
+
+    def header(self):
+        endian = b"v" if self.endian == "<" else b"V"
+        if self.format_version == 0:
+            return b"BLENDER" + (b"-" if self.pointer_size == 8 else b"_") + endian + b"405"
+        return b"BLENDER17-01" + endian + b"0500"
+
+    @property
+    def version(self):
+        return (4, 5) if self.format_version == 0 else (5, 0)
+
+    def bhead(self, code, size, count=1):
+        if self.format_version == 0:
+            pointer = "Q" if self.pointer_size == 8 else "I"
+            return struct.pack(self.endian + "4si" + pointer + "ii", code, size, 0, 0, count)
+        return struct.pack(self.endian + "4siQqq", code, 0, 0, size, count)
+
+    def block(self, code, data):
+        return self.bhead(code, len(data)) + data
+
+    def id_data(self, code, name):
+        return b"\x00" * (2 * self.pointer_size) + (code[:2] + name.encode("utf-8")).ljust(66, b"\x00")
+
+    def sdna(self):
+        def strings(values):
+            data = b"".join(value.encode("ascii") + b"\x00" for value in values)
+            return data + b"\x00" * (-len(data) % 4)
+
+        def ints(*values):
+            return struct.pack(self.endian + f"{len(values)}i", *values)
+
+        def shorts(*values):
+            return struct.pack(self.endian + f"{len(values)}h", *values)
+
+        id_size = 2 * self.pointer_size + 66
+        data = b"SDNA"
+        data += b"NAME" + ints(len(SDNA_NAMES)) + strings(SDNA_NAMES)
+        data += b"TYPE" + ints(len(SDNA_TYPES)) + strings(SDNA_TYPES)
+        data += b"TLEN" + shorts(1, 0, id_size, id_size + 1024)
+        data += b"STRC" + ints(2)
+        data += shorts(2, 3, 1, 0, 1, 1, 0, 2)
+        data += shorts(3, 2, 2, 3, 0, 4)
+        return data
+
+    # a whole file: header, thumbnail, GLOB, the library and collection IDs, DNA1, ENDB
+    def blend(self, collections=COLLECTIONS, libraries=LIBRARIES, thumbnail=THUMBNAIL):
+        data = self.header()
+        if thumbnail is not None:
+            width, height, pixels = thumbnail
+            data += self.block(blendfile.CODE_THUMBNAIL, struct.pack(self.endian + "ii", width, height) + pixels)
+        data += self.block(blendfile.CODE_GLOBAL, b"\x00" * 16)
+        for library in libraries:
+            library_data = self.id_data(blendfile.ID_CODE_LIBRARY, os.path.basename(library))
+            data += self.block(blendfile.ID_CODE_LIBRARY, library_data + library.encode("utf-8").ljust(1024, b"\x00"))
+        for name in collections:
+            data += self.block(blendfile.ID_CODE_COLLECTION, self.id_data(blendfile.ID_CODE_COLLECTION, name))
+        data += self.block(blendfile.CODE_DNA, self.sdna())
+        return data + self.bhead(blendfile.CODE_END, 0, count=0)
+
+LAYOUTS = [
+    pytest.param(Layout(8, "<", 0), id="v0-pointer8"),
+    pytest.param(Layout(4, "<", 0), id="v0-pointer4"),
+    pytest.param(Layout(8, ">", 0), id="v0-pointer8-big-endian"),
+    pytest.param(Layout(4, ">", 0), id="v0-pointer4-big-endian"),
+    pytest.param(Layout(8, "<", 1), id="v1"),
+]
+DEFAULT_LAYOUT = Layout(8, "<", 0)
+
+def compress(data, compression):
+    if compression == "gzip":
+        return gzip.compress(data)
+    if compression == "zstd":
+        zstandard = pytest.importorskip("zstandard")
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+@pytest.fixture
+def write(tmp_path):
+    def write(data, name="library.blend"):
+        path = tmp_path / name
+        path.write_bytes(data)
+        return str(path)
+    return write
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_reads_collections_libraries_and_version(write, layout):
+    info = blendfile.read_blend_info(write(layout.blend()))
+    assert info.collections == COLLECTIONS
+    assert info.libraries == LIBRARIES
+    assert info.version == layout.version
+    assert info.compression is None
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_reads_thumbnail(write, layout):
+    assert blendfile.read_thumbnail(write(layout.blend())) == THUMBNAIL
+
+@pytest.mark.parametrize("compression", [None, "gzip", "zstd"])
+def test_reads_compressed_files(write, compression):
+    path = write(compress(DEFAULT_LAYOUT.blend(), compression))
+    info = blendfile.read_blend_info(path)
+    assert info.compression == compression
+    assert info.collections == COLLECTIONS
+    assert info.libraries == LIBRARIES
+    assert blendfile.read_thumbnail(path) == THUMBNAIL
+
+def test_file_without_collections_or_thumbnail(write):
+    path = write(DEFAULT_LAYOUT.blend(collections=[], libraries=[], thumbnail=None))
+    assert blendfile.list_collections(path) == []
+    assert blendfile.read_thumbnail(path) is None
+
+def test_thumbnail_bigger_than_its_block(write):
+    assert blendfile.read_thumbnail(write(DEFAULT_LAYOUT.blend(thumbnail=(64, 64, b"\x00" * 16)))) is None
+
+def test_missing_file_raises(tmp_path):
+    with pytest.raises(OSError):
+        blendfile.list_collections(str(tmp_path / "missing.blend"))
+
+# the whole file minus its tail, cut inside the ENDB header, the DNA, a collection block, the thumbnail and the file header
+@pytest.mark.parametrize("layout", LAYOUTS)
+@pytest.mark.parametrize("cut", ["end", "dna", "collection", "thumbnail", "header", "empty"])
+def test_truncated_files_read_as_none(write, layout, cut):
+    data = layout.blend()
+    length = {
+        "end": len(data) - 1,
+        "dna": data.index(b"SDNA") + 20,
+        "collection": data.index(b"GRRock") + 3,
+        "thumbnail": data.index(bytes(range(8))) + 4,
+        "header": 5,
+        "empty": 0,
+    }[cut]
+    path = write(data[:length])
+    assert blendfile.list_collections(path) is None
+    assert blendfile.read_blend_info(path) is None
+    if cut in ("thumbnail", "header", "empty"):
+        assert blendfile.read_thumbnail(path) is None
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+def test_truncated_compressed_files_read_as_none(write, compression):
+    data = compress(DEFAULT_LAYOUT.blend(), compression)
+    path = write(data[:len(data) // 2])
+    assert blendfile.list_collections(path) is None
+    assert blendfile.read_thumbnail(path) is None
+
+@pytest.mark.parametrize("data", [
+    pytest.param(b"PK\x03\x04" + b"\x00" * 64, id="not-a-blend"),
+    pytest.param(b"BLENDER-vabc" + b"\x00" * 64, id="bad-version"),
+    pytest.param(blendfile.GZIP_MAGIC + b"\x08\x00" + b"\xff" * 64, id="bad-gzip"),
+    pytest.param(blendfile.ZSTD_MAGIC + b"\xff" * 64, id="bad-zstd"),
+    pytest.param(DEFAULT_LAYOUT.blend().replace(b"SDNANAME", b"SDNAXXXX"), id="bad-dna"),
+    pytest.param(DEFAULT_LAYOUT.blend().replace(b"DNA1", b"DNA2"), id="no-dna"),
+    pytest.param(Layout(8, "<", 1).blend().replace(Layout(8, "<", 1).bhead(b"GLOB", 16), Layout(8, "<", 1).bhead(b"GLOB", -16)),
+                 id="negative-size"),
+])
+def test_corrupt_files_read_as_none(write, data):
+    path = write(data)
+    assert blendfile.list_collections(path) is None
+    assert blendfile.read_blend_info(path) is None
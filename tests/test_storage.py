@@ -0,0 +1,65 @@
+# the journal store against crashes mid-write: a torn last record is dropped on load and cut off the file, and the saves
+# after it still replay. storage.py doesn't touch bpy, so it's loaded on its own
+import importlib.util
+import json
+import os
+
+STORAGE_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "QuickSpawn_Addon", "storage.py")
+spec = importlib.util.spec_from_file_location("quickspawn_storage", STORAGE_PATH)
+storage = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(storage)
+
+def entry(name):
+    return {"id": name, "category": "Props", "collection": name, "filepath": f"//lib/{name}.blend"}
+
+def names(config):
+    return [item["collection"] for item in config.get(storage.QUICKSPAWN_CHARACTERLIST, [])]
+
+def add_entry(store, config, name):
+    config = storage.copy_config(config)
+    config.setdefault(storage.QUICKSPAWN_CHARACTERLIST, []).append(entry(name))
+    store.save(config)
+    return config
+
+# a snapshot with "a" and a journal adding "b" and "c", the last one written only halfway
+def torn_store(tmp_path):
+    filepath = str(tmp_path / "quickspawn.json")
+    store = storage.JournalStore(filepath)
+    config = store.load()
+    config[storage.QUICKSPAWN_CHARACTERLIST] = [entry("a")]
+    store.compact(config)
+    config = add_entry(store, config, "b")
+    config = add_entry(store, config, "c")
+    with open(store.journal_path, 'rb') as file:
+        data = file.read()
+    with open(store.journal_path, 'wb') as file:
+        file.write(data[:len(data) - len(data.splitlines(True)[-1]) // 2])
+    return filepath
+
+def test_torn_record_is_dropped_and_cut_off(tmp_path):
+    filepath = torn_store(tmp_path)
+    store = storage.JournalStore(filepath)
+    assert names(store.load()) == ["a", "b"]
+    with open(store.journal_path, 'rb') as file:
+        assert file.read().endswith(b"\n")
+
+def test_save_after_torn_record_replays(tmp_path):
+    filepath = torn_store(tmp_path)
+    store = storage.JournalStore(filepath)
+    add_entry(store, store.load(), "d")
+    assert names(storage.JournalStore(filepath).load()) == ["a", "b", "d"]
+
+def test_save_after_record_missing_its_newline(tmp_path):
+    filepath = str(tmp_path / "quickspawn.json")
+    store = storage.JournalStore(filepath)
+    config = add_entry(store, store.load(), "a")
+    config = add_entry(store, config, "b")
+    with open(store.journal_path, 'rb') as file:
+        data = file.read()
+    with open(store.journal_path, 'wb') as file:
+        file.write(data.rstrip(b"\n"))
+    store = storage.JournalStore(filepath)
+    add_entry(store, store.load(), "c")
+    assert names(storage.JournalStore(filepath).load()) == ["a", "b", "c"]
+    with open(store.journal_path, 'r') as file:
+        assert [json.loads(line)["item"]["collection"] for line in file] == ["a", "b", "c"]